@@ -1,23 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from core.database import get_db
-from core.security import Security
+from core.config import settings
+from core.security import crear_token_acceso, hasher_contrasenas, verificador_tokens
+from fastapi.concurrency import run_in_threadpool
 from models.db_models import Usuario, Vendedor, Consumidor
 from api.schemas.user_schema import UserCreate, UserResponse
 import datetime
 
 router = APIRouter()
 
-@router.post("/register", response_model=UserResponse)
-def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
-    # 1. Verificar si el correo ya existe
-    db_user = db.query(Usuario).filter(Usuario.correo_electronico == user_data.correo_electronico).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="El correo ya está registrado")
-
-    # 2. Encriptar contraseña (RNF-03)
-    hashed_pwd = Security.hash_password(user_data.contrasena_usuario)
+def _correo_registrado(db: Session, correo: str) -> bool:
+    return db.query(Usuario.id_usuario).filter(Usuario.correo_electronico == correo).first() is not None
 
+def _crear_usuario(db: Session, user_data: UserCreate, hashed_pwd: str) -> Usuario:
     # 3. Crear el usuario base en la tabla 'usuarios'
     nuevo_usuario = Usuario(
         nombre_usuario=user_data.nombre_usuario,
@@ -53,20 +50,66 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         db.add(perfil_consumidor)
 
     db.commit()
+    db.refresh(nuevo_usuario)
     return nuevo_usuario
 
+# Los handlers son async: bcrypt corre en el pool de procesos (core.security) y
+# las consultas en el threadpool, así un pico de logins no bloquea al worker
+@router.post("/register", response_model=UserResponse)
+async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+    # 1. Verificar si el correo ya existe
+    if await run_in_threadpool(_correo_registrado, db, user_data.correo_electronico):
+        raise HTTPException(status_code=400, detail="El correo ya está registrado")
+
+    # 2. Encriptar contraseña (RNF-03)
+    hashed_pwd = await hasher_contrasenas.hash(user_data.contrasena_usuario)
+
+    return await run_in_threadpool(_crear_usuario, db, user_data, hashed_pwd)
+
+def consulta_login(correo: str):
+    # Solo las columnas que necesita el login, con el id del perfil para el token
+    return select(
+        Usuario.id_usuario, Usuario.nombre_usuario, Usuario.id_rol, Usuario.contrasena_usuario,
+        Vendedor.id_vendedor, Consumidor.id_consumidor
+    ).outerjoin(Vendedor, Vendedor.id_usuario == Usuario.id_usuario)\
+        .outerjoin(Consumidor, Consumidor.id_usuario == Usuario.id_usuario)\
+        .where(Usuario.correo_electronico == correo)
+
+def _buscar_usuario(db: Session, correo: str):
+    return db.execute(consulta_login(correo)).first()
+
 @router.post("/login")
-def login(request: dict, db: Session = Depends(get_db)):
+async def login(request: dict, db: Session = Depends(get_db)):
     # Buscar usuario por correo
-    user = db.query(Usuario).filter(Usuario.correo_electronico == request["correo"]).first()
+    user = await run_in_threadpool(_buscar_usuario, db, request["correo"])
     
-    if not user or not Security.verify_password(request["contrasena"], user.contrasena_usuario):
+    if not user or not await hasher_contrasenas.verificar(request["contrasena"], user.contrasena_usuario):
         raise HTTPException(status_code=401, detail="Credenciales incorrectas")
 
+    # Token firmado: las rutas obtienen id y rol de él sin consultar 'usuarios'
+    claims = {"sub": str(user.id_usuario), "rol": "VENDEDOR" if user.id_rol == 2 else "CONSUMIDOR"}
+    if user.id_vendedor is not None:
+        claims["id_vendedor"] = user.id_vendedor
+    if user.id_consumidor is not None:
+        claims["id_consumidor"] = user.id_consumidor
+
     # Retornar datos básicos y el rol para que el Frontend sepa qué mostrar
-    return {
+    respuesta = {
         "id_usuario": user.id_usuario,
         "nombre": user.nombre_usuario,
         "rol": "Vendedor" if user.id_rol == 2 else "Consumidor",
-        "message": "Login exitoso"
-    }
\ No newline at end of file
+        "message": "Login exitoso",
+    }
+    # Sin SECRET_KEY el login sigue funcionando como antes, solo que sin token
+    if settings.SECRET_KEY:
+        respuesta.update({
+            "access_token": crear_token_acceso(claims),
+            "token_type": "bearer",
+            "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        })
+    return respuesta
+
+@router.get("/estadisticas")
+def auth_stats():
+    # Cola y tiempos del pool de bcrypt y cache de tokens de este worker
+    return {"bcrypt": hasher_contrasenas.estadisticas(), "tokens": verificador_tokens.estadisticas()}
@@ -1,18 +1,35 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from core.database import get_db
-from services.chatbot import ChatbotService
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.database import get_async_db_lectura
+from core.security import usuario_opcional
+from typing import Optional
+from services.chatbot import ChatbotService, historiales_activos
+from services.intent_router import resumen_enrutamiento
 from api.schemas.chat_schema import ChatRequest
 
 router = APIRouter()
 
 @router.post("/chat")
-async def chat(payload: dict, db: Session = Depends(get_db)):
+async def chat(payload: dict, db: AsyncSession = Depends(get_async_db_lectura), claims: Optional[dict] = Depends(usuario_opcional)):
     service = ChatbotService(db)
     # Java envía 'id_usuario', 'rol' (String) y 'mensaje'
+    rol = payload.get("rol") # "VENDEDOR" o "CONSUMIDOR"
+    id_usuario = payload.get("id_usuario")
+    if claims is not None:
+        # Con token, identidad y rol salen de los claims verificados (no del cuerpo)
+        rol = claims["rol"]
+        id_usuario = claims.get("id_vendedor", int(claims["sub"])) if rol == "VENDEDOR" else int(claims["sub"])
     respuesta = await service.handle_request(
         message=payload.get("mensaje"),
-        rol=payload.get("rol"), # "VENDEDOR" o "CONSUMIDOR"
-        id_usuario=payload.get("id_usuario")
+        rol=rol,
+        id_usuario=id_usuario
     )
-    return {"respuesta": respuesta}
\ No newline at end of file
+    return {"respuesta": respuesta}
+
+@router.get("/estadisticas")
+def chat_stats():
+    # Porcentaje de mensajes resueltos sin llamar al LLM y estado del historial
+    return {
+        "enrutamiento": resumen_enrutamiento(),
+        "historial": historiales_activos.estadisticas()
+    }
\ No newline at end of file
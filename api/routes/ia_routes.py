@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Body
-from services.price_recommender import recomendar_precio
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Body, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from core.database import get_async_db_lectura, get_db
+from services.price_recommender import recomendar_precio_async
+from services.demand_predictor import DemandPredictor
+from core.security import solo_interno
+from models.ml_models.registry import registro_modelos
 
 router = APIRouter()
 
 @router.post("/precio/recomendar")
-async def api_recomendar_precio(payload: dict = Body(...)):
+async def api_recomendar_precio(payload: dict = Body(...), db: AsyncSession = Depends(get_async_db_lectura)):
     nombre = payload.get("nombre")
     precio = payload.get("precio")
     unidad = payload.get("unidad", "unidad")  # 🔹 Nuevo: recibir unidad
@@ -19,4 +27,66 @@ async def api_recomendar_precio(payload: dict = Body(...)):
         return {"error": "Precio inválido"}
     
     # 🔹 Llamar a la función actualizada con unidad
-    return recomendar_precio(nombre, precio_float, unidad)
\ No newline at end of file
+    return await recomendar_precio_async(db, nombre, precio_float, unidad)
+
+def _leer_identificadores(payload: dict) -> Tuple[Optional[int], List[int], Optional[str]]:
+    """(id_vendedor, ids_producto, error) del cuerpo de /demanda y /pronostico."""
+    id_vendedor = payload.get("id_vendedor")
+    ids_producto = payload.get("ids_producto") or []
+    if id_vendedor is None and not ids_producto:
+        return None, [], "Se requiere 'id_vendedor' o 'ids_producto'"
+    # Un string se recorrería carácter por carácter ("123" -> 1, 2, 3)
+    if not isinstance(ids_producto, list):
+        return None, [], "'ids_producto' debe ser una lista de enteros"
+    try:
+        id_vendedor = int(id_vendedor) if id_vendedor is not None else None
+        ids_producto = [int(i) for i in ids_producto]
+    except (TypeError, ValueError):
+        return None, [], "Identificadores inválidos"
+    return id_vendedor, ids_producto, None
+
+@router.post("/demanda")
+def api_predecir_demanda(payload: dict = Body(...), db: Session = Depends(get_db)):
+    # RF-07: Predicción de demanda para todo el inventario de un vendedor (o una lista de productos)
+    id_vendedor, ids_producto, error = _leer_identificadores(payload)
+    if error:
+        return {"error": error}
+
+    predictor = DemandPredictor(db)
+    productos = predictor.predict_demand_bulk(id_vendedor=id_vendedor, ids_producto=ids_producto)
+
+    resumen = {"ALTA": 0, "MEDIA": 0, "BAJA": 0}
+    for p in productos:
+        resumen[p["nivel"]] += 1
+
+    return {
+        "factor_estacional": predictor.get_seasonal_boost(),
+        "total_productos": len(productos),
+        "resumen": resumen,
+        "productos": productos
+    }
+
+@router.post("/pronostico")
+def api_pronostico_demanda(payload: dict = Body(...), db: Session = Depends(get_db)):
+    # Pronósticos precalculados por scripts/forecast_batch.py (solo lectura)
+    id_vendedor, ids_producto, error = _leer_identificadores(payload)
+    if error:
+        return {"error": error}
+
+    # NumPy (servicio de pronósticos) se importa con la primera consulta, no al importar la API
+    from services.demand_forecaster import obtener_pronosticos
+    pronosticos = obtener_pronosticos(db, id_vendedor=id_vendedor, ids_producto=ids_producto)
+    return {"total_productos": len(pronosticos), "productos": pronosticos}
+
+@router.get("/modelos")
+def api_estado_modelos():
+    # Versión cargada de cada modelo entrenado en este worker
+    return {"modelos": registro_modelos.estado()}
+
+@router.post("/modelos/recargar", dependencies=[Depends(solo_interno)])
+def api_recargar_modelos(payload: dict = Body(default={})):
+    # Recarga en caliente tras publicar un artefacto nuevo (sin reiniciar)
+    nombre = payload.get("nombre")
+    if nombre and not registro_modelos.registrado(nombre):
+        raise HTTPException(status_code=404, detail="Modelo no registrado")
+    return {"modelos": registro_modelos.recargar(nombre)}
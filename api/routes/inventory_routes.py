@@ -1,13 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from core.database import get_db
+from core.config import settings
+from core.database import get_db, get_db_lectura
 from models.db_models import Producto, Vendedor
 from api.schemas.product_schema import ProductCreate, ProductUpdate, ProductResponse
-from typing import List
+from services.context_cache import contexto_productos
+from services.product_import import ProductImporter
+from services.inventory_versions import versiones_inventario
+from utils.paginacion import codificar_cursor, decodificar_cursor, validar_limite
+from utils.streaming import leer_csv, leer_ndjson
+from typing import List, Optional
 import datetime
+import time
 
 router = APIRouter()
 
+TIPOS_CSV = ("text/csv", "application/csv")
+TIPOS_NDJSON = ("application/x-ndjson", "application/ndjson", "application/jsonlines")
+MAX_ERRORES_REPORTADOS = 1000
+
+# Columnas que puede pedir el listado con ?campos= (por defecto todas las de ProductResponse)
+CAMPOS_INVENTARIO = {
+    "id_producto": Producto.id_producto,
+    "nombre_producto": Producto.nombre_producto,
+    "descripcion_producto": Producto.descripcion_producto,
+    "precio_producto": Producto.precio_producto,
+    "stock_producto": Producto.stock_producto,
+    "unidad": Producto.unidad,
+    "id_subcategoria": Producto.id_subcategoria,
+    "id_vendedor": Producto.id_vendedor,
+    "fecha_publicacion": Producto.fecha_publicacion,
+    "estado": Producto.estado,
+}
+
+def consulta_inventario(id_vendedor: int, nombres: List[str], limit: int, despues_de: Optional[int] = None):
+    """
+    SELECT de una página del inventario (columnas de CAMPOS_INVENTARIO) ordenada
+    por id_producto. scripts/check_query_plans.py revisa su plan de ejecución.
+    """
+    consulta = select(*[CAMPOS_INVENTARIO[c] for c in nombres]).where(Producto.id_vendedor == id_vendedor)
+    if despues_de is not None:
+        consulta = consulta.where(Producto.id_producto > despues_de)
+    return consulta.order_by(Producto.id_producto).limit(limit)
+
+def _inventario_modificado(id_vendedor: int):
+    # Cache del chatbot y versión del listado (ETag) del vendedor
+    contexto_productos.invalidar_vendedor(id_vendedor)
+    versiones_inventario.incrementar([id_vendedor])
+
+def _confirmar(db: Session):
+    # ux_productos_vendedor_nombre: un nombre por vendedor (la importación hace upsert por él)
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        mensaje = str(e.orig)
+        if "ux_productos_vendedor_nombre" in mensaje or "productos.nombre_producto" in mensaje:
+            raise HTTPException(status_code=409, detail="El vendedor ya tiene un producto con ese nombre")
+        raise
+
 # 1. Crear Producto (RF-02)
 @router.post("/", response_model=ProductResponse)
 def create_product(product_data: ProductCreate, db: Session = Depends(get_db)):
@@ -28,14 +85,56 @@ def create_product(product_data: ProductCreate, db: Session = Depends(get_db)):
         estado="ACTIVO"
     )
     db.add(nuevo_producto)
-    db.commit()
+    _confirmar(db)
     db.refresh(nuevo_producto)
+    _inventario_modificado(nuevo_producto.id_vendedor)
     return nuevo_producto
 
 # 2. Leer productos de un vendedor específico (Para el Dashboard del Productor)
 @router.get("/vendedor/{id_vendedor}", response_model=List[ProductResponse])
-def get_vendedor_inventory(id_vendedor: int, db: Session = Depends(get_db)):
-    return db.query(Producto).filter(Producto.id_vendedor == id_vendedor).all()
+def get_vendedor_inventory(id_vendedor: int, request: Request, response: Response, limit: int = 100,
+                           cursor: Optional[str] = None, campos: Optional[str] = None,
+                           db: Session = Depends(get_db_lectura)):
+    """
+    Página del inventario ordenada por id_producto (keyset: X-Next-Cursor).
+    ?campos=id_producto,nombre_producto,... limita las columnas leídas y devueltas
+    (sin ?campos la respuesta es la lista de ProductResponse de siempre).
+    Responde 304 sin consultar la base si If-None-Match coincide con la versión actual.
+    """
+    # La versión se lee antes de consultar: si cambia durante la consulta el ETag queda viejo, no al revés
+    etag = versiones_inventario.etag(id_vendedor, str(request.query_params))
+    cabeceras = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [e.strip() for e in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=cabeceras)
+
+    # Inventario modificado hace menos que el retraso tolerado: una réplica podría
+    # devolver la versión anterior bajo el ETag nuevo, así que se lee del primario
+    if time.time_ns() - versiones_inventario.obtener(id_vendedor) < settings.DB_REPLICA_RETRASO_MAX_SEGUNDOS * 1e9:
+        db.usar_primario()
+
+    limit = validar_limite(limit)
+    nombres = [c.strip() for c in campos.split(",") if c.strip()] if campos else list(CAMPOS_INVENTARIO)
+    invalidos = [c for c in nombres if c not in CAMPOS_INVENTARIO]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(invalidos)}")
+    if "id_producto" not in nombres:
+        nombres.insert(0, "id_producto")
+
+    ultimo = None
+    if cursor:
+        (ultimo,) = decodificar_cursor(cursor, 1)
+        if not isinstance(ultimo, int):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+    filas = db.execute(consulta_inventario(id_vendedor, nombres, limit + 1, ultimo)).all()
+
+    if len(filas) > limit:
+        filas = filas[:limit]
+        cabeceras["X-Next-Cursor"] = codificar_cursor(filas[-1].id_producto)
+    if campos:
+        # Proyección parcial: no cumple ProductResponse, se serializa sin response_model
+        return JSONResponse(jsonable_encoder([dict(f._mapping) for f in filas]), headers=cabeceras)
+    response.headers.update(cabeceras)
+    return [dict(f._mapping) for f in filas]
 
 # 3. Actualizar Producto (RF-02)
 @router.put("/{id_producto}", response_model=ProductResponse)
@@ -49,8 +148,9 @@ def update_product(id_producto: int, product_data: ProductUpdate, db: Session =
         if value is not None:
             setattr(db_product, var, value)
             
-    db.commit()
+    _confirmar(db)
     db.refresh(db_product)
+    _inventario_modificado(db_product.id_vendedor)
     return db_product
 
 # 4. Eliminar Producto (RF-02)
@@ -60,6 +160,86 @@ def delete_product(id_producto: int, db: Session = Depends(get_db)):
     if not db_product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     
+    id_vendedor = db_product.id_vendedor
     db.delete(db_product)
     db.commit()
-    return {"message": "Producto eliminado exitosamente"}
\ No newline at end of file
+    _inventario_modificado(id_vendedor)
+    return {"message": "Producto eliminado exitosamente"}
+
+# 5. Importación masiva del catálogo (CSV o NDJSON)
+@router.post("/vendedor/{id_vendedor}/import")
+async def import_products(id_vendedor: int, request: Request, lote: int = 500, db: Session = Depends(get_db)):
+    """
+    Crea o actualiza productos por (vendedor, nombre_producto) leyendo el cuerpo
+    línea a línea (Content-Type text/csv con cabecera, o application/x-ndjson).
+    Cada fila se valida con ProductCreate; las válidas se escriben por lotes.
+    """
+    if lote < 1 or lote > 5000:
+        raise HTTPException(status_code=400, detail="El lote debe estar entre 1 y 5000")
+    tipo = request.headers.get("content-type", "").split(";")[0].strip()
+    if tipo in TIPOS_CSV:
+        registros = leer_csv(request)
+    elif tipo in TIPOS_NDJSON:
+        registros = leer_ndjson(request)
+    else:
+        raise HTTPException(status_code=415, detail="Se acepta text/csv o application/x-ndjson")
+
+    vendedor = await run_in_threadpool(
+        lambda: db.query(Vendedor.id_vendedor).filter(Vendedor.id_vendedor == id_vendedor).first()
+    )
+    if not vendedor:
+        raise HTTPException(status_code=404, detail="Vendedor no encontrado")
+
+    inicio = time.perf_counter()
+    importador = ProductImporter(db, id_vendedor)
+    resumen = {"filas": 0, "insertados": 0, "actualizados": 0, "errores": 0}
+    errores = []
+    pendientes = []
+
+    def error(linea: int, detalle):
+        resumen["errores"] += 1
+        if len(errores) < MAX_ERRORES_REPORTADOS:
+            errores.append({"linea": linea, "error": detalle})
+
+    async def guardar():
+        try:
+            insertados, actualizados = await run_in_threadpool(importador.guardar_lote, [p for _, p in pendientes])
+        except Exception as e:
+            # Los lotes anteriores ya se confirmaron: las filas de este (ya revertido)
+            # se informan como errores y la importación sigue con el resto
+            detalle = f"No se pudo guardar el lote ({type(e).__name__}); revisa id_subcategoria"
+            for linea, _ in pendientes:
+                error(linea, detalle)
+            pendientes.clear()
+            return
+        resumen["insertados"] += insertados
+        resumen["actualizados"] += actualizados
+        pendientes.clear()
+        # Una invalidación por lote (no por fila) del contexto del chatbot y del ETag
+        _inventario_modificado(id_vendedor)
+
+    async for linea, valor in registros:
+        resumen["filas"] += 1
+        if not isinstance(valor, dict):
+            error(linea, "Formato de fila inválido")
+            continue
+        if str(valor.get("id_vendedor") or id_vendedor) != str(id_vendedor):
+            error(linea, "El producto pertenece a otro vendedor")
+            continue
+        try:
+            pendientes.append((linea, ProductCreate.model_validate({**valor, "id_vendedor": id_vendedor})))
+        except ValidationError as e:
+            error(linea, e.errors(include_url=False))
+            continue
+        if len(pendientes) >= lote:
+            await guardar()
+    if pendientes:
+        await guardar()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        **resumen,
+        "segundos": round(segundos, 3),
+        "filas_por_segundo": round(resumen["filas"] / segundos, 1) if segundos > 0 else None,
+        "detalle_errores": errores
+    }
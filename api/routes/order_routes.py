@@ -1,63 +1,120 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from core.database import get_db
-from models.db_models import Pedido, DetallesPedido, Producto, Pago
+from core.database import get_async_db, get_async_db_lectura, get_db
+from models.db_models import Pedido
+from services.order_service import OrderService
 from api.schemas.order_schema import OrderCreate, OrderResponse
-from typing import List
+from utils.streaming import leer_ndjson
+from utils.paginacion import codificar_cursor, decodificar_cursor, validar_limite
+from typing import List, Optional
 import datetime
+import json
+import time
 
 router = APIRouter()
 
+# Columnas de OrderResponse: los listados no cargan el objeto Pedido completo
+COLUMNAS_PEDIDO = (
+    Pedido.id_pedido, Pedido.id_consumidor, Pedido.id_vendedor,
+    Pedido.fecha_pedido, Pedido.total, Pedido.estado_pedido
+)
+
+TIPOS_NDJSON = ("application/x-ndjson", "application/ndjson", "application/jsonlines")
+
 # 1. Crear un Pedido (RF-04: Checkout)
 @router.post("/", response_model=OrderResponse)
-def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
-    # Calcular totales y validar stock
-    total_pedido = 0
-    items_procesados = []
-
-    for item in order_data.items:
-        producto = db.query(Producto).filter(Producto.id_producto == item.id_producto).first()
-        if not producto or producto.stock_producto < item.cantidad:
-            raise HTTPException(status_code=400, detail=f"Stock insuficiente para {producto.nombre_producto}")
-        
-        subtotal = producto.precio_producto * item.cantidad
-        total_pedido += subtotal
-        
-        # Descontar stock
-        producto.stock_producto -= item.cantidad
-        items_procesados.append({
-            "id_producto": producto.id_producto,
-            "cantidad": item.cantidad,
-            "precio_unitario": producto.precio_producto,
-            "subtotal": subtotal
-        })
-
-    # Crear cabecera del pedido
-    nuevo_pedido = Pedido(
-        id_consumidor=order_data.id_consumidor,
-        id_vendedor=order_data.id_vendedor,
-        fecha_pedido=datetime.datetime.now(),
-        estado_pedido="PENDIENTE", # RF-05: Estado inicial
-        total=total_pedido,
-        metodo_pago=order_data.metodo_pago
-    )
-    db.add(nuevo_pedido)
-    db.commit()
-    db.refresh(nuevo_pedido)
-
-    # Crear los detalles del pedido
-    for item in items_procesados:
-        detalle = DetallesPedido(
-            id_pedido=nuevo_pedido.id_pedido,
-            id_producto=item["id_producto"],
-            cantidad=item["cantidad"],
-            precio_unitario=item["precio_unitario"],
-            subtotal=item["subtotal"]
-        )
-        db.add(detalle)
-    
-    db.commit()
-    return nuevo_pedido
+async def create_order(order_data: OrderCreate, db: AsyncSession = Depends(get_async_db)):
+    # Stock, cabecera, detalles y agregado diario en una sola transacción.
+    # run_sync reutiliza OrderService; cada consulta espera en el driver async.
+    return await db.run_sync(lambda sesion: OrderService(sesion).crear_pedido(order_data))
+
+# 1b. Ingesta masiva de pedidos (sincronización de pedidos offline/telefónicos)
+@router.post("/bulk")
+async def bulk_create_orders(request: Request, lote: int = 500, db: Session = Depends(get_db)):
+    """
+    Acepta un arreglo JSON de OrderCreate o un flujo NDJSON (un pedido por línea,
+    Content-Type: application/x-ndjson). Cada lote de `lote` pedidos se valida
+    contra el stock y se escribe en una transacción; el NDJSON se procesa a
+    medida que llega.
+    """
+    if lote < 1 or lote > 5000:
+        raise HTTPException(status_code=400, detail="El lote debe estar entre 1 y 5000")
+
+    inicio = time.perf_counter()
+    resultados = []
+    pendientes = []
+
+    async def procesar():
+        servicio = OrderService(db)
+        pedidos = [p for _, p in pendientes]
+        try:
+            try:
+                parciales = await run_in_threadpool(servicio.crear_pedidos_lote, pedidos)
+            except HTTPException as e:
+                # Conflicto de stock con otra escritura concurrente: se reintenta una vez
+                if e.status_code != 409:
+                    raise
+                parciales = await run_in_threadpool(servicio.crear_pedidos_lote, pedidos)
+        except Exception as e:
+            # Los lotes anteriores ya se confirmaron: este se informa como ERROR (el
+            # servicio ya hizo rollback) y se sigue con el resto, así el cliente
+            # reintenta solo estos índices y no duplica los pedidos creados
+            detalle = e.detail if isinstance(e, HTTPException) \
+                else f"No se pudo guardar el lote ({type(e).__name__}); revisa consumidor/vendedor"
+            parciales = [{"estado": "ERROR", "detalle": detalle}] * len(pendientes)
+        for (indice, _), resultado in zip(pendientes, parciales):
+            resultados.append({**resultado, "indice": indice})
+        pendientes.clear()
+
+    async def registrar(indice: int, valor):
+        try:
+            pendientes.append((indice, OrderCreate.model_validate(valor)))
+        except ValidationError as e:
+            resultados.append({"indice": indice, "estado": "INVALIDO", "detalle": e.errors(include_url=False)})
+            return
+        if len(pendientes) >= lote:
+            await procesar()
+
+    if request.headers.get("content-type", "").split(";")[0].strip() in TIPOS_NDJSON:
+        indice = 0
+        async for _, valor in leer_ndjson(request):
+            if valor is None:
+                resultados.append({"indice": indice, "estado": "INVALIDO", "detalle": "JSON inválido"})
+            else:
+                await registrar(indice, valor)
+            indice += 1
+    else:
+        try:
+            valores = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="JSON inválido")
+        if not isinstance(valores, list):
+            raise HTTPException(status_code=400, detail="Se esperaba un arreglo de pedidos")
+        for indice, valor in enumerate(valores):
+            await registrar(indice, valor)
+    if pendientes:
+        await procesar()
+
+    segundos = time.perf_counter() - inicio
+    resultados.sort(key=lambda r: r["indice"])
+    creados = [r for r in resultados if r["estado"] == "CREADO"]
+    filas = len(creados) + sum(r["lineas"] for r in creados)
+    return {
+        "total_pedidos": len(resultados),
+        "creados": len(creados),
+        "rechazados": sum(1 for r in resultados if r["estado"] == "RECHAZADO"),
+        "invalidos": sum(1 for r in resultados if r["estado"] == "INVALIDO"),
+        "errores": sum(1 for r in resultados if r["estado"] == "ERROR"),
+        "filas_escritas": filas,
+        "segundos": round(segundos, 3),
+        "filas_por_segundo": round(filas / segundos, 1) if segundos > 0 else None,
+        "pedidos_por_segundo": round(len(creados) / segundos, 1) if segundos > 0 else None,
+        "resultados": resultados
+    }
 
 # 2. Actualizar Estado del Pedido (RF-05: Para el Productor)
 @router.patch("/{id_pedido}/estado")
@@ -71,12 +128,66 @@ def update_order_status(id_pedido: int, nuevo_estado: str, db: Session = Depends
     db.commit()
     return {"message": f"Pedido actualizado a: {nuevo_estado}"}
 
+def consulta_pedidos(filtro, limit: int, estado: Optional[str] = None, desde: Optional[datetime.date] = None,
+                     hasta: Optional[datetime.date] = None, despues_de: Optional[tuple] = None):
+    """
+    SELECT de una página de pedidos ordenada por (fecha_pedido, id_pedido)
+    descendente; despues_de = (fecha_pedido, id_pedido) del último de la página
+    anterior (keyset). scripts/check_query_plans.py revisa su plan de ejecución.
+    """
+    consulta = select(*COLUMNAS_PEDIDO).where(filtro, Pedido.fecha_pedido.isnot(None))
+    if estado:
+        consulta = consulta.where(Pedido.estado_pedido == estado)
+    if desde:
+        consulta = consulta.where(Pedido.fecha_pedido >= datetime.datetime.combine(desde, datetime.time.min))
+    if hasta:
+        consulta = consulta.where(
+            Pedido.fecha_pedido < datetime.datetime.combine(hasta + datetime.timedelta(days=1), datetime.time.min)
+        )
+    if despues_de:
+        fecha, id_pedido = despues_de
+        consulta = consulta.where(or_(
+            Pedido.fecha_pedido < fecha,
+            and_(Pedido.fecha_pedido == fecha, Pedido.id_pedido < id_pedido)
+        ))
+    return consulta.order_by(Pedido.fecha_pedido.desc(), Pedido.id_pedido.desc()).limit(limit)
+
+async def _listar_pedidos(db: AsyncSession, response: Response, filtro, limit: int, cursor: Optional[str],
+                          estado: Optional[str], desde: Optional[datetime.date], hasta: Optional[datetime.date]):
+    """
+    Página de pedidos ordenada por (fecha_pedido, id_pedido) descendente, con
+    paginación por cursor (keyset): cada página es un rango del índice
+    compuesto, sin OFFSET. Solo se cargan las columnas de OrderResponse.
+    Los pedidos con fecha_pedido NULL (la columna lo admite) no se listan:
+    no tienen lugar en el orden del cursor y OrderResponse exige la fecha.
+    El cursor de la página siguiente viaja en la cabecera X-Next-Cursor.
+    """
+    limit = validar_limite(limit)
+    despues_de = None
+    if cursor:
+        fecha, id_pedido = decodificar_cursor(cursor, 2)
+        try:
+            despues_de = (datetime.datetime.fromisoformat(fecha), int(id_pedido))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    # Se pide una fila extra para saber si hay página siguiente
+    filas = (await db.execute(consulta_pedidos(filtro, limit + 1, estado, desde, hasta, despues_de))).all()
+    if len(filas) > limit:
+        filas = filas[:limit]
+        response.headers["X-Next-Cursor"] = codificar_cursor(filas[-1].fecha_pedido, filas[-1].id_pedido)
+    return [dict(f._mapping) for f in filas]
+
 # 3. Listar pedidos para el Productor (RF-05)
 @router.get("/vendedor/{id_vendedor}", response_model=List[OrderResponse])
-def get_seller_orders(id_vendedor: int, db: Session = Depends(get_db)):
-    return db.query(Pedido).filter(Pedido.id_vendedor == id_vendedor).all()
+async def get_seller_orders(id_vendedor: int, response: Response, limit: int = 100, cursor: Optional[str] = None,
+                            estado: Optional[str] = None, desde: Optional[datetime.date] = None,
+                            hasta: Optional[datetime.date] = None, db: AsyncSession = Depends(get_async_db_lectura)):
+    return await _listar_pedidos(db, response, Pedido.id_vendedor == id_vendedor, limit, cursor, estado, desde, hasta)
 
 # 4. Listar pedidos para el Consumidor (Historial)
 @router.get("/consumidor/{id_consumidor}", response_model=List[OrderResponse])
-def get_consumer_orders(id_consumidor: int, db: Session = Depends(get_db)):
-    return db.query(Pedido).filter(Pedido.id_consumidor == id_consumidor).all()
\ No newline at end of file
+async def get_consumer_orders(id_consumidor: int, response: Response, limit: int = 100, cursor: Optional[str] = None,
+                              estado: Optional[str] = None, desde: Optional[datetime.date] = None,
+                              hasta: Optional[datetime.date] = None, db: AsyncSession = Depends(get_async_db_lectura)):
+    return await _listar_pedidos(db, response, Pedido.id_consumidor == id_consumidor, limit, cursor, estado, desde, hasta)
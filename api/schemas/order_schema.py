@@ -1,11 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
 # Esquema para los items individuales dentro de un pedido
 class OrderItem(BaseModel):
     id_producto: int
-    cantidad: int
+    cantidad: int = Field(gt=0) # Cada línea por separado (-1 y +2 no suman un 1 válido)
 
 # Esquema para crear un pedido (lo que envía el Frontend)
 class OrderCreate(BaseModel):
@@ -1,21 +1,120 @@
+import time
+
+# Inicio de la importación: se reporta en /api/salud/listo junto con las etapas del arranque
+_INICIO_IMPORTACION = time.perf_counter()
+
+import argparse
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 # Importación de configuraciones y base de datos
+from core.arranque import EstadoArranque
 from core.config import settings
-from core.database import engine, Base
+from core.metrics import MiddlewareMetricas, registro_metricas
+from core.database import (
+    engine, async_engine, estado_pool, precalentar_pools, replicas_lectura, SessionLecturaLocal
+)
+from core.security import hasher_contrasenas
 
-# Importación de rutas existentes
+# Rutas: FastAPI necesita la tabla de rutas antes de servir, así que se importan aquí.
+# Lo pesado de los servicios (joblib/scikit-learn del registro de modelos, NumPy de los
+# pronósticos) se importa con el primer uso o en el precalentamiento, no al importar la API
 from api.routes import auth_routes, inventory_routes, chat_routes, order_routes, ia_routes
+from models.ml_models.registry import registro_modelos
+from services.context_cache import contexto_productos
+from services.intent_detector import IntentDetector
+from services.ollama_service import OllamaService
+
+logger = logging.getLogger("mercado_local.pool")
+arranque = EstadoArranque(_INICIO_IMPORTACION)
+
+
+# --- ARRANQUE POR ETAPAS ---
+
+def _migrar():
+    # Alembic se importa solo si hay que migrar (no en cada worker de producción)
+    from core.migraciones import aplicar_migraciones
+    aplicar_migraciones()
+
+def _cargar_modelos():
+    registro_modelos.recargar()
+    # Una predicción de prueba inicializa scikit-learn antes del primer mensaje real
+    IntentDetector().detect("hola")
+
+def _cargar_contexto():
+    db = SessionLecturaLocal()
+    try:
+        contexto_productos.global_(db)
+    finally:
+        db.close()
+
+async def _precalentar():
+    """Pasos opcionales en paralelo; al terminar (con o sin errores) la API queda lista."""
+    etapas = []
+    if settings.DB_POOL_PRECALENTAR > 0:
+        etapas.append(arranque.etapa("pool", lambda: precalentar_pools(settings.DB_POOL_PRECALENTAR)))
+    else:
+        arranque.omitir("pool")
+    if settings.ARRANQUE_PRECARGAR_MODELOS:
+        etapas.append(arranque.etapa("modelos", lambda: run_in_threadpool(_cargar_modelos)))
+    else:
+        arranque.omitir("modelos")
+    if settings.ARRANQUE_PRECARGAR_CONTEXTO:
+        etapas.append(arranque.etapa("contexto", lambda: run_in_threadpool(_cargar_contexto)))
+    else:
+        arranque.omitir("contexto")
+    if settings.OLLAMA_PRECARGAR:
+        etapas.append(arranque.etapa(
+            "ollama", OllamaService().precargar_modelo, timeout=settings.OLLAMA_PRECARGA_TIMEOUT
+        ))
+    else:
+        arranque.omitir("ollama")
+    await asyncio.gather(*etapas)
+    arranque.marcar_listo()
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    # 1. Esquema: las tablas e índices se crean con las migraciones de Alembic
+    #    (migrations/), una vez antes de arrancar; DB_MIGRAR_AL_INICIAR=1 las
+    #    aplica aquí, en cada worker (solo para un worker)
+    if settings.DB_MIGRAR_AL_INICIAR:
+        await arranque.etapa("esquema", lambda: run_in_threadpool(_migrar), obligatoria=True)
+    else:
+        arranque.omitir("esquema")
+    if not settings.SECRET_KEY:
+        logger.warning("SECRET_KEY no está configurada: el login no emite tokens y los que lleguen se rechazan")
 
-# Crear las tablas en la base de datos si no existen
-# Esto asegura que 'productos' esté disponible para la IA
-Base.metadata.create_all(bind=engine)
+    # 2. Tareas de fondo y precalentamiento: el servidor ya acepta peticiones
+    #    (/api/salud/vivo responde) mientras /api/salud/listo espera a que terminen
+    tareas = [asyncio.create_task(_precalentar())]
+    if settings.DB_POOL_LOG_SEGUNDOS > 0:
+        tareas.append(asyncio.create_task(_registrar_estado_pool()))
+    if replicas_lectura.replicas:
+        tareas.append(asyncio.create_task(_chequear_replicas()))
+
+    yield
+
+    # 3. Apagado: deja de anunciarse como lista y libera conexiones y procesos
+    arranque.listo = False
+    for tarea in tareas:
+        tarea.cancel()
+    await asyncio.gather(*tareas, return_exceptions=True)
+    # Cierra las conexiones de los pools async dentro del event loop que las creó
+    await async_engine.dispose()
+    await replicas_lectura.cerrar()
+    hasher_contrasenas.cerrar()
 
 app = FastAPI(
     title=settings.PROJECT_NAME, 
-    version=settings.PROJECT_VERSION
+    version=settings.PROJECT_VERSION,
+    lifespan=ciclo_de_vida
 )
 
 # --- CONFIGURACIÓN DE CORS ---
@@ -26,8 +125,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"], # Paginación por cursor y GET condicional de los listados
 )
 
+# Latencia por ruta, peticiones en curso y SQL por petición (GET /metrics)
+app.add_middleware(MiddlewareMetricas)
+
 # --- REGISTRO DE RUTAS (ENDPOINTS) ---
 
 # RF-01: Autenticación y Perfiles
@@ -46,6 +149,50 @@ app.include_router(ia_routes.router, prefix="/api/ia", tags=["IA - Precios"])
 # Chatbot con IA
 app.include_router(chat_routes.router, prefix="/api/chat", tags=["IA - Chatbot"])
 
+# --- SALUD: VIVO / LISTO ---
+@app.get("/api/salud/vivo", tags=["Monitoreo"])
+async def salud_vivo():
+    """Liveness: el proceso responde (no consulta la base de datos)."""
+    return {"estado": "vivo"}
+
+@app.get("/api/salud/listo", tags=["Monitoreo"])
+async def salud_listo():
+    """Readiness: 503 hasta terminar el arranque; incluye el tiempo de cada etapa."""
+    return JSONResponse(arranque.resumen(), status_code=200 if arranque.listo else 503)
+
+@app.get("/metrics", tags=["Monitoreo"])
+async def metricas():
+    """Métricas de este worker en formato de texto de Prometheus."""
+    return PlainTextResponse(registro_metricas.exponer(), media_type="text/plain; version=0.0.4")
+
+# --- ESTADO DEL POOL DE CONEXIONES ---
+@app.get("/api/db/pool", tags=["Monitoreo"])
+async def pool_de_conexiones():
+    """Conexiones en uso/libres/overflow, timeouts y espera por una conexión (p50/p95/p99)."""
+    return {
+        **estado_pool(),
+        "async": estado_pool(async_engine.sync_engine),
+        "replicas": replicas_lectura.estado()
+    }
+
+async def _registrar_estado_pool():
+    while True:
+        await asyncio.sleep(settings.DB_POOL_LOG_SEGUNDOS)
+        for nombre, motor in (("sync", engine), ("async", async_engine.sync_engine)):
+            estado = estado_pool(motor)
+            espera = estado["espera_checkout_s"]
+            logger.info(
+                "pool %s: en_uso=%s libres=%s overflow=%s/%s timeouts=%s espera_p95=%ss espera_p99=%ss",
+                nombre, estado["en_uso"], estado["libres"], estado["overflow"], estado["max_overflow"],
+                estado["timeouts"], espera["p95"], espera["p99"]
+            )
+
+async def _chequear_replicas():
+    # Salud y retraso de replicación; el primer chequeo habilita las réplicas
+    while True:
+        await run_in_threadpool(replicas_lectura.chequear)
+        await asyncio.sleep(settings.DB_REPLICA_CHEQUEO_SEGUNDOS)
+
 @app.get("/")
 async def root():
     return {
@@ -54,7 +201,16 @@ async def root():
         "docs": "/docs"
     }
 
+arranque.importado()
+
 # --- INICIO DEL SERVIDOR ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API de MercadoLocal-IA")
+    parser.add_argument("--sin-esquema", action="store_true",
+                        help="No aplicar las migraciones antes de iniciar (producción: se aplican en el despliegue)")
+    args = parser.parse_args()
+    if not args.sin_esquema and not settings.DB_MIGRAR_AL_INICIAR:
+        # Una sola vez en este proceso, antes de lanzar uvicorn (y sus recargas)
+        _migrar()
     # Se ejecuta en el puerto 8000 para coincidir con la IA_URL de tu Java
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
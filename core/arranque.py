@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("mercado_local.arranque")
+
+
+class EstadoArranque:
+    """
+    Tiempos del arranque de la API: importación del módulo, cada etapa del
+    lifespan (esquema, precalentamientos) y el total hasta quedar lista.
+    Una etapa obligatoria que falla aborta el arranque; una opcional solo
+    queda registrada con su error (la API funciona igual, más lenta al inicio).
+    """
+
+    def __init__(self, inicio: float):
+        self.inicio = inicio
+        self.importacion_s: Optional[float] = None
+        self.hasta_listo_s: Optional[float] = None
+        self.listo = False
+        self.etapas: Dict[str, Dict] = {}
+
+    def _transcurrido(self) -> float:
+        return round(time.perf_counter() - self.inicio, 3)
+
+    def importado(self):
+        self.importacion_s = self._transcurrido()
+
+    def omitir(self, nombre: str):
+        self.etapas[nombre] = {"estado": "omitida", "segundos": None, "error": None}
+
+    async def etapa(self, nombre: str, funcion: Callable[[], Awaitable], obligatoria: bool = False,
+                    timeout: float = None):
+        registro = self.etapas[nombre] = {"estado": "en_curso", "segundos": None, "error": None}
+        inicio = time.perf_counter()
+        try:
+            await asyncio.wait_for(funcion(), timeout)
+            registro["estado"] = "ok"
+        except Exception as e:
+            registro["estado"] = "error"
+            registro["error"] = str(e) or type(e).__name__
+            logger.warning("arranque: la etapa '%s' falló: %s", nombre, registro["error"])
+            if obligatoria:
+                raise
+        finally:
+            registro["segundos"] = round(time.perf_counter() - inicio, 3)
+
+    def marcar_listo(self):
+        self.listo = True
+        self.hasta_listo_s = self._transcurrido()
+        logger.info(
+            "arranque: lista en %ss (importación %ss; %s)", self.hasta_listo_s, self.importacion_s,
+            ", ".join(f"{n}={e['segundos'] if e['segundos'] is not None else e['estado']}"
+                      for n, e in self.etapas.items())
+        )
+
+    def resumen(self) -> Dict:
+        return {
+            "listo": self.listo,
+            "importacion_s": self.importacion_s,
+            "hasta_listo_s": self.hasta_listo_s,
+            "etapas": self.etapas,
+        }
@@ -16,16 +16,90 @@ class Settings:
     DB_PORT = os.getenv("DB_PORT", "3306")
     DB_NAME = os.getenv("DB_NAME", "mercado_local_ia")
     
-    DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    # DATABASE_URL reemplaza a DB_*; p. ej. sqlite:///data/mercado_local.db para pruebas locales
+    # (SQLite se abre en modo WAL, ver core/database.py)
+    DATABASE_URL = os.getenv(
+        "DATABASE_URL", f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    )
+    DB_SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("DB_SQLITE_BUSY_TIMEOUT_MS", "10000"))
+    # Por defecto la misma base con el driver asíncrono (mysql+aiomysql / sqlite+aiosqlite)
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+    # Pool de conexiones (por worker de uvicorn y por motor: el síncrono y el asíncrono tienen uno cada uno)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Menor que el wait_timeout del servidor (MariaDB: 8 h por defecto, suele bajarse)
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # "siempre" | "ocioso" (ping solo a conexiones inactivas) | "nunca"
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "ocioso")
+    DB_POOL_PING_OCIOSO_SEGUNDOS = float(os.getenv("DB_POOL_PING_OCIOSO_SEGUNDOS", "30"))
+    # Cada cuántos segundos se registra el estado del pool en el log (0 = nunca)
+    DB_POOL_LOG_SEGUNDOS = int(os.getenv("DB_POOL_LOG_SEGUNDOS", "60"))
+
+    # Aplicar las migraciones de Alembic en el lifespan de cada worker. Por defecto no: con varios
+    # workers correrían a la vez (solo MySQL las serializa con GET_LOCK). Se aplican una vez antes
+    # de arrancar: `alembic upgrade head` en el despliegue, o `python app.py` en desarrollo
+    DB_MIGRAR_AL_INICIAR = os.getenv("DB_MIGRAR_AL_INICIAR", "0") == "1"
+
+    # Precalentamiento al iniciar (en segundo plano; /api/salud/listo responde 503 hasta que termina)
+    DB_POOL_PRECALENTAR = int(os.getenv("DB_POOL_PRECALENTAR", "2")) # Conexiones abiertas por pool (0 = ninguna)
+    ARRANQUE_PRECARGAR_MODELOS = os.getenv("ARRANQUE_PRECARGAR_MODELOS", "1") == "1"
+    ARRANQUE_PRECARGAR_CONTEXTO = os.getenv("ARRANQUE_PRECARGAR_CONTEXTO", "1") == "1"
+
+    # Réplicas de lectura (URLs separadas por coma, mismo formato que DATABASE_URL)
+    DB_REPLICA_URLS = os.getenv("DB_REPLICA_URLS", "")
+    # Una réplica más atrasada que esto deja de recibir lecturas
+    DB_REPLICA_RETRASO_MAX_SEGUNDOS = float(os.getenv("DB_REPLICA_RETRASO_MAX_SEGUNDOS", "5"))
+    DB_REPLICA_CHEQUEO_SEGUNDOS = int(os.getenv("DB_REPLICA_CHEQUEO_SEGUNDOS", "10"))
 
     # Configuración de IA (Ollama)
     OLLAMA_BASE_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
     OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3") # o el modelo que prefieras
+    # Cargar el modelo en Ollama al iniciar, para que el primer chat no espere la carga
+    OLLAMA_PRECARGAR = os.getenv("OLLAMA_PRECARGAR", "1") == "1"
+    OLLAMA_PRECARGA_TIMEOUT = float(os.getenv("OLLAMA_PRECARGA_TIMEOUT", "120"))
+
+    # Memoria del chatbot: "memoria" (por proceso) o "sqlite" (compartida entre workers)
+    CHAT_HISTORY_BACKEND = os.getenv("CHAT_HISTORY_BACKEND", "memoria")
+    CHAT_HISTORY_SQLITE_PATH = os.getenv("CHAT_HISTORY_SQLITE_PATH", "data/chat_historial.db")
+    CHAT_HISTORY_MAX_MENSAJES = int(os.getenv("CHAT_HISTORY_MAX_MENSAJES", "20")) # Por usuario
+    CHAT_HISTORY_MAX_CARACTERES = int(os.getenv("CHAT_HISTORY_MAX_CARACTERES", "20000000")) # Tope global
+    CHAT_HISTORY_TTL_SEGUNDOS = int(os.getenv("CHAT_HISTORY_TTL_SEGUNDOS", "3600")) # Inactividad
+
+    # Presupuesto del prompt del chatbot (tokens estimados)
+    CHAT_PROMPT_MAX_TOKENS = int(os.getenv("CHAT_PROMPT_MAX_TOKENS", "2000"))
+    CHAT_HISTORY_VENTANA = int(os.getenv("CHAT_HISTORY_VENTANA", "6")) # Mensajes literales
+    CHAT_RESUMEN_UMBRAL = int(os.getenv("CHAT_RESUMEN_UMBRAL", "6")) # Mensajes antiguos antes de resumir
+
+    # Cache del contexto de productos del chatbot
+    CHAT_CONTEXTO_TTL_SEGUNDOS = int(os.getenv("CHAT_CONTEXTO_TTL_SEGUNDOS", "300"))
+    CHAT_CONTEXTO_MAX_VENDEDORES = int(os.getenv("CHAT_CONTEXTO_MAX_VENDEDORES", "5000"))
+    CHAT_CONTEXTO_GLOBAL_MAX = int(os.getenv("CHAT_CONTEXTO_GLOBAL_MAX", "2000")) # Productos en la foto global
+
+    # Versiones del inventario (ETag del listado): "sqlite" (compartida entre los workers del nodo)
+    # o "memoria" (solo con un worker: en otro worker el cambio no se vería y respondería 304)
+    INVENTARIO_VERSIONES_BACKEND = os.getenv("INVENTARIO_VERSIONES_BACKEND", "sqlite")
+    INVENTARIO_VERSIONES_SQLITE_PATH = os.getenv("INVENTARIO_VERSIONES_SQLITE_PATH", "data/inventario_versiones.db")
+    INVENTARIO_ETAG_TTL_SEGUNDOS = int(os.getenv("INVENTARIO_ETAG_TTL_SEGUNDOS", "60")) # Cambios hechos fuera de la API
+
+    # Modelos de ML entrenados (ver scripts/)
+    INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH", "data/intent_model.joblib")
+    PRICE_MODEL_PATH = os.getenv("PRICE_MODEL_PATH", "data/price_model.pkl")
+    MODEL_RELOAD_SEGUNDOS = float(os.getenv("MODEL_RELOAD_SEGUNDOS", "30")) # Revisión de nuevas versiones
 
     # Seguridad
-    SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key-para-tokens")
+    SECRET_KEY = os.getenv("SECRET_KEY", "") # Sin SECRET_KEY el login no emite tokens (ni se aceptan)
     ALGORITHM = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES = 60
+    ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+    # Rutas internas (operación/despliegue, p. ej. recargar modelos): cabecera X-Clave-Interna.
+    # Sin valor esas rutas responden 403
+    API_CLAVE_INTERNA = os.getenv("API_CLAVE_INTERNA", "")
+    TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", "10000")) # Claims verificados en memoria
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12")) # Factor de costo (cada +1 duplica el tiempo)
+    BCRYPT_PROCESOS = int(os.getenv("BCRYPT_PROCESOS", "0")) # 0 = un proceso por núcleo
+    BCRYPT_MAX_CONCURRENTES = int(os.getenv("BCRYPT_MAX_CONCURRENTES", "0")) # 0 = 2 por proceso
+    BCRYPT_MAX_COLA = int(os.getenv("BCRYPT_MAX_COLA", "500")) # Más en espera -> 503
 
     # CORS: Permite que tu frontend acceda a la API
     # En desarrollo puedes usar ["*"], en producción especifica la URL del front
@@ -1,20 +1,344 @@
-from sqlalchemy import create_engine, MetaData
+import asyncio
+import itertools
+import threading
+import time
+import unicodedata
+from typing import List, Optional
+
+from sqlalchemy import create_engine, event, exc, make_url, text, Engine, MetaData, TextClause
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from core.config import settings
+from core.metrics import Histograma, registrar_sentencia_sql
 
 # Usamos la URL que definimos en settings
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+# Driver síncrono -> driver asíncrono equivalente
+DRIVERS_ASYNC = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+class _CheckoutMedido:
+    """
+    Mide cuánto espera cada checkout (incluye abrir conexiones nuevas) y cuenta los timeouts.
+    Las métricas son de cada pool (el sync y el async no se mezclan); engine.dispose()
+    crea un pool nuevo y con él las métricas empiezan de cero.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.espera_checkout = Histograma()
+        self.timeouts = 0
+        self._lock_timeouts = threading.Lock()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            # El clásico "QueuePool limit of size X overflow Y reached"
+            with self._lock_timeouts:
+                self.timeouts += 1
+            raise
+        finally:
+            self.espera_checkout.observar(time.perf_counter() - inicio)
+
+
+class PoolInstrumentado(_CheckoutMedido, QueuePool):
+    pass
+
+
+class PoolInstrumentadoAsync(_CheckoutMedido, AsyncAdaptedQueuePool):
+    pass
+
+
+def _opciones_pool() -> dict:
+    # - pool_recycle por debajo del wait_timeout de MariaDB evita usar conexiones ya cerradas
+    # - DB_POOL_PRE_PING: "siempre" (un ping por checkout), "ocioso" (solo si la conexión
+    #   estuvo inactiva más de DB_POOL_PING_OCIOSO_SEGUNDOS) o "nunca"
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "siempre",
+    }
+
+
+def _opciones_motor(url: str) -> dict:
+    opciones = _opciones_pool()
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.get_driver_name() != "aiosqlite":
+        # El pool entrega la conexión a cualquier hilo del threadpool
+        opciones["connect_args"] = {"check_same_thread": False}
+    return opciones
+
+
+def _minusculas_sin_acentos(texto):
+    if texto is None:
+        return None
+    return "".join(
+        c for c in unicodedata.normalize("NFD", texto) if unicodedata.category(c) != "Mn"
+    ).lower()
+
+
+def _configurar_sqlite(motor: Engine):
+    """
+    SQLite para pruebas de rendimiento locales:
+    - WAL: las lecturas no se bloquean mientras otra conexión escribe
+    - busy_timeout: una escritura concurrente espera el lock en lugar de fallar
+    - foreign_keys: como en MySQL, las FK se validan
+    - LOWER() que además quita acentos, para que el LIKE del SQL de
+      recomendar_precio se comporte como con la collation de MySQL
+    """
+    if motor.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(motor, "connect")
+    def _pragmas(dbapi_connection, registro):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={settings.DB_SQLITE_BUSY_TIMEOUT_MS}")
+            cursor.execute("PRAGMA foreign_keys=ON")
+        finally:
+            cursor.close()
+        dbapi_connection.create_function("lower", 1, _minusculas_sin_acentos, deterministic=True)
+
+
+def _instrumentar(motor: Engine):
+    _configurar_sqlite(motor)
+
+    @event.listens_for(motor, "checkin")
+    def _al_devolver(dbapi_connection, registro):
+        registro.info["ultimo_uso"] = time.monotonic()
+
+    # Sentencias y tiempo en SQL para /metrics (un executemany cuenta como una)
+    @event.listens_for(motor, "before_cursor_execute")
+    def _antes_de_sentencia(conexion, cursor, sentencia, parametros, contexto, executemany):
+        if contexto is not None:
+            contexto._inicio_metricas = time.perf_counter()
+
+    @event.listens_for(motor, "after_cursor_execute")
+    def _despues_de_sentencia(conexion, cursor, sentencia, parametros, contexto, executemany):
+        inicio = getattr(contexto, "_inicio_metricas", None)
+        if inicio is not None:
+            registrar_sentencia_sql(time.perf_counter() - inicio)
+
+    if settings.DB_POOL_PRE_PING == "ocioso":
+        @event.listens_for(motor, "checkout")
+        def _ping_si_ociosa(dbapi_connection, registro, proxy):
+            # Las conexiones usadas hace poco se entregan sin ping (sin ida y vuelta extra)
+            if time.monotonic() - registro.info.get("ultimo_uso", 0) < settings.DB_POOL_PING_OCIOSO_SEGUNDOS:
+                return
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            except Exception:
+                # El pool descarta esta conexión y reintenta con una nueva
+                raise exc.DisconnectionError()
+            finally:
+                cursor.close()
+
+
+def url_async(url: str) -> str:
+    """Misma base de datos con el driver asíncrono (aiomysql / aiosqlite)."""
+    url = make_url(url)
+    return url.set(drivername=DRIVERS_ASYNC.get(url.drivername, url.drivername)).render_as_string(hide_password=False)
+
+
 # Crear el motor de conexión
-# pool_pre_ping ayuda a reconectar si MariaDB cierra la conexión por inactividad
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    pool_pre_ping=True
+engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=PoolInstrumentado, **_opciones_motor(SQLALCHEMY_DATABASE_URL))
+_instrumentar(engine)
+
+# Motor asíncrono para las rutas async: las consultas no ocupan un hilo del
+# threadpool de Starlette ni bloquean el event loop. Tiene su propio pool.
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or url_async(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=PoolInstrumentadoAsync,
+    **_opciones_motor(ASYNC_DATABASE_URL)
 )
+_instrumentar(async_engine.sync_engine)
+
+
+def estado_pool(motor: Engine = None) -> dict:
+    pool = (motor or engine).pool
+    return {
+        "tamano": pool.size(),
+        "en_uso": pool.checkedout(),
+        "libres": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeouts": pool.timeouts,
+        "espera_checkout_s": pool.espera_checkout.instantanea(),
+    }
+
+
+async def precalentar_pools(conexiones: int):
+    """
+    Abre `conexiones` conexiones en cada pool (sync y async) a la vez y las
+    devuelve al pool: las primeras peticiones no pagan el connect/handshake.
+    """
+    conexiones = min(conexiones, settings.DB_POOL_SIZE)
+    loop = asyncio.get_running_loop()
+    sincronas = [loop.run_in_executor(None, engine.connect) for _ in range(conexiones)]
+    asincronas = [async_engine.connect().start() for _ in range(conexiones)]
+    abiertas = await asyncio.gather(*sincronas, *asincronas, return_exceptions=True)
+
+    errores = [c for c in abiertas if isinstance(c, BaseException)]
+    for conexion in abiertas[:conexiones]:
+        if not isinstance(conexion, BaseException):
+            await loop.run_in_executor(None, conexion.close)
+    for conexion in abiertas[conexiones:]:
+        if not isinstance(conexion, BaseException):
+            await conexion.close()
+    if errores:
+        raise errores[0]
+
+
+# --- Réplicas de lectura ---
+
+class Replica:
+    """Una réplica con su motor síncrono y asíncrono y el resultado del último chequeo."""
+
+    def __init__(self, url: str):
+        self.nombre = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_engine(url, poolclass=PoolInstrumentado, **_opciones_motor(url))
+        self.async_engine = create_async_engine(
+            url_async(url), poolclass=PoolInstrumentadoAsync, **_opciones_motor(url_async(url))
+        )
+        _instrumentar(self.engine)
+        _instrumentar(self.async_engine.sync_engine)
+        # Hasta el primer chequeo no recibe tráfico
+        self.sana = False
+        self.retraso_s: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class ReplicaRouter:
+    """
+    Reparte las lecturas entre réplicas sanas en round-robin.
+    Una réplica deja de recibir tráfico si no responde o si su retraso de
+    replicación supera DB_REPLICA_RETRASO_MAX_SEGUNDOS; sin réplicas sanas
+    se lee del primario.
+    """
+
+    def __init__(self, urls: List[str], retraso_max: float = None):
+        self.replicas = [Replica(url) for url in urls]
+        self.retraso_max = settings.DB_REPLICA_RETRASO_MAX_SEGUNDOS if retraso_max is None else retraso_max
+        self._turno = itertools.count()
+        self._lock = threading.Lock()
+
+    def elegir(self) -> Optional[Replica]:
+        sanas = [r for r in self.replicas if r.sana]
+        if not sanas:
+            return None
+        with self._lock:
+            return sanas[next(self._turno) % len(sanas)]
+
+    @staticmethod
+    def _retraso(conexion) -> Optional[float]:
+        if conexion.dialect.name != "mysql":
+            conexion.execute(text("SELECT 1"))
+            return 0.0
+        estado = conexion.execute(text("SHOW SLAVE STATUS")).mappings().first()
+        if estado is None:
+            # No es una réplica configurada (p. ej. un primario de solo lectura): sin retraso
+            return 0.0
+        retraso = estado.get("Seconds_Behind_Master")
+        # NULL: la replicación está detenida
+        return None if retraso is None else float(retraso)
+
+    def chequear(self):
+        """Síncrono (bloqueante): se ejecuta en un hilo desde la tarea periódica de app.py."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conexion:
+                    replica.retraso_s = self._retraso(conexion)
+                if replica.retraso_s is None:
+                    replica.sana, replica.error = False, "Replicación detenida"
+                else:
+                    replica.sana = replica.retraso_s <= self.retraso_max
+                    replica.error = None if replica.sana else "Retraso mayor al máximo"
+            except Exception as e:
+                replica.sana, replica.retraso_s, replica.error = False, None, str(e)
+
+    def estado(self) -> List[dict]:
+        return [
+            {
+                "nombre": r.nombre,
+                "sana": r.sana,
+                "retraso_s": r.retraso_s,
+                "error": r.error,
+                "en_uso": r.engine.pool.checkedout() + r.async_engine.sync_engine.pool.checkedout(),
+            }
+            for r in self.replicas
+        ]
+
+    async def cerrar(self):
+        for replica in self.replicas:
+            replica.engine.dispose()
+            await replica.async_engine.dispose()
+
+
+replicas_lectura = ReplicaRouter([url.strip() for url in settings.DB_REPLICA_URLS.split(",") if url.strip()])
+
+
+def _es_lectura(clause) -> bool:
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith(("SELECT", "WITH"))
+    return bool(getattr(clause, "is_select", False)) and getattr(clause, "_for_update_arg", None) is None
+
+
+class SesionLectura(Session):
+    """
+    Sesión para rutas de lectura: los SELECT van a una réplica (la misma
+    durante toda la sesión). Desde la primera escritura, SELECT ... FOR UPDATE
+    o SQL que no se reconoce como lectura, todo lo que sigue en la sesión va
+    al primario, así una lectura posterior ve lo que se acaba de escribir.
+    """
+    primario: Engine = engine
+    asincrona = False
+
+    def usar_primario(self):
+        """Fuerza el primario para el resto de la sesión (p. ej. datos recién escritos)."""
+        self.info["primario"] = True
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("primario") or self._flushing or not _es_lectura(clause):
+            self.info["primario"] = True
+            return self.primario
+        if "replica" not in self.info:
+            self.info["replica"] = replicas_lectura.elegir()
+        replica = self.info["replica"]
+        if replica is None:
+            return self.primario
+        return replica.async_engine.sync_engine if self.asincrona else replica.engine
+
+
+class SesionLecturaAsync(SesionLectura):
+    primario = async_engine.sync_engine
+    asincrona = True
+
 
 # Crear la fábrica de sesiones
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: tras el commit no se puede recargar un atributo de forma implícita
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+# Mismas sesiones pero enrutadas a las réplicas (DB_REPLICA_URLS)
+SessionLecturaLocal = sessionmaker(class_=SesionLectura, autocommit=False, autoflush=False)
+AsyncSessionLecturaLocal = async_sessionmaker(
+    class_=AsyncSession, sync_session_class=SesionLecturaAsync, autoflush=False, expire_on_commit=False
+)
 
 # Clase base para los modelos
 Base = declarative_base()
@@ -25,4 +349,21 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Equivalente asíncrono de get_db para las rutas async
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Para rutas de solo lectura: réplica si hay alguna sana, primario si no
+def get_db_lectura():
+    db = SessionLecturaLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db_lectura():
+    async with AsyncSessionLecturaLocal() as db:
+        yield db
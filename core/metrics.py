@@ -0,0 +1,293 @@
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Límites (segundos) pensados para esperas y latencias de una API: de 1 ms a 30 s
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histograma:
+    """Histograma acumulativo de buckets fijos (estilo Prometheus), seguro entre hilos."""
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS_SEGUNDOS):
+        self.buckets = tuple(sorted(buckets))
+        self._conteos = [0] * (len(self.buckets) + 1)  # el último es +Inf
+        self._suma = 0.0
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float):
+        posicion = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            self._conteos[posicion] += 1
+            self._suma += valor
+            self._total += 1
+
+    def cuantil(self, q: float) -> Optional[float]:
+        """
+        Aproximación por el límite superior del bucket que contiene el cuantil.
+        None si cae por encima del último límite (+Inf no es JSON válido).
+        """
+        with self._lock:
+            conteos, total = list(self._conteos), self._total
+        if total == 0:
+            return 0.0
+        objetivo = q * total
+        acumulado = 0
+        for limite, conteo in zip(self.buckets, conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return limite
+        return None
+
+    def leer(self) -> Tuple[List[int], float, int]:
+        """(conteos por bucket sin acumular, suma, total) leídos de forma consistente."""
+        with self._lock:
+            return list(self._conteos), self._suma, self._total
+
+    def instantanea(self) -> Dict:
+        conteos, suma, total = self.leer()
+        acumulados = {}
+        acumulado = 0
+        for limite, conteo in zip(self.buckets, conteos):
+            acumulado += conteo
+            acumulados[str(limite)] = acumulado
+        acumulados["+Inf"] = total
+        return {
+            "total": total,
+            "suma": round(suma, 6),
+            "media": round(suma / total, 6) if total else 0.0,
+            "p50": self.cuantil(0.5),
+            "p95": self.cuantil(0.95),
+            "p99": self.cuantil(0.99),
+            "buckets": acumulados,
+        }
+
+
+# --- Registro de métricas en formato de texto de Prometheus (GET /metrics) ---
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class _Valor:
+    __slots__ = ("valor", "_lock")
+
+    def __init__(self):
+        self.valor = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, cantidad: float = 1):
+        with self._lock:
+            self.valor += cantidad
+
+    def dec(self, cantidad: float = 1):
+        with self._lock:
+            self.valor -= cantidad
+
+
+class _Familia(ABC):
+    """Una métrica con nombre y etiquetas; cada combinación de valores es un hijo."""
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._hijos: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _nuevo(self):
+        """Crea el hijo de una combinación nueva de etiquetas."""
+
+    def etiquetar(self, *valores):
+        # Camino rápido sin lock: la combinación ya existe casi siempre
+        hijo = self._hijos.get(valores)
+        if hijo is None:
+            with self._lock:
+                hijo = self._hijos.setdefault(valores, self._nuevo())
+        return hijo
+
+    def hijos(self) -> Dict[Tuple, object]:
+        """Copia de {valores de las etiquetas: hijo}."""
+        return dict(self._hijos)
+
+    def _muestras(self, valores: Tuple, hijo) -> List[str]:
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(hijo.valor)}"]
+
+    def exponer(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        for valores, hijo in list(self._hijos.items()):
+            lineas.extend(self._muestras(valores, hijo))
+        return lineas
+
+
+class Contador(_Familia):
+    tipo = "counter"
+    _nuevo = _Valor
+
+
+class Medidor(_Familia):
+    tipo = "gauge"
+    _nuevo = _Valor
+
+
+class FamiliaHistogramas(_Familia):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                 buckets: Sequence[float] = BUCKETS_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = buckets
+
+    def _nuevo(self):
+        return Histograma(self.buckets)
+
+    def _muestras(self, valores: Tuple, hijo: Histograma) -> List[str]:
+        conteos, suma, total = hijo.leer()
+        lineas = []
+        acumulado = 0
+        for limite, conteo in zip(hijo.buckets + (float("inf"),), conteos):
+            acumulado += conteo
+            le = 'le="' + _numero(limite) + '"'
+            lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}")
+        lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {_numero(suma)}")
+        lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {total}")
+        return lineas
+
+
+class RegistroMetricas:
+    """Métricas del proceso (cada worker expone las suyas)."""
+
+    def __init__(self):
+        self._familias: Dict[str, _Familia] = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, familia: _Familia):
+        with self._lock:
+            if familia.nombre in self._familias:
+                raise ValueError(f"Métrica duplicada: {familia.nombre}")
+            self._familias[familia.nombre] = familia
+        return familia
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Contador:
+        return self._registrar(Contador(nombre, ayuda, etiquetas))
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Medidor:
+        return self._registrar(Medidor(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                   buckets: Sequence[float] = BUCKETS_SEGUNDOS) -> FamiliaHistogramas:
+        return self._registrar(FamiliaHistogramas(nombre, ayuda, etiquetas, buckets))
+
+    def exponer(self) -> str:
+        lineas = []
+        for familia in list(self._familias.values()):
+            lineas.extend(familia.exponer())
+        return "\n".join(lineas) + "\n"
+
+
+registro_metricas = RegistroMetricas()
+
+# --- HTTP y SQL por petición ---
+
+http_duracion = registro_metricas.histograma(
+    "mercadolocal_http_duracion_segundos", "Duración de las peticiones HTTP", ("metodo", "ruta", "codigo")
+)
+http_en_curso = registro_metricas.medidor(
+    "mercadolocal_http_en_curso", "Peticiones HTTP en curso", ("metodo",)
+)
+http_consultas_sql = registro_metricas.histograma(
+    "mercadolocal_http_consultas_sql", "Sentencias SQL ejecutadas por petición", ("ruta",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+http_tiempo_sql = registro_metricas.histograma(
+    "mercadolocal_http_tiempo_sql_segundos", "Tiempo total en SQL por petición", ("ruta",)
+)
+sql_duracion = registro_metricas.histograma(
+    "mercadolocal_sql_duracion_segundos", "Duración de cada sentencia SQL"
+).etiquetar()
+
+# [sentencias, segundos] de la petición en curso; lo comparten los hilos del
+# threadpool y los greenlets de las sesiones async (ambos copian el contexto)
+_sql_peticion: ContextVar[Optional[List]] = ContextVar("sql_peticion", default=None)
+
+
+def registrar_sentencia_sql(segundos: float):
+    """Lo llaman los eventos de SQLAlchemy de core.database tras cada sentencia."""
+    sql_duracion.observar(segundos)
+    acumulado = _sql_peticion.get()
+    if acumulado is not None:
+        acumulado[0] += 1
+        acumulado[1] += segundos
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI (sin BaseHTTPMiddleware, que agrega una tarea por petición):
+    latencia por ruta, peticiones en curso y SQL por petición. La ruta es la
+    plantilla (/api/orders/vendedor/{id_vendedor}), no la URL, para que las
+    series no crezcan con cada id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._rutas: Dict[object, str] = {}
+
+    def _ruta(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "sin_ruta"
+        ruta = self._rutas.get(endpoint)
+        if ruta is None:
+            ruta = next((r.path for r in scope["app"].routes if getattr(r, "endpoint", None) is endpoint),
+                        "sin_ruta")
+            self._rutas[endpoint] = ruta
+        return ruta
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"]
+        codigo = 500
+        sql = [0, 0.0]
+        token = _sql_peticion.set(sql)
+
+        async def enviar(mensaje):
+            nonlocal codigo
+            if mensaje["type"] == "http.response.start":
+                codigo = mensaje["status"]
+            await send(mensaje)
+
+        en_curso = http_en_curso.etiquetar(metodo)
+        en_curso.inc()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            en_curso.dec()
+            _sql_peticion.reset(token)
+            ruta = self._ruta(scope)
+            http_duracion.etiquetar(metodo, ruta, str(codigo)).observar(duracion)
+            http_consultas_sql.etiquetar(ruta).observar(sql[0])
+            http_tiempo_sql.etiquetar(ruta).observar(sql[1])
@@ -0,0 +1,19 @@
+import os
+
+from alembic import command
+from alembic.config import Config
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configuracion_alembic() -> Config:
+    config = Config(os.path.join(RAIZ_PROYECTO, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(RAIZ_PROYECTO, "migrations"))
+    # La API ya configuró su logging: env.py no debe reemplazarlo
+    config.attributes["configurar_logs"] = False
+    return config
+
+
+def aplicar_migraciones():
+    """Equivalente a `alembic upgrade head` (bloqueante)."""
+    command.upgrade(configuracion_alembic(), "head")
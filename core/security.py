@@ -1,12 +1,261 @@
+import asyncio
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+import jwt
+from fastapi import Depends, Header, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from core.config import settings
+
+# --- Funciones que se ejecutan dentro de los procesos del pool ---
+# Deben estar a nivel de módulo para poder enviarse (pickle) al proceso hijo
+
+_contexto_proceso: Optional[CryptContext] = None
+
+def _contexto(rondas: int) -> CryptContext:
+    global _contexto_proceso
+    if _contexto_proceso is None:
+        _contexto_proceso = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rondas)
+    return _contexto_proceso
+
+def _hash_en_proceso(password: str, rondas: int) -> str:
+    return _contexto(rondas).hash(password)
+
+def _verificar_en_proceso(password: str, hashed: str, rondas: int) -> bool:
+    try:
+        return _contexto(rondas).verify(password, hashed)
+    except (ValueError, TypeError):
+        # Hash vacío o con formato desconocido: credenciales inválidas, no error 500
+        return False
+
+
+class PasswordHasher:
+    """
+    bcrypt fuera del event loop y del threadpool de FastAPI.
+    - Un pool de procesos dedicado: el cálculo no compite por el GIL con el resto
+      de endpoints del worker
+    - Como mucho `max_concurrentes` cálculos en curso; el resto espera en cola
+    - Si la cola supera `max_cola` se responde 503 de inmediato (tormenta de logins)
+    - Los procesos se crean con "spawn": un fork del worker (con hilos y el event
+      loop en marcha) puede heredar locks tomados (logging, pool de SQLAlchemy)
+    El código síncrono (scripts) usa hash_bloqueante/verificar_bloqueante, con el
+    mismo contexto de bcrypt pero en el hilo que llama.
+    """
+
+    def __init__(self, procesos: int = None, max_concurrentes: int = None, max_cola: int = None,
+                 rondas: int = None):
+        self.procesos = procesos or settings.BCRYPT_PROCESOS or os.cpu_count() or 1
+        self.max_concurrentes = max_concurrentes or settings.BCRYPT_MAX_CONCURRENTES or self.procesos * 2
+        self.max_cola = settings.BCRYPT_MAX_COLA if max_cola is None else max_cola
+        self.rondas = rondas or settings.BCRYPT_ROUNDS
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._semaforos: Dict[int, asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+        self._metricas = {
+            "en_cola": 0, "en_ejecucion": 0, "completadas": 0, "rechazadas": 0, "errores": 0,
+            "espera_total_s": 0.0, "espera_max_s": 0.0, "calculo_total_s": 0.0,
+        }
+
+    def _obtener_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.procesos, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _semaforo(self) -> asyncio.Semaphore:
+        # Un semáforo por event loop (los tests y scripts pueden crear varios)
+        loop = asyncio.get_running_loop()
+        semaforo = self._semaforos.get(id(loop))
+        if semaforo is None:
+            semaforo = self._semaforos[id(loop)] = asyncio.Semaphore(self.max_concurrentes)
+        return semaforo
+
+    async def _ejecutar(self, funcion, *args):
+        m = self._metricas
+        if m["en_cola"] >= self.max_cola:
+            m["rechazadas"] += 1
+            raise HTTPException(status_code=503, detail="Servicio ocupado, intenta de nuevo en unos segundos")
+
+        m["en_cola"] += 1
+        en_cola = True
+        inicio = time.perf_counter()
+        try:
+            async with self._semaforo():
+                m["en_cola"] -= 1
+                en_cola = False
+                espera = time.perf_counter() - inicio
+                m["espera_total_s"] += espera
+                m["espera_max_s"] = max(m["espera_max_s"], espera)
+                m["en_ejecucion"] += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    inicio_calculo = time.perf_counter()
+                    try:
+                        resultado = await loop.run_in_executor(self._obtener_pool(), funcion, *args)
+                    except BrokenProcessPool:
+                        # Un proceso hijo murió (OOM, kill): se recrea el pool y se reintenta una vez
+                        with self._lock:
+                            self._pool = None
+                        resultado = await loop.run_in_executor(self._obtener_pool(), funcion, *args)
+                    m["calculo_total_s"] += time.perf_counter() - inicio_calculo
+                    m["completadas"] += 1
+                    return resultado
+                except Exception:
+                    m["errores"] += 1
+                    raise
+                finally:
+                    m["en_ejecucion"] -= 1
+        finally:
+            # Cancelado mientras esperaba turno (p. ej. el cliente se desconectó)
+            if en_cola:
+                m["en_cola"] -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._ejecutar(_hash_en_proceso, password, self.rondas)
+
+    async def verificar(self, password: str, hashed: Optional[str]) -> bool:
+        if not hashed:
+            return False
+        return await self._ejecutar(_verificar_en_proceso, password, hashed, self.rondas)
+
+    def hash_bloqueante(self, password: str) -> str:
+        return _hash_en_proceso(password, self.rondas)
+
+    def verificar_bloqueante(self, password: str, hashed: Optional[str]) -> bool:
+        if not hashed:
+            return False
+        return _verificar_en_proceso(password, hashed, self.rondas)
+
+    def estadisticas(self) -> Dict:
+        m = dict(self._metricas)
+        completadas = m["completadas"] or 1
+        return {
+            "procesos": self.procesos,
+            "max_concurrentes": self.max_concurrentes,
+            "max_cola": self.max_cola,
+            "rondas": self.rondas,
+            "en_cola": m["en_cola"],
+            "en_ejecucion": m["en_ejecucion"],
+            "completadas": m["completadas"],
+            "rechazadas": m["rechazadas"],
+            "errores": m["errores"],
+            "espera_media_ms": round(m["espera_total_s"] / completadas * 1000, 2),
+            "espera_max_ms": round(m["espera_max_s"] * 1000, 2),
+            "calculo_medio_ms": round(m["calculo_total_s"] / completadas * 1000, 2),
+        }
+
+    def cerrar(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+# Instancia global; el pool de procesos se crea con el primer hash/verificación
+hasher_contrasenas = PasswordHasher()
+
+
+# --- Tokens de acceso (JWT HS256) ---
+
+def _clave() -> str:
+    # Una clave por defecto permitiría a cualquiera firmar tokens válidos
+    if not settings.SECRET_KEY:
+        raise HTTPException(status_code=503, detail="Tokens deshabilitados: falta configurar SECRET_KEY")
+    return settings.SECRET_KEY
+
+
+def crear_token_acceso(claims: Dict, minutos: int = None) -> str:
+    """Firma un JWT HS256 con SECRET_KEY; agrega iat y exp."""
+    clave = _clave()
+    ahora = int(time.time())
+    minutos = minutos or settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    cuerpo = {**claims, "iat": ahora, "exp": ahora + minutos * 60}
+    return jwt.encode(cuerpo, clave, algorithm=settings.ALGORITHM)
+
+
+def _verificar_firma(token: str) -> Dict:
+    clave = _clave()
+    try:
+        # algorithms fijo: no se acepta el "alg" que declare el token (ni "none")
+        return jwt.decode(token, clave, algorithms=[settings.ALGORITHM], options={"require": ["exp"]})
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expirado", headers={"WWW-Authenticate": "Bearer"})
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Token inválido", headers={"WWW-Authenticate": "Bearer"})
+
+
+class TokenVerifier:
+    """
+    Verifica tokens de acceso y guarda los claims ya verificados en un LRU
+    acotado, indexado por el SHA-256 del token (no se guarda el token).
+    Un token repetido no vuelve a calcular la firma ni a consultar 'usuarios':
+    el token ya trae id_usuario y rol.
+    """
+
+    def __init__(self, max_entradas: int = None):
+        self.max_entradas = max_entradas or settings.TOKEN_CACHE_MAX
+        self._cache: "OrderedDict[bytes, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def verificar(self, token: str) -> Dict:
+        clave = hashlib.sha256(token.encode()).digest()
+        ahora = time.time()
+        with self._lock:
+            claims = self._cache.get(clave)
+            if claims is not None:
+                if claims["exp"] > ahora:
+                    self._cache.move_to_end(clave)
+                    self.aciertos += 1
+                    return claims
+                del self._cache[clave]
+            self.fallos += 1
+
+        claims = _verificar_firma(token)
+
+        with self._lock:
+            self._cache[clave] = claims
+            while len(self._cache) > self.max_entradas:
+                self._cache.popitem(last=False)
+        return claims
+
+    def estadisticas(self) -> Dict:
+        total = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._cache),
+            "max_entradas": self.max_entradas,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / total, 4) if total else None,
+        }
+
+
+verificador_tokens = TokenVerifier()
+_bearer = HTTPBearer(auto_error=False)
+
+
+def usuario_opcional(credenciales: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> Optional[Dict]:
+    """Claims del token si la petición trae 'Authorization: Bearer'; None si no trae token."""
+    if credenciales is None:
+        return None
+    return verificador_tokens.verificar(credenciales.credentials)
 
-class Security:
-    @staticmethod
-    def hash_password(password: str):
-        return pwd_context.hash(password)
 
-    @staticmethod
-    def verify_password(plain_password, hashed_password):
-        return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+def solo_interno(x_clave_interna: Optional[str] = Header(default=None)):
+    """Rutas de operación: no hay rol de administrador, se exige la clave compartida API_CLAVE_INTERNA."""
+    clave = settings.API_CLAVE_INTERNA
+    if not clave or not x_clave_interna or not hmac.compare_digest(x_clave_interna.encode(), clave.encode()):
+        raise HTTPException(status_code=403, detail="Ruta interna")
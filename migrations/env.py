@@ -0,0 +1,53 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool, text
+
+from core.config import settings
+from core.database import Base
+import models.db_models  # noqa: F401  (registra las tablas en Base.metadata)
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configurar_logs", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """Genera el SQL sin conectarse (alembic upgrade head --sql)."""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    motor = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+    with motor.connect() as conexion:
+        es_mysql = conexion.dialect.name == "mysql"
+        if es_mysql:
+            # Varios workers arrancando a la vez: uno migra y el resto espera
+            conexion.execute(text("SELECT GET_LOCK('mercado_local_migraciones', 300)"))
+        try:
+            context.configure(
+                connection=conexion,
+                target_metadata=target_metadata,
+                # SQLite no soporta ALTER TABLE completo
+                render_as_batch=conexion.dialect.name == "sqlite",
+            )
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            if es_mysql:
+                conexion.execute(text("SELECT RELEASE_LOCK('mercado_local_migraciones')"))
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,144 @@
+"""Esquema base
+
+Tablas tal como las creaba Base.metadata.create_all antes de usar Alembic.
+Es idempotente: en una base que ya tiene las tablas (creadas por create_all o
+por el backend Java) solo registra la versión, así que `alembic upgrade head`
+sirve tanto para una base vacía como para una existente.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _tabla(nombre: str, *columnas, indice_pk: str = None):
+    # Sin conexión (--sql) no se puede inspeccionar: se genera el esquema completo
+    if not context.is_offline_mode() and nombre in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(nombre, *columnas)
+    if indice_pk:
+        # Los modelos declaran la PK con index=True
+        op.create_index(f"ix_{nombre}_{indice_pk}", nombre, [indice_pk])
+
+
+def upgrade():
+    _tabla(
+        "roles",
+        sa.Column("id_rol", sa.Integer(), primary_key=True),
+        sa.Column("nombre_rol", sa.String(50)),
+        indice_pk="id_rol",
+    )
+    _tabla(
+        "subcategorias",
+        sa.Column("id_subcategoria", sa.Integer(), primary_key=True),
+        sa.Column("nombre_subcategoria", sa.String(100)),
+        indice_pk="id_subcategoria",
+    )
+    _tabla(
+        "usuarios",
+        sa.Column("id_usuario", sa.Integer(), primary_key=True),
+        sa.Column("nombre_usuario", sa.String(100)),
+        sa.Column("apellido_usuario", sa.String(100)),
+        sa.Column("correo_electronico", sa.String(100), unique=True),
+        sa.Column("contrasena_usuario", sa.String(255)),
+        sa.Column("id_rol", sa.Integer(), sa.ForeignKey("roles.id_rol")),
+        sa.Column("fecha_registro", sa.DateTime()),
+        sa.Column("estado", sa.String(255)),
+        indice_pk="id_usuario",
+    )
+    _tabla(
+        "vendedores",
+        sa.Column("id_vendedor", sa.Integer(), primary_key=True),
+        sa.Column("nombre_empresa", sa.String(100)),
+        sa.Column("ruc_empresa", sa.String(13), unique=True),
+        sa.Column("direccion_empresa", sa.String(255)),
+        sa.Column("telefono_empresa", sa.String(10)),
+        sa.Column("id_usuario", sa.Integer(), sa.ForeignKey("usuarios.id_usuario")),
+        indice_pk="id_vendedor",
+    )
+    _tabla(
+        "consumidores",
+        sa.Column("id_consumidor", sa.Integer(), primary_key=True),
+        sa.Column("cedula_consumidor", sa.String(10), unique=True),
+        sa.Column("direccion_consumidor", sa.String(255)),
+        sa.Column("telefono_consumidor", sa.String(10)),
+        sa.Column("id_usuario", sa.Integer(), sa.ForeignKey("usuarios.id_usuario")),
+        indice_pk="id_consumidor",
+    )
+    _tabla(
+        "productos",
+        sa.Column("id_producto", sa.Integer(), primary_key=True),
+        sa.Column("nombre_producto", sa.String(150)),
+        sa.Column("descripcion_producto", sa.Text()),
+        sa.Column("precio_producto", sa.Float()),
+        sa.Column("stock_producto", sa.Integer()),
+        sa.Column("unidad", sa.String(20)),
+        sa.Column("id_vendedor", sa.Integer(), sa.ForeignKey("vendedores.id_vendedor")),
+        sa.Column("id_subcategoria", sa.Integer(), sa.ForeignKey("subcategorias.id_subcategoria")),
+        sa.Column("fecha_publicacion", sa.DateTime()),
+        sa.Column("estado", sa.String(20)),
+        indice_pk="id_producto",
+    )
+    _tabla(
+        "pedidos",
+        sa.Column("id_pedido", sa.Integer(), primary_key=True),
+        sa.Column("id_consumidor", sa.Integer(), sa.ForeignKey("consumidores.id_consumidor")),
+        sa.Column("id_vendedor", sa.Integer(), sa.ForeignKey("vendedores.id_vendedor")),
+        sa.Column("total", sa.Float()),
+        sa.Column("estado_pedido", sa.String(255)),
+        sa.Column("fecha_pedido", sa.DateTime()),
+        sa.Column("metodo_pago", sa.String(255)),
+        indice_pk="id_pedido",
+    )
+    _tabla(
+        "detalles_pedido",
+        sa.Column("id_detalle", sa.Integer(), primary_key=True),
+        sa.Column("id_pedido", sa.Integer(), sa.ForeignKey("pedidos.id_pedido")),
+        sa.Column("id_producto", sa.Integer(), sa.ForeignKey("productos.id_producto")),
+        sa.Column("cantidad", sa.Integer()),
+        sa.Column("precio_unitario", sa.Float()),
+        sa.Column("subtotal", sa.Float()),
+        indice_pk="id_detalle",
+    )
+    _tabla(
+        "pagos",
+        sa.Column("id_pago", sa.Integer(), primary_key=True),
+        sa.Column("id_pedido", sa.Integer(), sa.ForeignKey("pedidos.id_pedido")),
+        sa.Column("id_consumidor", sa.Integer(), sa.ForeignKey("consumidores.id_consumidor")),
+        sa.Column("monto", sa.Float()),
+        sa.Column("fecha", sa.DateTime()),
+        sa.Column("metodo", sa.Enum("EFECTIVO", "TARJETA", "TRANSFERENCIA")),
+        sa.Column("estado", sa.Enum("PAGADO", "PENDIENTE", "PENDIENTE_VERIFICACION")),
+        indice_pk="id_pago",
+    )
+    _tabla(
+        "pronosticos_demanda",
+        sa.Column("id_producto", sa.Integer(), sa.ForeignKey("productos.id_producto", ondelete="CASCADE"),
+                  primary_key=True),
+        sa.Column("fecha_calculo", sa.DateTime()),
+        sa.Column("metodo", sa.String(30)),
+        sa.Column("demanda_7d", sa.Float()),
+        sa.Column("demanda_30d", sa.Float()),
+        sa.Column("error_mae", sa.Float()),
+        sa.Column("nivel", sa.String(10)),
+    )
+    _tabla(
+        "ventas_diarias",
+        sa.Column("id_producto", sa.Integer(), sa.ForeignKey("productos.id_producto"), primary_key=True),
+        sa.Column("fecha", sa.Date(), primary_key=True),
+        sa.Column("id_vendedor", sa.Integer(), sa.ForeignKey("vendedores.id_vendedor")),
+        sa.Column("cantidad", sa.Integer()),
+        sa.Column("ingresos", sa.Float()),
+    )
+
+
+def downgrade():
+    # La base existía antes de Alembic: bajar de la versión base no borra datos
+    pass
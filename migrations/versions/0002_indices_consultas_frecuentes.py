@@ -0,0 +1,53 @@
+"""Índices de las consultas frecuentes
+
+Listados keyset de inventario y pedidos, contexto del chat, recomendación de
+precio, agregado de ventas, joins de detalles_pedido y del login.
+Los índices que create_all ya haya creado en una base nueva se omiten.
+scripts/check_query_plans.py verifica que las consultas los usen.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas)
+INDICES = [
+    ("ix_productos_vendedor_nombre", "productos", ["id_vendedor", "nombre_producto"]),
+    ("ix_productos_vendedor_id", "productos", ["id_vendedor", "id_producto"]),
+    ("ix_productos_estado_fecha", "productos", ["estado", "fecha_publicacion"]),
+    ("ix_productos_estado_precio", "productos", ["estado", "precio_producto"]),
+    ("ix_pedidos_vendedor_fecha", "pedidos", ["id_vendedor", "fecha_pedido", "id_pedido"]),
+    ("ix_pedidos_consumidor_fecha", "pedidos", ["id_consumidor", "fecha_pedido", "id_pedido"]),
+    ("ix_pedidos_fecha", "pedidos", ["fecha_pedido"]),
+    ("ix_detalles_pedido_pedido", "detalles_pedido", ["id_pedido"]),
+    ("ix_detalles_pedido_producto", "detalles_pedido", ["id_producto"]),
+    ("ix_ventas_diarias_vendedor_fecha", "ventas_diarias", ["id_vendedor", "fecha"]),
+    ("ix_vendedores_usuario", "vendedores", ["id_usuario"]),
+    ("ix_consumidores_usuario", "consumidores", ["id_usuario"]),
+]
+
+
+def _existentes(tabla: str, sin_conexion: set) -> set:
+    if context.is_offline_mode():
+        # --sql no puede inspeccionar: se asume el estado que deja la revisión anterior
+        return sin_conexion
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(tabla)}
+
+
+def upgrade():
+    for nombre, tabla, columnas in INDICES:
+        if nombre not in _existentes(tabla, set()):
+            op.create_index(nombre, tabla, columnas)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        if nombre in _existentes(tabla, {nombre}):
+            op.drop_index(nombre, table_name=tabla)
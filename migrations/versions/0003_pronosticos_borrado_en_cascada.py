@@ -0,0 +1,74 @@
+"""Pronósticos borrados en cascada con el producto
+
+pronosticos_demanda es derivada (scripts/forecast_batch.py escribe una fila por
+producto): sin ON DELETE CASCADE, tras la primera corrida DELETE de un producto
+falla por la FK aunque nunca haya tenido pedidos. Reemplaza la FK en las bases
+creadas antes de que 0001 la declarara con CASCADE.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TABLA = "pronosticos_demanda"
+FK = "fk_pronosticos_demanda_producto"
+# Nombre que recibe al reflejarla la FK sin nombre de SQLite
+CONVENCION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+FK_SIN_NOMBRE = "fk_pronosticos_demanda_id_producto_productos"
+# Nombre que MySQL le dio a la FK de create_all / 0001 (única FK de la tabla)
+FK_MYSQL = "pronosticos_demanda_ibfk_1"
+
+
+def _fk_actual(ondelete_anterior):
+    """(nombre, ondelete) de la FK hacia productos; None si la tabla no tiene."""
+    if context.is_offline_mode():
+        # Sin conexión no se puede inspeccionar: se asume la FK que creó 0001 (o esta migración)
+        if ondelete_anterior:
+            return FK, ondelete_anterior
+        return (FK_MYSQL if op.get_context().dialect.name == "mysql" else FK_SIN_NOMBRE), None
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys(TABLA):
+        if fk["referred_table"] == "productos":
+            return fk["name"] or FK_SIN_NOMBRE, (fk.get("options") or {}).get("ondelete")
+    return None, None
+
+
+def _tabla_previa(nombre_fk: str, ondelete):
+    # Modo offline en SQLite: batch necesita la definición de la tabla que va a copiar
+    return sa.Table(
+        TABLA, sa.MetaData(),
+        sa.Column("id_producto", sa.Integer(), primary_key=True),
+        sa.Column("fecha_calculo", sa.DateTime()),
+        sa.Column("metodo", sa.String(30)),
+        sa.Column("demanda_7d", sa.Float()),
+        sa.Column("demanda_30d", sa.Float()),
+        sa.Column("error_mae", sa.Float()),
+        sa.Column("nivel", sa.String(10)),
+        sa.ForeignKeyConstraint(["id_producto"], ["productos.id_producto"], name=nombre_fk, ondelete=ondelete),
+    )
+
+
+def _reemplazar_fk(ondelete_anterior, ondelete):
+    nombre, actual = _fk_actual(ondelete_anterior)
+    if nombre is None or (not context.is_offline_mode() and (actual or "").upper() == (ondelete or "")):
+        return
+    copia = None
+    if context.is_offline_mode() and op.get_context().dialect.name == "sqlite":
+        copia = _tabla_previa(nombre, ondelete_anterior)
+    with op.batch_alter_table(TABLA, copy_from=copia, naming_convention=CONVENCION) as batch:
+        batch.drop_constraint(nombre, type_="foreignkey")
+        batch.create_foreign_key(FK, "productos", ["id_producto"], ["id_producto"], ondelete=ondelete)
+
+
+def upgrade():
+    _reemplazar_fk(None, "CASCADE")
+
+
+def downgrade():
+    _reemplazar_fk("CASCADE", None)
@@ -0,0 +1,76 @@
+"""Nombre de producto único por vendedor
+
+La importación masiva hace upsert por (id_vendedor, nombre_producto): sin un
+índice único dos importaciones simultáneas podían insertar el mismo nombre.
+Reemplaza al índice no único de 0002. Si ya hay nombres repetidos la migración
+falla listándolos y no modifica datos: hay que resolverlos antes (renombrar o
+eliminar) y volver a ejecutarla. En SQLite el nombre se compara sin distinguir
+mayúsculas (COLLATE NOCASE), como ya hace MySQL con su collation.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+INDICE = "ux_productos_vendedor_nombre"
+INDICE_ANTERIOR = "ix_productos_vendedor_nombre"
+MAX_REPORTADOS = 20
+
+
+def _existentes() -> set:
+    if context.is_offline_mode():
+        # Sin conexión: el estado que dejó 0002
+        return {INDICE_ANTERIOR}
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes("productos")}
+
+
+def _verificar_sin_duplicados(dialecto: str):
+    """Falla con la lista de duplicados: unificarlos es una decisión del vendedor, no de la migración."""
+    if context.is_offline_mode():
+        # --sql: si hay duplicados, el CREATE UNIQUE INDEX fallará al ejecutar el script
+        return
+    nombre = "nombre_producto COLLATE NOCASE" if dialecto == "sqlite" else "nombre_producto"
+    duplicados = op.get_bind().execute(sa.text(
+        "SELECT id_vendedor, MIN(nombre_producto), COUNT(*), MIN(id_producto), MAX(id_producto) FROM productos"
+        " WHERE id_vendedor IS NOT NULL AND nombre_producto IS NOT NULL"
+        f" GROUP BY id_vendedor, {nombre} HAVING COUNT(*) > 1"
+        " ORDER BY COUNT(*) DESC, id_vendedor"
+    )).fetchall()
+    if not duplicados:
+        return
+    detalle = "\n".join(
+        f"  vendedor {v}: '{n}' x{c} (id_producto {a}..{b})" for v, n, c, a, b in duplicados[:MAX_REPORTADOS]
+    )
+    resto = len(duplicados) - MAX_REPORTADOS
+    raise RuntimeError(
+        f"No se puede crear {INDICE}: {len(duplicados)} nombres de producto repetidos por vendedor.\n"
+        f"{detalle}" + (f"\n  ... y {resto} más" if resto > 0 else "") + "\n"
+        "Renombre o elimine los duplicados (p. ej. con el vendedor) y vuelva a ejecutar la migración."
+    )
+
+
+def upgrade():
+    dialecto = op.get_context().dialect.name
+    existentes = _existentes()
+    if INDICE not in existentes:
+        _verificar_sin_duplicados(dialecto)
+        nombre = sa.text("nombre_producto COLLATE NOCASE") if dialecto == "sqlite" else "nombre_producto"
+        op.create_index(INDICE, "productos", ["id_vendedor", nombre], unique=True)
+    # Se borra después de crear el único: en MySQL la FK de id_vendedor necesita un índice
+    if INDICE_ANTERIOR in existentes:
+        op.drop_index(INDICE_ANTERIOR, table_name="productos")
+
+
+def downgrade():
+    existentes = {INDICE} if context.is_offline_mode() else _existentes()
+    if INDICE_ANTERIOR not in existentes:
+        op.create_index(INDICE_ANTERIOR, "productos", ["id_vendedor", "nombre_producto"])
+    if INDICE in existentes:
+        op.drop_index(INDICE, table_name="productos")
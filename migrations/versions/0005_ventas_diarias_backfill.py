@@ -0,0 +1,36 @@
+"""Backfill de ventas_diarias
+
+La demanda (DemandPredictor) lee solo el agregado diario; 0001 crea la tabla
+vacía en las bases que ya tenían pedidos, así que sin este backfill todos los
+productos marcarían demanda BAJA hasta correr scripts/rebuild_ventas_diarias.py.
+Solo rellena si la tabla está vacía (el INSERT lleva la condición, también en
+--sql); a partir de ahí create_order la mantiene.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mismo agregado que services.sales_rollup.reconstruir_ventas_diarias
+    op.execute(
+        "INSERT INTO ventas_diarias (id_producto, fecha, id_vendedor, cantidad, ingresos)"
+        " SELECT d.id_producto, DATE(p.fecha_pedido), pr.id_vendedor, SUM(d.cantidad), SUM(d.subtotal)"
+        " FROM detalles_pedido d"
+        " JOIN pedidos p ON p.id_pedido = d.id_pedido"
+        " JOIN productos pr ON pr.id_producto = d.id_producto"
+        " WHERE p.fecha_pedido IS NOT NULL AND NOT EXISTS (SELECT 1 FROM ventas_diarias)"
+        " GROUP BY d.id_producto, DATE(p.fecha_pedido), pr.id_vendedor"
+    )
+
+
+def downgrade():
+    # Datos derivados de detalles_pedido: se conservan
+    pass
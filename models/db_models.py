@@ -1,9 +1,20 @@
 
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text, DateTime, Date, Enum, Index
 from sqlalchemy.orm import relationship
 from core.database import Base
 import datetime
 
+# Catálogos referenciados por FK; se declaran para que create_all funcione en una base vacía
+class Rol(Base):
+    __tablename__ = "roles"
+    id_rol = Column(Integer, primary_key=True, index=True)
+    nombre_rol = Column(String(50))
+
+class Subcategoria(Base):
+    __tablename__ = "subcategorias"
+    id_subcategoria = Column(Integer, primary_key=True, index=True)
+    nombre_subcategoria = Column(String(100))
+
 class Usuario(Base):
     __tablename__ = "usuarios"
     id_usuario = Column(Integer, primary_key=True, index=True)
@@ -23,6 +34,8 @@ class Vendedor(Base):
     direccion_empresa = Column(String(255))
     telefono_empresa = Column(String(10))
     id_usuario = Column(Integer, ForeignKey("usuarios.id_usuario"))
+    # Login: usuarios LEFT JOIN vendedores/consumidores por id_usuario
+    __table_args__ = (Index("ix_vendedores_usuario", "id_usuario"),)
 
 class Consumidor(Base):
     __tablename__ = "consumidores"
@@ -31,6 +44,7 @@ class Consumidor(Base):
     direccion_consumidor = Column(String(255))
     telefono_consumidor = Column(String(10))
     id_usuario = Column(Integer, ForeignKey("usuarios.id_usuario"))
+    __table_args__ = (Index("ix_consumidores_usuario", "id_usuario"),)
 
 class Producto(Base):
     __tablename__ = "productos"
@@ -44,6 +58,17 @@ class Producto(Base):
     id_subcategoria = Column(Integer, ForeignKey("subcategorias.id_subcategoria"))
     fecha_publicacion = Column(DateTime)
     estado = Column(String(20))
+    __table_args__ = (
+        # Upsert de la importación masiva por (vendedor, nombre); en SQLite la
+        # migración 0004 lo crea con COLLATE NOCASE
+        Index("ux_productos_vendedor_nombre", "id_vendedor", "nombre_producto", unique=True),
+        # Inventario del vendedor paginado por id_producto
+        Index("ix_productos_vendedor_id", "id_vendedor", "id_producto"),
+        # Contexto global del chat: disponibles más recientes
+        Index("ix_productos_estado_fecha", "estado", "fecha_publicacion"),
+        # Recomendación de precio: disponibles en orden de precio
+        Index("ix_productos_estado_precio", "estado", "precio_producto"),
+    )
 
 class Pedido(Base):
     __tablename__ = "pedidos"
@@ -54,6 +79,13 @@ class Pedido(Base):
     estado_pedido = Column(String(255))
     fecha_pedido = Column(DateTime)
     metodo_pago = Column(String(255))
+    # Listados por vendedor/consumidor paginados por (fecha_pedido, id_pedido)
+    __table_args__ = (
+        Index("ix_pedidos_vendedor_fecha", "id_vendedor", "fecha_pedido", "id_pedido"),
+        Index("ix_pedidos_consumidor_fecha", "id_consumidor", "fecha_pedido", "id_pedido"),
+        # Reconstrucción de ventas_diarias por rango de fechas
+        Index("ix_pedidos_fecha", "fecha_pedido"),
+    )
 
 class DetallesPedido(Base):
     __tablename__ = "detalles_pedido"
@@ -63,6 +95,10 @@ class DetallesPedido(Base):
     cantidad = Column(Integer)
     precio_unitario = Column(Float)
     subtotal = Column(Float)
+    __table_args__ = (
+        Index("ix_detalles_pedido_pedido", "id_pedido"),
+        Index("ix_detalles_pedido_producto", "id_producto"),
+    )
 
 class Pago(Base):
     __tablename__ = "pagos"
@@ -72,4 +108,28 @@ class Pago(Base):
     monto = Column(Float)
     fecha = Column(DateTime, default=datetime.datetime.now)
     metodo = Column(Enum('EFECTIVO', 'TARJETA', 'TRANSFERENCIA'))
-    estado = Column(Enum('PAGADO', 'PENDIENTE', 'PENDIENTE_VERIFICACION'))
\ No newline at end of file
+    estado = Column(Enum('PAGADO', 'PENDIENTE', 'PENDIENTE_VERIFICACION'))
+
+class PronosticoDemanda(Base):
+    __tablename__ = "pronosticos_demanda"
+    # Tabla derivada (scripts/forecast_batch.py): se borra junto con el producto
+    id_producto = Column(Integer, ForeignKey("productos.id_producto", ondelete="CASCADE"), primary_key=True)
+    fecha_calculo = Column(DateTime)
+    metodo = Column(String(30))
+    demanda_7d = Column(Float)
+    demanda_30d = Column(Float)
+    error_mae = Column(Float)
+    nivel = Column(String(10))
+
+class VentaDiaria(Base):
+    # Agregado diario de 'detalles_pedido' (se mantiene en create_order)
+    __tablename__ = "ventas_diarias"
+    id_producto = Column(Integer, ForeignKey("productos.id_producto"), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    id_vendedor = Column(Integer, ForeignKey("vendedores.id_vendedor"))
+    cantidad = Column(Integer, default=0)
+    ingresos = Column(Float, default=0)
+
+    __table_args__ = (
+        Index("ix_ventas_diarias_vendedor_fecha", "id_vendedor", "fecha"),
+    )
@@ -1,6 +1,19 @@
+import numpy as np
+
+UMBRAL_ALTA = 100
+
+
 class DemandModel:
+    def predict_batch(self, historicos) -> np.ndarray:
+        """
+        historicos: array (productos, periodos) con la columna 'cantidad' de
+        'detalles_pedido' agregada por periodo. Devuelve una etiqueta por producto.
+        """
+        historicos = np.asarray(historicos, dtype=np.float64)
+        if historicos.ndim == 1:
+            historicos = historicos.reshape(1, -1)
+        return np.where(historicos.sum(axis=1) > UMBRAL_ALTA, "ALTA", "ESTABLE")
+
     def predecir(self, historico_ventas):
         # Analiza la columna 'cantidad' de tu tabla 'detalles_pedido'
-        if sum(historico_ventas) > 100:
-            return "ALTA"
-        return "ESTABLE"
\ No newline at end of file
+        return str(self.predict_batch([list(historico_ventas)])[0])
@@ -0,0 +1,93 @@
+import numpy as np
+
+# Métodos candidatos; el índice se guarda como el método elegido por producto
+METODOS = ("suavizado_exponencial", "estacional_semanal", "suavizado_estacional")
+ALFAS = (0.1, 0.3, 0.5)
+
+
+class ForecastModel:
+    """
+    Pronóstico de demanda diaria para muchos productos a la vez.
+    Trabaja sobre una matriz densa (productos x días) y ajusta todos los
+    productos en una sola pasada vectorizada: el bucle es sobre los días,
+    nunca sobre los productos.
+    """
+
+    def __init__(self, horizonte: int = 30, dias_validacion: int = 14, semanas_perfil: int = 4):
+        self.horizonte = horizonte
+        self.dias_validacion = dias_validacion
+        self.semanas_perfil = semanas_perfil
+
+    def _suavizado(self, Y: np.ndarray):
+        """
+        Suavizado exponencial simple con el mejor alfa por producto
+        (el de menor error de un paso dentro de la muestra).
+        """
+        p, d = Y.shape
+        inicio = Y[:, :min(7, d)].mean(axis=1)
+        niveles = np.empty((len(ALFAS), p), dtype=np.float32)
+        errores = np.zeros((len(ALFAS), p), dtype=np.float32)
+        for i, alfa in enumerate(ALFAS):
+            nivel = inicio.copy()
+            for t in range(d):
+                error = Y[:, t] - nivel
+                errores[i] += np.abs(error)
+                nivel += alfa * error
+            niveles[i] = nivel
+        mejor = errores.argmin(axis=0)
+        return niveles[mejor, np.arange(p)]
+
+    def _perfil_semanal(self, Y: np.ndarray):
+        # Columnas alineadas para que el día h del pronóstico use la columna h % 7
+        ventana = 7 * self.semanas_perfil
+        return Y[:, -ventana:].reshape(Y.shape[0], self.semanas_perfil, 7).mean(axis=1)
+
+    def _pronosticar(self, Y: np.ndarray, horizonte: int) -> np.ndarray:
+        """Devuelve (métodos, productos, horizonte) con el pronóstico de cada método."""
+        p, d = Y.shape
+        columnas = np.arange(horizonte) % 7
+        nivel = self._suavizado(Y)
+        salida = np.empty((len(METODOS), p, horizonte), dtype=np.float32)
+        salida[0] = nivel[:, None]
+
+        if d >= 7 * self.semanas_perfil:
+            perfil = self._perfil_semanal(Y)
+            salida[1] = perfil[:, columnas]
+            media = perfil.mean(axis=1, keepdims=True)
+            indices = np.divide(perfil, media, out=np.ones_like(perfil), where=media > 0)
+            salida[2] = nivel[:, None] * indices[:, columnas]
+        else:
+            # Historia insuficiente para estacionalidad: solo suavizado
+            salida[1] = salida[0]
+            salida[2] = salida[0]
+        return np.clip(salida, 0, None)
+
+    def ajustar(self, Y: np.ndarray):
+        """
+        Y: matriz float (productos x días) con las unidades vendidas por día.
+        Elige por producto el método con menor MAE en los últimos dias_validacion
+        días y pronostica los próximos `horizonte` días con toda la historia.
+
+        Devuelve (pronostico[productos, horizonte], metodo[productos], mae[productos]).
+        """
+        Y = np.asarray(Y, dtype=np.float32)
+        p, d = Y.shape
+        if p == 0:
+            vacio = np.zeros(0, dtype=np.float32)
+            return np.zeros((0, self.horizonte), dtype=np.float32), vacio.astype(np.int8), vacio
+
+        # 1. Validación: se ajusta sin los últimos días y se compara contra lo real
+        if d > self.dias_validacion + 7:
+            entrenamiento, prueba = Y[:, :-self.dias_validacion], Y[:, -self.dias_validacion:]
+            candidatos = self._pronosticar(entrenamiento, self.dias_validacion)
+            mae = np.abs(candidatos - prueba[None, :, :]).mean(axis=2)
+            metodo = mae.argmin(axis=0).astype(np.int8)
+            mae_elegido = mae[metodo, np.arange(p)]
+        else:
+            metodo = np.zeros(p, dtype=np.int8)
+            mae_elegido = np.full(p, np.nan, dtype=np.float32)
+
+        # 2. Pronóstico final con toda la historia
+        finales = self._pronosticar(Y, self.horizonte)
+        pronostico = finales[metodo, np.arange(p)]
+        return pronostico, metodo, mae_elegido
@@ -1,15 +1,34 @@
-import joblib
+import numpy as np
+
+from models.ml_models.registry import registro_modelos
+
 
 class PriceModel:
-    def __init__(self):
-        try:
-            # Aquí cargarás tu archivo entrenado
-            self.model = joblib.load("data/price_model.pkl")
-        except:
-            self.model = None
+    """
+    Sugerencia de precio a partir de [precio_base, promedio_categoria].
+    El artefacto se obtiene del registro de modelos (cargado una vez por proceso
+    y recargado en caliente); crear instancias por petición no cuesta nada.
+    """
 
-    def suggest_price(self, base_price, category_avg):
-        if not self.model:
+    def __init__(self, registro=None):
+        self.registro = registro or registro_modelos
+
+    @property
+    def model(self):
+        artefacto = self.registro.obtener("precio")
+        # Los artefactos versionados guardan el estimador en 'modelo'
+        if isinstance(artefacto, dict):
+            return artefacto.get("modelo")
+        return artefacto
+
+    def predict_batch(self, X) -> np.ndarray:
+        """X: array (n, 2) con [precio_base, promedio_categoria]. Devuelve n precios."""
+        X = np.asarray(X, dtype=np.float64).reshape(-1, 2)
+        modelo = self.model
+        if modelo is None:
             # Lógica simple si el modelo no está cargado
-            return round((base_price + category_avg) / 2, 2)
-        return self.model.predict([[base_price, category_avg]])[0]
\ No newline at end of file
+            return np.round(X.mean(axis=1), 2)
+        return np.asarray(modelo.predict(X), dtype=np.float64)
+
+    def suggest_price(self, base_price, category_avg):
+        return float(self.predict_batch([[base_price, category_avg]])[0])
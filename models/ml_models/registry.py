@@ -0,0 +1,133 @@
+import datetime
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Entrada:
+    """Artefacto registrado y la versión actualmente cargada en memoria."""
+    __slots__ = ("nombre", "ruta", "mmap", "objeto", "version", "firma", "cargado_en", "revisado_en", "error")
+
+    def __init__(self, nombre: str, ruta: str, mmap: bool):
+        self.nombre = nombre
+        self.ruta = ruta
+        self.mmap = mmap
+        self.objeto = None
+        self.version: Optional[str] = None
+        self.firma = None
+        self.cargado_en: Optional[datetime.datetime] = None
+        self.revisado_en = 0.0
+        self.error: Optional[str] = None
+
+
+def _firma_archivo(ruta: str):
+    # (inode, tamaño, mtime): cambia cuando el entrenamiento reemplaza el archivo
+    try:
+        st = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class ModelRegistry:
+    """
+    Registro de modelos entrenados (joblib) compartido por todo el proceso.
+    - Cada artefacto se deserializa una sola vez y se reutiliza entre peticiones
+    - Con mmap_mode="r" los arrays de NumPy se mapean desde el archivo: los
+      workers que cargan la misma versión comparten esas páginas en memoria
+      (requiere artefactos guardados sin compresión)
+    - Recarga en caliente: como mucho cada `intervalo_revision` segundos se
+      compara la firma del archivo y, si cambió, se carga la nueva versión.
+      Si la carga falla se sigue sirviendo la versión anterior.
+    """
+
+    def __init__(self, intervalo_revision: float = None):
+        self.intervalo_revision = settings.MODEL_RELOAD_SEGUNDOS if intervalo_revision is None else intervalo_revision
+        self._entradas: Dict[str, _Entrada] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, nombre: str, ruta: str, mmap: bool = True):
+        with self._lock:
+            self._entradas[nombre] = _Entrada(nombre, ruta, mmap)
+
+    def registrado(self, nombre: str) -> bool:
+        return nombre in self._entradas
+
+    def obtener(self, nombre: str):
+        """Devuelve el artefacto cargado (o None si no existe el archivo)."""
+        entrada = self._entradas[nombre]
+        if time.monotonic() - entrada.revisado_en < self.intervalo_revision:
+            return entrada.objeto
+        with self._lock:
+            # Otro hilo pudo revisarlo mientras se esperaba el lock
+            if time.monotonic() - entrada.revisado_en >= self.intervalo_revision:
+                self._revisar(entrada)
+        return entrada.objeto
+
+    def recargar(self, nombre: Optional[str] = None) -> List[Dict]:
+        """Fuerza la revisión inmediata de uno o todos los artefactos."""
+        with self._lock:
+            nombres = [nombre] if nombre else list(self._entradas)
+            for n in nombres:
+                self._revisar(self._entradas[n], forzar=True)
+        return self.estado()
+
+    def estado(self) -> List[Dict]:
+        return [
+            {
+                "nombre": e.nombre,
+                "ruta": e.ruta,
+                "version": e.version,
+                "cargado": e.objeto is not None,
+                "cargado_en": e.cargado_en.isoformat() if e.cargado_en else None,
+                "error": e.error,
+            }
+            for e in self._entradas.values()
+        ]
+
+    def _revisar(self, entrada: _Entrada, forzar: bool = False):
+        entrada.revisado_en = time.monotonic()
+        firma = _firma_archivo(entrada.ruta)
+        if firma is None:
+            if entrada.firma is not None or entrada.error is None:
+                logger.warning(f"No existe {entrada.ruta}; el modelo '{entrada.nombre}' usa su lógica de respaldo.")
+            entrada.objeto, entrada.version, entrada.firma = None, None, None
+            entrada.error = "archivo no encontrado"
+            return
+        if firma == entrada.firma and not forzar:
+            return
+
+        # joblib (y NumPy/scikit-learn) se importan con la primera carga, no al importar la API
+        import joblib
+
+        try:
+            objeto = joblib.load(entrada.ruta, mmap_mode="r" if entrada.mmap else None)
+        except Exception as e:
+            logger.error(f"No se pudo cargar el modelo '{entrada.nombre}' desde {entrada.ruta}: {str(e)}")
+            entrada.error = str(e)
+            # Se marca la firma para no reintentar la misma versión rota en cada revisión
+            entrada.firma = firma
+            return
+
+        # Artefactos de scripts/ son dicts con 'version'; si no, se usa la fecha del archivo
+        if isinstance(objeto, dict) and "version" in objeto:
+            version = str(objeto["version"])
+        else:
+            version = datetime.datetime.fromtimestamp(firma[2] / 1e9).strftime("%Y%m%d%H%M%S")
+
+        entrada.objeto, entrada.version, entrada.firma = objeto, version, firma
+        entrada.cargado_en = datetime.datetime.now()
+        entrada.error = None
+        logger.info(f"Modelo '{entrada.nombre}' versión {version} cargado desde {entrada.ruta}.")
+
+
+# Instancia global: un único registro por proceso
+registro_modelos = ModelRegistry()
+registro_modelos.registrar("intents", settings.INTENT_MODEL_PATH)
+registro_modelos.registrar("precio", settings.PRICE_MODEL_PATH)
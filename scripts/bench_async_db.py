@@ -0,0 +1,96 @@
+"""
+Benchmark de concurrencia: sesión síncrona en el threadpool vs. sesión asíncrona.
+
+Uso:
+    python -m scripts.bench_async_db --id-vendedor 1 --consultas 500 --concurrencia 10,50,200
+    python -m scripts.bench_async_db --espera-ms 20   # simula la latencia de red de la BD (solo MySQL)
+
+Para cada nivel de concurrencia ejecuta, en un mismo event loop, la consulta
+del listado de pedidos de un vendedor de dos formas:
+- "sync":  Session + PyMySQL en el threadpool de Starlette (como antes)
+- "async": AsyncSession + aiomysql/aiosqlite (como las rutas portadas)
+La ruta síncrona queda limitada por los hilos del threadpool (40 por defecto)
+además del pool de conexiones; la asíncrona solo por el pool. Se mide además
+el retraso del event loop, que es lo que sufren los demás endpoints del worker.
+"""
+import argparse
+import asyncio
+import json
+
+import anyio.to_thread
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+
+from core.config import settings
+from core.database import AsyncSessionLocal, SessionLocal, async_engine, engine, estado_pool
+from models.db_models import Pedido
+from scripts.bench_login import tormenta
+
+
+def consultas(id_vendedor: int, limite: int, espera_ms: int) -> list:
+    # Misma forma que la primera página de GET /api/orders/vendedor/{id}
+    columnas = (Pedido.id_pedido, Pedido.id_consumidor, Pedido.id_vendedor,
+                Pedido.fecha_pedido, Pedido.total, Pedido.estado_pedido)
+    pedidos = select(*columnas).where(Pedido.id_vendedor == id_vendedor) \
+        .order_by(Pedido.fecha_pedido.desc(), Pedido.id_pedido.desc()).limit(limite)
+    if espera_ms and engine.dialect.name == "mysql":
+        # SLEEP() en el servidor imita una base remota con más latencia
+        return [select(func.sleep(espera_ms / 1000)), pedidos]
+    return [pedidos]
+
+
+def _consultar_sync(sentencias) -> bool:
+    with SessionLocal() as db:
+        for sentencia in sentencias:
+            db.execute(sentencia).all()
+    return True
+
+
+async def _consultar_async(sentencias) -> bool:
+    async with AsyncSessionLocal() as db:
+        for sentencia in sentencias:
+            (await db.execute(sentencia)).all()
+    return True
+
+
+async def bench(args):
+    consulta = consultas(args.id_vendedor, args.limite, args.espera_ms)
+    hilos = anyio.to_thread.current_default_thread_limiter().total_tokens
+    print(f"🗄️  {engine.dialect.name}, pool {settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW} por motor, "
+          f"threadpool de {hilos} hilos, {args.consultas} consultas por medición")
+
+    # Calentamiento: abre las conexiones de ambos pools fuera de la medición
+    await run_in_threadpool(_consultar_sync, consulta)
+    await _consultar_async(consulta)
+
+    resultados = {}
+    for concurrencia in args.concurrencia:
+        resultados[concurrencia] = {
+            "sync": await tormenta(lambda: run_in_threadpool(_consultar_sync, consulta),
+                                   args.consultas, concurrencia),
+            "async": await tormenta(lambda: _consultar_async(consulta), args.consultas, concurrencia),
+        }
+        for resultado in resultados[concurrencia].values():
+            # tormenta() viene del benchmark de login
+            resultado["consultas_por_segundo"] = resultado.pop("logins_por_segundo")
+    resultados["pool"] = {"sync": estado_pool(), "async": estado_pool(async_engine.sync_engine)}
+    await async_engine.dispose()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sesión síncrona vs. asíncrona")
+    parser.add_argument("--id-vendedor", type=int, default=1)
+    parser.add_argument("--limite", type=int, default=100)
+    parser.add_argument("--consultas", type=int, default=500)
+    parser.add_argument("--concurrencia", default="10,50,200",
+                        type=lambda v: [int(c) for c in v.split(",")])
+    parser.add_argument("--espera-ms", type=int, default=0)
+    args = parser.parse_args()
+
+    resultados = asyncio.run(bench(args))
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
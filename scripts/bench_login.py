@@ -0,0 +1,127 @@
+"""
+Benchmark de verificación de contraseñas (bcrypt) bajo una tormenta de logins.
+
+Uso:
+    python -m scripts.bench_login --logins 200 --concurrencia 50 --rondas 12
+    python -m scripts.bench_login --base-url http://localhost:8000 --correo a@b.com --contrasena x
+
+Sin --base-url compara, dentro de un mismo event loop:
+- "threadpool": bcrypt en el threadpool (como el handler sync anterior)
+- "procesos":   bcrypt en el pool de procesos de core.security
+Mientras tanto una tarea mide el retraso del event loop (lo que sufren los
+demás endpoints del worker). Con --base-url envía logins reales a la API.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+from core.security import PasswordHasher
+
+
+async def medir_retraso_loop(detener: asyncio.Event, intervalo: float = 0.01):
+    """Retrasos (ms) del event loop respecto de un tick cada `intervalo` segundos."""
+    retrasos = []
+    while not detener.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(intervalo)
+        retrasos.append((time.perf_counter() - inicio - intervalo) * 1000)
+    return retrasos
+
+
+async def tormenta(verificar, logins: int, concurrencia: int):
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias = []
+
+    async def uno():
+        async with semaforo:
+            inicio = time.perf_counter()
+            assert await verificar()
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    detener = asyncio.Event()
+    monitor = asyncio.create_task(medir_retraso_loop(detener))
+    inicio = time.perf_counter()
+    await asyncio.gather(*(uno() for _ in range(logins)))
+    segundos = time.perf_counter() - inicio
+    detener.set()
+    retrasos = await monitor
+    return resumir(latencias, segundos, retrasos)
+
+
+def resumir(latencias, segundos, retrasos=None):
+    latencias = sorted(latencias)
+    resultado = {
+        "logins_por_segundo": round(len(latencias) / segundos, 1),
+        "p50_ms": round(latencias[len(latencias) // 2], 1),
+        "p95_ms": round(latencias[int(len(latencias) * 0.95) - 1], 1),
+    }
+    if retrasos:
+        resultado["retraso_loop_medio_ms"] = round(statistics.mean(retrasos), 2)
+        resultado["retraso_loop_max_ms"] = round(max(retrasos), 1)
+    return resultado
+
+
+async def bench_local(args):
+    contexto = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rondas)
+    hashed = contexto.hash("contrasena-de-prueba")
+    print(f"🖥️  {os.cpu_count()} núcleos, bcrypt con {args.rondas} rondas, "
+          f"{args.logins} logins con concurrencia {args.concurrencia}")
+
+    resultados = {}
+    resultados["threadpool"] = await tormenta(
+        lambda: run_in_threadpool(contexto.verify, "contrasena-de-prueba", hashed),
+        args.logins, args.concurrencia
+    )
+
+    hasher = PasswordHasher(procesos=args.procesos or None, max_cola=args.logins, rondas=args.rondas)
+    await hasher.verificar("calentamiento", hashed)  # arranque de los procesos fuera de la medición
+    resultados["procesos"] = await tormenta(
+        lambda: hasher.verificar("contrasena-de-prueba", hashed), args.logins, args.concurrencia
+    )
+    resultados["procesos"]["pool"] = hasher.estadisticas()
+    hasher.cerrar()
+    return resultados
+
+
+async def bench_http(args):
+    limites = httpx.Limits(max_connections=args.concurrencia)
+    cuerpo = {"correo": args.correo, "contrasena": args.contrasena}
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limites, timeout=60) as cliente:
+        async def verificar():
+            respuesta = await cliente.post("/api/auth/login", json=cuerpo)
+            return respuesta.status_code == 200
+
+        resultado = await tormenta(verificar, args.logins, args.concurrencia)
+        resultado["servidor"] = (await cliente.get("/api/auth/estadisticas")).json()
+    return {"http": resultado}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de login (bcrypt)")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrencia", type=int, default=50)
+    parser.add_argument("--rondas", type=int, default=12)
+    parser.add_argument("--procesos", type=int, default=0, help="0 = un proceso por núcleo")
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--correo", default=None)
+    parser.add_argument("--contrasena", default=None)
+    args = parser.parse_args()
+
+    if args.base_url:
+        if not args.correo or not args.contrasena:
+            parser.error("--base-url requiere --correo y --contrasena de un usuario existente")
+        resultados = asyncio.run(bench_http(args))
+    else:
+        resultados = asyncio.run(bench_local(args))
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
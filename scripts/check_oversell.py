@@ -0,0 +1,152 @@
+"""
+Prueba de concurrencia del checkout: muchos pedidos simultáneos sobre pocos
+productos no deben vender más unidades que el stock disponible.
+
+Uso:
+    python -m scripts.check_oversell                              # SQLite temporal
+    python -m scripts.check_oversell --database-url mysql+pymysql://...  # base de pruebas
+
+Crea sus propios productos (y los deja en la base indicada), lanza --hilos
+checkouts en paralelo con OrderService y termina con código 1 si:
+- algún producto queda con stock negativo
+- las unidades vendidas superan el stock inicial
+- el stock descontado no coincide con los detalles insertados
+¡No usar contra la base de producción!
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+from api.schemas.order_schema import OrderCreate, OrderItem
+from core.database import Base
+from models.db_models import DetallesPedido, Producto
+from services.order_service import OrderService
+
+
+def crear_engine(url: str):
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_size=20, max_overflow=20)
+
+    engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 30})
+
+    # SQLite no tiene FOR UPDATE: BEGIN IMMEDIATE toma el lock de escritura al
+    # iniciar la transacción, que es el equivalente para este motor
+    @event.listens_for(engine, "connect")
+    def _conectar(conexion, _):
+        conexion.isolation_level = None
+        conexion.execute("PRAGMA journal_mode=WAL")
+
+    @event.listens_for(engine, "begin")
+    def _iniciar(conexion):
+        conexion.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de sobreventa bajo checkouts concurrentes")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--productos", type=int, default=3)
+    parser.add_argument("--stock", type=int, default=50, help="stock inicial de cada producto")
+    parser.add_argument("--hilos", type=int, default=16)
+    parser.add_argument("--pedidos", type=int, default=400, help="checkouts en total")
+    parser.add_argument("--semilla", type=int, default=7)
+    args = parser.parse_args()
+
+    temporal = None
+    url = args.database_url
+    if url is None:
+        temporal = tempfile.mkdtemp(prefix="oversell_")
+        url = f"sqlite:///{os.path.join(temporal, 'oversell.db')}"
+
+    engine = crear_engine(url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    productos = [
+        Producto(nombre_producto=f"Producto prueba {i}", precio_producto=1.0,
+                 stock_producto=args.stock, unidad="unidad", estado="ACTIVO")
+        for i in range(args.productos)
+    ]
+    db.add_all(productos)
+    db.commit()
+    ids = [p.id_producto for p in productos]
+    db.close()
+
+    rng = random.Random(args.semilla)
+    # Carritos de 1-3 líneas con cantidades pequeñas; la demanda total supera el stock
+    carritos = [
+        [OrderItem(id_producto=rng.choice(ids), cantidad=rng.randint(1, 3)) for _ in range(rng.randint(1, 3))]
+        for _ in range(args.pedidos)
+    ]
+    resultados = Counter()
+    lock = threading.Lock()
+    siguiente = iter(range(len(carritos)))
+
+    def trabajador():
+        sesion = Session()
+        try:
+            while True:
+                with lock:
+                    i = next(siguiente, None)
+                if i is None:
+                    return
+                pedido = OrderCreate(id_consumidor=1, id_vendedor=1, metodo_pago="EFECTIVO", items=carritos[i])
+                try:
+                    OrderService(sesion).crear_pedido(pedido)
+                    estado = "ok"
+                except HTTPException as e:
+                    estado = f"rechazado_{e.status_code}"
+                except Exception as e:
+                    estado = f"error_{type(e).__name__}"
+                with lock:
+                    resultados[estado] += 1
+        finally:
+            sesion.close()
+
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=trabajador) for _ in range(args.hilos)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    segundos = time.perf_counter() - inicio
+
+    db = Session()
+    fallas = []
+    for id_producto in ids:
+        stock = db.query(Producto.stock_producto).filter(Producto.id_producto == id_producto).scalar()
+        vendido = db.query(func.coalesce(func.sum(DetallesPedido.cantidad), 0))\
+            .filter(DetallesPedido.id_producto == id_producto).scalar()
+        print(f"   producto {id_producto}: stock final {stock}, vendido {vendido}")
+        if stock < 0:
+            fallas.append(f"producto {id_producto} con stock negativo ({stock})")
+        if vendido > args.stock:
+            fallas.append(f"producto {id_producto} vendió {vendido} de {args.stock}")
+        if stock + vendido != args.stock:
+            fallas.append(f"producto {id_producto}: stock descontado y detalles no coinciden")
+    db.close()
+    engine.dispose()
+
+    print(f"📊 {args.pedidos} checkouts con {args.hilos} hilos en {segundos:.2f}s: {dict(resultados)}")
+    if temporal:
+        print(f"   base temporal: {url}")
+    if fallas:
+        for f in fallas:
+            print(f"❌ {f}")
+        sys.exit(1)
+    print("✅ Sin sobreventa")
+
+
+if __name__ == "__main__":
+    main()
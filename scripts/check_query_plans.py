@@ -0,0 +1,104 @@
+"""
+Verifica el plan de ejecución de las consultas frecuentes de la API.
+
+Uso:
+    python -m scripts.check_query_plans
+    python -m scripts.check_query_plans --verbose
+
+Ejecuta EXPLAIN (MySQL/MariaDB) o EXPLAIN QUERY PLAN (SQLite) sobre cada
+consulta con parámetros de ejemplo y sale con código 1 si alguna recorre una
+tabla completa en lugar de usar un índice (p. ej. tras borrar un índice o
+cambiar un filtro). En MySQL el optimizador elige según las estadísticas:
+ejecutarlo sobre una base con datos realistas (p. ej. scripts/seed_data), no vacía.
+"""
+import argparse
+import datetime
+import re
+import sys
+from typing import Callable, Dict, List, Tuple
+
+from api.routes.auth_routes import consulta_login
+from api.routes.inventory_routes import CAMPOS_INVENTARIO, consulta_inventario
+from api.routes.order_routes import consulta_pedidos
+from core.database import engine
+from models.db_models import Pedido
+from services.context_cache import consulta_contexto_global, consulta_contexto_vendedor
+from services.demand_predictor import DIAS_VENTANA, consulta_ventas_por_producto, consulta_ventas_producto
+from services.price_recommender import consulta_productos_similares
+from services.sales_rollup import consulta_agregado_ventas
+
+HOY = datetime.date.today()
+AHORA = datetime.datetime.combine(HOY, datetime.time.min)
+HACE_UN_MES = HOY - datetime.timedelta(days=DIAS_VENTANA)
+
+
+# Nombre -> constructor de la consulta: los mismos que usa la API, con parámetros
+# de ejemplo (p. ej. la segunda página de los listados con cursor)
+CONSULTAS: Dict[str, Callable] = {
+    "inventario_vendedor": lambda: consulta_inventario(1, list(CAMPOS_INVENTARIO), 101, despues_de=0),
+    "chat_contexto_vendedor": lambda: consulta_contexto_vendedor(1),
+    "chat_contexto_global": lambda: consulta_contexto_global(200),
+    "recomendacion_precio": lambda: consulta_productos_similares(["tomate", "rinon"]),
+    "pedidos_vendedor": lambda: consulta_pedidos(Pedido.id_vendedor == 1, 101, despues_de=(AHORA, 1000)),
+    "pedidos_consumidor": lambda: consulta_pedidos(Pedido.id_consumidor == 1, 101, despues_de=(AHORA, 1000)),
+    "demanda_producto": lambda: consulta_ventas_producto(1, HACE_UN_MES),
+    "demanda_vendedor": lambda: consulta_ventas_por_producto(HACE_UN_MES, id_vendedor=1),
+    "login": lambda: consulta_login("a@b.com"),
+    "agregado_ventas_dia": lambda: consulta_agregado_ventas(AHORA, AHORA + datetime.timedelta(days=1)),
+}
+
+
+def _sql_y_parametros(consulta, dialecto) -> Tuple[str, object]:
+    if isinstance(consulta, tuple):
+        # SQL textual con sus parámetros (recomendación de precio)
+        consulta, parametros = consulta
+        consulta = consulta.bindparams(**parametros)
+    compilada = consulta.compile(dialect=dialecto, compile_kwargs={"render_postcompile": True})
+    if compilada.positional:
+        return str(compilada), tuple(compilada.params[n] for n in compilada.positiontup)
+    return str(compilada), compilada.params
+
+
+def recorridos_completos(conexion, consulta) -> Tuple[List[str], List[str]]:
+    """Devuelve (líneas del plan, tablas recorridas completas)."""
+    sql, parametros = _sql_y_parametros(consulta, conexion.dialect)
+    if conexion.dialect.name == "sqlite":
+        filas = conexion.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, parametros).all()
+        plan = [f.detail for f in filas]
+        # "SCAN productos" (sin índice) o "SCAN p": tabla completa; "SEARCH ..." usa índice
+        completos = [d for d in plan if re.match(r"SCAN \w+$", d) or re.match(r"SCAN \w+ USING (COVERING )?INDEX", d)]
+        return plan, completos
+    filas = conexion.exec_driver_sql("EXPLAIN " + sql, parametros).mappings().all()
+    plan = [f"{f['table']}: type={f['type']} key={f['key']} rows={f['rows']} {f.get('Extra') or ''}" for f in filas]
+    # ALL = tabla completa, index = índice completo
+    completos = [linea for linea, f in zip(plan, filas) if f["table"] and f["type"] in ("ALL", "index")]
+    return plan, completos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN de las consultas frecuentes")
+    parser.add_argument("--verbose", action="store_true", help="Muestra el plan completo de cada consulta")
+    args = parser.parse_args()
+
+    regresiones = 0
+    with engine.connect() as conexion:
+        print(f"🗄️  {conexion.dialect.name}: {len(CONSULTAS)} consultas")
+        for nombre, construir in CONSULTAS.items():
+            plan, completos = recorridos_completos(conexion, construir())
+            if completos:
+                regresiones += 1
+                print(f"❌ {nombre}: recorrido completo -> {'; '.join(completos)}")
+            else:
+                print(f"✅ {nombre}")
+            if args.verbose or completos:
+                for linea in plan:
+                    print(f"     {linea}")
+
+    if regresiones:
+        print(f"❌ {regresiones} consulta(s) sin índice")
+        sys.exit(1)
+    print("✅ Todas las consultas usan índices")
+
+
+if __name__ == "__main__":
+    main()
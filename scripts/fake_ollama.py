@@ -0,0 +1,217 @@
+"""
+Servidor Ollama simulado para pruebas de carga del chatbot.
+
+Implementa /api/generate, /api/chat y /api/tags con la misma forma de
+respuesta que Ollama (incluido el streaming NDJSON), pero sin modelo real:
+la latencia, la velocidad de generación y los fallos se simulan.
+
+Uso:
+    python -m scripts.fake_ollama --puerto 11435 --tokens-por-segundo 25 \
+        --latencia lognormal:-1.2,0.4 --tasa-error 0.02
+
+Después se arranca la API apuntando a él:
+    OLLAMA_URL=http://localhost:11435 uvicorn app:app --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timezone
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+PALABRAS = (
+    "claro te ayudo con tu consulta el precio del producto en el mercado local "
+    "es competitivo y la demanda de esta semana se mantiene estable recomiendo "
+    "revisar el stock disponible y ajustar la oferta según las ventas recientes"
+).split()
+
+
+class SimulacionConfig:
+    """Parámetros de la simulación (se leen de argumentos o variables FAKE_OLLAMA_*)."""
+
+    def __init__(self, **kwargs):
+        self.modelo = kwargs.get("modelo", "llama3")
+        self.tokens_por_segundo = float(kwargs.get("tokens_por_segundo", 30.0))
+        self.prompt_tokens_por_segundo = float(kwargs.get("prompt_tokens_por_segundo", 600.0))
+        self.latencia = parsear_distribucion(kwargs.get("latencia", "fija:0.05"))
+        self.tokens_min = int(kwargs.get("tokens_min", 40))
+        self.tokens_max = int(kwargs.get("tokens_max", 160))
+        self.tasa_error = float(kwargs.get("tasa_error", 0.0))
+        self.tasa_timeout = float(kwargs.get("tasa_timeout", 0.0))
+        self.duracion_timeout = float(kwargs.get("duracion_timeout", 120.0))
+        # Ollama atiende un número limitado de generaciones en paralelo (OLLAMA_NUM_PARALLEL)
+        self.paralelo = int(kwargs.get("paralelo", 4))
+        self.semilla = kwargs.get("semilla")
+
+
+def parsear_distribucion(spec: str):
+    """
+    Convierte 'tipo:params' en una función sin argumentos que devuelve segundos.
+    Tipos: fija:s, uniforme:a,b, normal:media,desv, lognormal:mu,sigma, exponencial:media
+    """
+    tipo, _, params = spec.partition(":")
+    valores = [float(v) for v in params.split(",") if v.strip()] if params else []
+
+    if tipo == "fija":
+        return lambda: valores[0] if valores else 0.0
+    if tipo == "uniforme":
+        return lambda: random.uniform(valores[0], valores[1])
+    if tipo == "normal":
+        return lambda: max(0.0, random.gauss(valores[0], valores[1]))
+    if tipo == "lognormal":
+        return lambda: random.lognormvariate(valores[0], valores[1])
+    if tipo == "exponencial":
+        return lambda: random.expovariate(1.0 / valores[0])
+    raise ValueError(f"Distribución de latencia desconocida: {spec}")
+
+
+def estimar_tokens(texto: str) -> int:
+    # Aproximación de ~4 caracteres por token, suficiente para simular
+    return max(1, len(texto) // 4)
+
+
+def _ahora_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def crear_app(config: SimulacionConfig) -> FastAPI:
+    app = FastAPI(title="Ollama simulado")
+    semaforo = asyncio.Semaphore(config.paralelo)
+    if config.semilla is not None:
+        random.seed(int(config.semilla))
+
+    async def _fallo_inyectado():
+        """Devuelve una respuesta de error si toca inyectar un fallo, si no None."""
+        sorteo = random.random()
+        if sorteo < config.tasa_timeout:
+            # Simula un modelo colgado: el cliente debería cortar por timeout
+            await asyncio.sleep(config.duracion_timeout)
+            return JSONResponse(status_code=504, content={"error": "timeout simulado"})
+        if sorteo < config.tasa_timeout + config.tasa_error:
+            return JSONResponse(status_code=500, content={"error": "fallo simulado del modelo"})
+        return None
+
+    def _estadisticas(prompt_tokens: int, eval_tokens: int, carga: float, prompt_eval: float, eval_dur: float):
+        return {
+            "total_duration": int((carga + prompt_eval + eval_dur) * 1e9),
+            "load_duration": int(carga * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": eval_tokens,
+            "eval_duration": int(eval_dur * 1e9),
+        }
+
+    async def _generar(prompt_texto: str, body: dict, es_chat: bool):
+        fallo = await _fallo_inyectado()
+        if fallo is not None:
+            return fallo
+
+        opciones = body.get("options") or {}
+        limite = int(opciones.get("num_predict") or config.tokens_max)
+        n_tokens = min(limite, random.randint(config.tokens_min, config.tokens_max))
+        prompt_tokens = estimar_tokens(prompt_texto)
+        stream = body.get("stream", True)  # Ollama hace streaming por defecto
+        modelo = body.get("model") or config.modelo
+
+        def _fragmento(token: str, done: bool, extra: dict = None):
+            base = {"model": modelo, "created_at": _ahora_iso(), "done": done}
+            if es_chat:
+                base["message"] = {"role": "assistant", "content": token}
+            else:
+                base["response"] = token
+            if extra:
+                base.update(extra)
+            return base
+
+        async def _producir():
+            async with semaforo:
+                carga = config.latencia()
+                prompt_eval = prompt_tokens / config.prompt_tokens_por_segundo
+                await asyncio.sleep(carga + prompt_eval)
+                inicio = time.perf_counter()
+                for i in range(n_tokens):
+                    await asyncio.sleep(1.0 / config.tokens_por_segundo)
+                    yield random.choice(PALABRAS) + ("" if i == n_tokens - 1 else " ")
+                eval_dur = time.perf_counter() - inicio
+                yield _estadisticas(prompt_tokens, n_tokens, carga, prompt_eval, eval_dur)
+
+        if stream:
+            async def _ndjson():
+                async for parte in _producir():
+                    if isinstance(parte, dict):
+                        final = _fragmento("", True, {"done_reason": "stop", **parte})
+                        yield json.dumps(final) + "\n"
+                    else:
+                        yield json.dumps(_fragmento(parte, False)) + "\n"
+
+            return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+
+        tokens = []
+        estadisticas = {}
+        async for parte in _producir():
+            if isinstance(parte, dict):
+                estadisticas = parte
+            else:
+                tokens.append(parte)
+        return _fragmento("".join(tokens), True, {"done_reason": "stop", **estadisticas})
+
+    @app.get("/api/tags")
+    async def tags():
+        return {
+            "models": [{
+                "name": f"{config.modelo}:latest",
+                "model": f"{config.modelo}:latest",
+                "modified_at": _ahora_iso(),
+                "size": 4_661_224_676,
+                "digest": "simulado",
+                "details": {"format": "gguf", "family": "llama", "parameter_size": "8B"},
+            }]
+        }
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        prompt = body.get("prompt") or ""
+        if not isinstance(prompt, str):
+            prompt = json.dumps(prompt, ensure_ascii=False)
+        return await _generar((body.get("system") or "") + prompt, body, es_chat=False)
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        texto = "".join(m.get("content", "") for m in body.get("messages") or [])
+        return await _generar(texto, body, es_chat=True)
+
+    return app
+
+
+def main():
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Servidor Ollama simulado")
+    parser.add_argument("--host", default=env("FAKE_OLLAMA_HOST", "127.0.0.1"))
+    parser.add_argument("--puerto", type=int, default=int(env("FAKE_OLLAMA_PORT", "11435")))
+    parser.add_argument("--modelo", default=env("FAKE_OLLAMA_MODEL", "llama3"))
+    parser.add_argument("--tokens-por-segundo", type=float, default=float(env("FAKE_OLLAMA_TPS", "30")))
+    parser.add_argument("--prompt-tokens-por-segundo", type=float, default=float(env("FAKE_OLLAMA_PROMPT_TPS", "600")))
+    parser.add_argument("--latencia", default=env("FAKE_OLLAMA_LATENCIA", "fija:0.05"),
+                        help="fija:s | uniforme:a,b | normal:media,desv | lognormal:mu,sigma | exponencial:media")
+    parser.add_argument("--tokens-min", type=int, default=int(env("FAKE_OLLAMA_TOKENS_MIN", "40")))
+    parser.add_argument("--tokens-max", type=int, default=int(env("FAKE_OLLAMA_TOKENS_MAX", "160")))
+    parser.add_argument("--tasa-error", type=float, default=float(env("FAKE_OLLAMA_TASA_ERROR", "0")))
+    parser.add_argument("--tasa-timeout", type=float, default=float(env("FAKE_OLLAMA_TASA_TIMEOUT", "0")))
+    parser.add_argument("--duracion-timeout", type=float, default=float(env("FAKE_OLLAMA_DURACION_TIMEOUT", "120")))
+    parser.add_argument("--paralelo", type=int, default=int(env("FAKE_OLLAMA_PARALELO", "4")))
+    parser.add_argument("--semilla", type=int, default=None)
+    args = parser.parse_args()
+
+    config = SimulacionConfig(**{k: v for k, v in vars(args).items() if k not in ("host", "puerto")})
+    uvicorn.run(crear_app(config), host=args.host, port=args.puerto, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
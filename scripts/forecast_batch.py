@@ -0,0 +1,29 @@
+"""
+Cálculo nocturno de pronósticos de demanda para todos los productos.
+
+Uso (por ejemplo desde cron a las 02:00):
+    python -m scripts.forecast_batch --dias 180 --horizonte 30
+"""
+import argparse
+import json
+
+from core.database import SessionLocal
+from services.demand_forecaster import DemandForecaster
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pronóstico de demanda por lotes")
+    parser.add_argument("--dias", type=int, default=180, help="días de historia a cargar")
+    parser.add_argument("--horizonte", type=int, default=30, help="días a pronosticar")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        resumen = DemandForecaster(db, dias_historia=args.dias, horizonte=args.horizonte).ejecutar()
+    finally:
+        db.close()
+    print(json.dumps(resumen, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Generador de carga para la API de MercadoLocal-IA.
+
+Lanza N clientes concurrentes contra una instancia en marcha de la API y
+reporta, por endpoint, peticiones/segundo y latencias p50/p95/p99.
+
+Uso (con el Ollama simulado de scripts/fake_ollama.py):
+    python -m scripts.fake_ollama --puerto 11435 &
+    OLLAMA_URL=http://localhost:11435 uvicorn app:app --port 8000 &
+    python -m scripts.load_test --base-url http://localhost:8000 \
+        --concurrencia 50 --duracion 60 --escenario chat=3,precio=1,inventario=1
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import defaultdict
+
+import httpx
+
+MENSAJES_CHAT = [
+    "Hola, ¿qué productos tienes disponibles?",
+    "¿A qué precio vendo el queso por kg?",
+    "¿Cómo va la demanda de mis tomates este mes?",
+    "Recomiéndame algo para el desayuno",
+    "¿Qué me sugieres para vender más esta semana?",
+]
+PRODUCTOS_PRECIO = [("Queso fresco", "kg"), ("Huevos de campo", "docena"), ("Leche entera", "litro"), ("Tomate riñón", "kg")]
+
+
+def _chat(ids):
+    return "POST", "/api/chat/chat", {
+        "mensaje": random.choice(MENSAJES_CHAT),
+        "rol": random.choice(["VENDEDOR", "CONSUMIDOR"]),
+        "id_usuario": random.choice(ids),
+    }
+
+
+def _precio(ids):
+    nombre, unidad = random.choice(PRODUCTOS_PRECIO)
+    return "POST", "/api/ia/precio/recomendar", {
+        "nombre": nombre, "precio": round(random.uniform(0.5, 10), 2), "unidad": unidad,
+    }
+
+
+def _inventario(ids):
+    return "GET", f"/api/inventory/vendedor/{random.choice(ids)}", None
+
+
+def _pedidos_vendedor(ids):
+    return "GET", f"/api/orders/vendedor/{random.choice(ids)}", None
+
+
+def _pedidos_consumidor(ids):
+    return "GET", f"/api/orders/consumidor/{random.choice(ids)}", None
+
+
+ESCENARIOS = {
+    "chat": _chat,
+    "precio": _precio,
+    "inventario": _inventario,
+    "pedidos_vendedor": _pedidos_vendedor,
+    "pedidos_consumidor": _pedidos_consumidor,
+}
+
+
+def percentil(valores_ordenados, p: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not valores_ordenados:
+        return 0.0
+    k = max(0, min(len(valores_ordenados) - 1, math.ceil(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[k]
+
+
+def parsear_escenario(spec: str) -> dict:
+    pesos = {}
+    for parte in spec.split(","):
+        nombre, _, peso = parte.partition("=")
+        nombre = nombre.strip()
+        if nombre not in ESCENARIOS:
+            raise SystemExit(f"Escenario desconocido: {nombre}. Opciones: {', '.join(ESCENARIOS)}")
+        pesos[nombre] = float(peso or 1)
+    return pesos
+
+
+def parsear_rango(spec: str) -> list:
+    inicio, _, fin = spec.partition("-")
+    return list(range(int(inicio), int(fin or inicio) + 1))
+
+
+async def ejecutar_carga(base_url: str, pesos: dict, ids: list, concurrencia: int,
+                         duracion: float, peticiones: int = None, timeout: float = 120.0):
+    """Devuelve {endpoint: {"latencias": [...], "errores": n, "codigos": {...}}} y el tiempo total."""
+    resultados = defaultdict(lambda: {"latencias": [], "errores": 0, "codigos": defaultdict(int)})
+    nombres = list(pesos)
+    valores = [pesos[n] for n in nombres]
+    fin = time.perf_counter() + duracion
+    restantes = [peticiones] if peticiones else None
+
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limites) as client:
+
+        async def trabajador():
+            while time.perf_counter() < fin:
+                if restantes is not None:
+                    if restantes[0] <= 0:
+                        return
+                    restantes[0] -= 1
+                nombre = random.choices(nombres, weights=valores)[0]
+                metodo, ruta, cuerpo = ESCENARIOS[nombre](ids)
+                inicio = time.perf_counter()
+                try:
+                    respuesta = await client.request(metodo, ruta, json=cuerpo)
+                    codigo = respuesta.status_code
+                except httpx.HTTPError as e:
+                    codigo = type(e).__name__
+                transcurrido = time.perf_counter() - inicio
+
+                r = resultados[nombre]
+                r["codigos"][codigo] += 1
+                if isinstance(codigo, int) and codigo < 400:
+                    r["latencias"].append(transcurrido)
+                else:
+                    r["errores"] += 1
+
+        inicio_total = time.perf_counter()
+        await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        total = time.perf_counter() - inicio_total
+
+    return resultados, total
+
+
+def resumir(resultados: dict, total: float) -> dict:
+    resumen = {}
+    todas = []
+    errores_totales = 0
+    for nombre, r in sorted(resultados.items()):
+        latencias = sorted(r["latencias"])
+        todas.extend(latencias)
+        errores_totales += r["errores"]
+        resumen[nombre] = _fila(latencias, r["errores"], total)
+        resumen[nombre]["codigos"] = {str(k): v for k, v in r["codigos"].items()}
+    resumen["TOTAL"] = _fila(sorted(todas), errores_totales, total)
+    return resumen
+
+
+def _fila(latencias, errores, total):
+    n = len(latencias) + errores
+    return {
+        "peticiones": n,
+        "errores": errores,
+        "rps": round(n / total, 2) if total else 0.0,
+        "p50_ms": round(percentil(latencias, 50) * 1000, 1),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 1),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 1),
+        "max_ms": round((latencias[-1] if latencias else 0) * 1000, 1),
+    }
+
+
+def imprimir_tabla(resumen: dict):
+    cabecera = f"{'endpoint':<20}{'peticiones':>11}{'errores':>9}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(cabecera)
+    print("-" * len(cabecera))
+    for nombre, f in resumen.items():
+        print(f"{nombre:<20}{f['peticiones']:>11}{f['errores']:>9}{f['rps']:>9}"
+              f"{f['p50_ms']:>10}{f['p95_ms']:>10}{f['p99_ms']:>10}{f['max_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--escenario", default="chat=1", help="endpoint=peso separados por comas")
+    parser.add_argument("--concurrencia", type=int, default=20)
+    parser.add_argument("--duracion", type=float, default=30.0, help="segundos")
+    parser.add_argument("--peticiones", type=int, default=None, help="corta al llegar a este total")
+    parser.add_argument("--ids", default="1-50", help="rango de ids de usuario/vendedor, ej. 1-500")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", dest="salida_json", default=None, help="guarda el resumen en este archivo")
+    parser.add_argument("--semilla", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.semilla is not None:
+        random.seed(args.semilla)
+
+    resultados, total = asyncio.run(ejecutar_carga(
+        args.base_url, parsear_escenario(args.escenario), parsear_rango(args.ids),
+        args.concurrencia, args.duracion, args.peticiones, args.timeout,
+    ))
+    resumen = resumir(resultados, total)
+    print(f"\nDuración: {total:.1f}s | Concurrencia: {args.concurrencia}\n")
+    imprimir_tabla(resumen)
+
+    if args.salida_json:
+        with open(args.salida_json, "w", encoding="utf-8") as f:
+            json.dump(resumen, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
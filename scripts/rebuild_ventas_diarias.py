@@ -0,0 +1,38 @@
+"""
+Reconstruye la tabla de agregados 'ventas_diarias' desde 'detalles_pedido'.
+
+Uso:
+    python -m scripts.rebuild_ventas_diarias                      # todo el histórico
+    python -m scripts.rebuild_ventas_diarias --desde 2024-01-01 --hasta 2024-03-31
+
+Sirve como backfill inicial y para corregir desvíos; create_order mantiene la
+tabla al día en operación normal.
+"""
+import argparse
+import datetime
+import logging
+import time
+
+from core.database import SessionLocal
+from services.sales_rollup import reconstruir_ventas_diarias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruye ventas_diarias")
+    parser.add_argument("--desde", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--hasta", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--dias-por-lote", type=int, default=31)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        inicio = time.perf_counter()
+        filas = reconstruir_ventas_diarias(db, args.desde, args.hasta, args.dias_por_lote)
+        print(f"✅ ventas_diarias: {filas} filas en {time.perf_counter() - inicio:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Genera un marketplace sintético para pruebas de rendimiento locales.
+
+Uso:
+    DATABASE_URL=sqlite:///data/mercado_local.db python -m scripts.seed_data --filas 100000
+    python -m scripts.seed_data --filas 10000000 --semilla 7 --reiniciar
+
+Llena usuarios, vendedores, consumidores, productos, pedidos y
+detalles_pedido con unas --filas en total (10k a 10M), en proporciones
+parecidas a producción: ~40 productos por vendedor, ~2.6 líneas por pedido,
+pocos clientes y productos concentran la mayoría de las compras (Zipf), más
+ventas en fines de semana y diciembre. Nombres, unidades y precios salen de
+un catálogo de productos de mercado con variantes y dispersión log-normal.
+Misma --semilla, mismos datos. Al final reconstruye ventas_diarias.
+Todos los usuarios tienen la contraseña --contrasena.
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+from bisect import bisect
+from collections import Counter
+from itertools import accumulate
+from typing import Dict, List
+
+from sqlalchemy import delete, func, insert, select
+
+from core.database import SessionLocal, engine
+from core.migraciones import aplicar_migraciones
+from core.security import hasher_contrasenas
+from models.db_models import (
+    Consumidor, DetallesPedido, Pago, Pedido, Producto, PronosticoDemanda, Rol,
+    Subcategoria, Usuario, VentaDiaria, Vendedor
+)
+from services.sales_rollup import reconstruir_ventas_diarias
+
+# Los mismos ids que usa auth_routes al registrar (1 = Consumidor, 2 = Vendedor)
+ID_ROL_CONSUMIDOR = 1
+ID_ROL_VENDEDOR = 2
+
+# (id, nombre) de las subcategorías del catálogo
+SUBCATEGORIAS = [
+    (1, "Frutas"), (2, "Verduras"), (3, "Lácteos"), (4, "Huevos"), (5, "Carnes"),
+    (6, "Granos"), (7, "Panadería"), (8, "Bebidas"), (9, "Despensa"),
+]
+
+# (nombre base, unidad, precio base en USD por esa unidad, subcategoría, peso de popularidad)
+CATALOGO = [
+    ("Tomate riñón", "kg", 1.20, 2, 10), ("Cebolla paiteña", "kg", 1.00, 2, 8),
+    ("Papa chola", "kg", 0.70, 2, 10), ("Zanahoria", "kg", 0.80, 2, 6),
+    ("Pimiento", "unidad", 0.25, 2, 4), ("Ajo", "unidad", 0.15, 2, 3),
+    ("Lechuga", "unidad", 0.60, 2, 4), ("Brócoli", "unidad", 0.90, 2, 3),
+    ("Limón sutil", "unidad", 0.08, 1, 7), ("Naranja", "unidad", 0.15, 1, 7),
+    ("Plátano verde", "unidad", 0.12, 1, 8), ("Banano", "kg", 0.90, 1, 6),
+    ("Manzana", "unidad", 0.35, 1, 5), ("Mora", "kg", 2.50, 1, 3),
+    ("Aguacate", "unidad", 0.50, 1, 5), ("Piña", "unidad", 1.50, 1, 3),
+    ("Leche entera", "l", 1.00, 3, 9), ("Queso fresco", "unidad", 2.80, 3, 6),
+    ("Yogur natural", "l", 2.20, 3, 4), ("Mantequilla", "g", 0.012, 3, 2),
+    ("Huevos de campo", "docena", 3.20, 4, 8), ("Huevos", "unidad", 0.20, 4, 5),
+    ("Pollo entero", "kg", 3.40, 5, 7), ("Carne de res", "kg", 7.50, 5, 6),
+    ("Chuleta de cerdo", "kg", 6.20, 5, 4), ("Tilapia", "kg", 4.80, 5, 3),
+    ("Jamón", "g", 0.014, 5, 2), ("Arroz", "kg", 1.10, 6, 9),
+    ("Fréjol rojo", "kg", 2.40, 6, 4), ("Lenteja", "kg", 1.90, 6, 4),
+    ("Maíz", "kg", 1.00, 6, 3), ("Quinua", "kg", 4.50, 6, 2),
+    ("Pan de yuca", "unidad", 0.25, 7, 5), ("Pan integral", "paquete", 1.80, 7, 4),
+    ("Café molido", "g", 0.020, 8, 4), ("Jugo de naranja", "l", 2.00, 8, 3),
+    ("Agua mineral", "l", 0.60, 8, 4), ("Azúcar morena", "kg", 1.30, 9, 5),
+    ("Aceite de girasol", "l", 2.90, 9, 5), ("Sal", "kg", 0.50, 9, 3),
+    ("Miel de abeja", "ml", 0.012, 9, 2), ("Harina de trigo", "kg", 1.20, 9, 3),
+]
+VARIANTES = ["", "", "", "orgánico", "criollo", "de la sierra", "premium", "fresco",
+             "de temporada", "del valle", "artesanal", "importado"]
+# Unidad alternativa (otros vendedores venden por libra o por caja)
+UNIDADES_ALTERNAS = {"kg": [("lb", 0.4536)], "unidad": [("docena", 12), ("caja", 12)],
+                     "l": [("ml", 0.001)], "docena": [("media docena", 0.5)]}
+ESTADOS_PRODUCTO = [("Disponible", 85), ("ACTIVO", 5), ("Agotado", 5), ("Inactivo", 5)]
+METODOS_PAGO = [("EFECTIVO", 50), ("TRANSFERENCIA", 30), ("TARJETA", 20)]
+CANTIDADES = [(1, 45), (2, 25), (3, 12), (4, 8), (5, 6), (10, 4)]
+LINEAS_POR_PEDIDO = [(1, 30), (2, 25), (3, 18), (4, 12), (5, 7), (6, 4), (7, 2), (8, 2)]
+NOMBRES = ["María", "José", "Luis", "Ana", "Carlos", "Rosa", "Jorge", "Carmen", "Juan", "Lucía",
+           "Pedro", "Gabriela", "Diego", "Andrea", "Miguel", "Paola", "Fernando", "Daniela",
+           "Santiago", "Valeria", "Andrés", "Sofía", "Ricardo", "Elena"]
+APELLIDOS = ["Guamán", "Pérez", "Quispe", "Andrade", "Morales", "Chávez", "Vera", "Torres",
+             "Cedeño", "Zambrano", "Yépez", "Herrera", "Salazar", "Castillo", "Villacís", "Mora",
+             "Ortiz", "Espinoza", "Bravo", "Suárez"]
+EMPRESAS = ["Huerta", "Granja", "Finca", "Mercado", "Cosechas", "Productos", "Delicias", "Campo"]
+LUGARES = ["Cotopaxi", "del Valle", "Andina", "Tungurahua", "La Esperanza", "San Pedro",
+           "El Ejido", "Imbabura", "Chimborazo", "Los Ríos"]
+
+
+def _elegir(rng: random.Random, opciones):
+    """Elección ponderada sobre [(valor, peso), ...]."""
+    valores = [v for v, _ in opciones]
+    return rng.choices(valores, weights=[p for _, p in opciones])[0]
+
+
+def _zipf(rng: random.Random, n: int, sesgo: float = 2.0) -> int:
+    # Índice en [0, n) con los primeros mucho más probables
+    return min(int(n * rng.random() ** sesgo), n - 1)
+
+
+def _sin_acentos(texto: str) -> str:
+    return texto.translate(str.maketrans("áéíóúñÁÉÍÓÚÑ", "aeiounAEIOUN"))
+
+
+def planificar(filas: int) -> Dict[str, int]:
+    """Filas por tabla para llegar a ~`filas` en total."""
+    vendedores = max(5, filas // 1000)
+    consumidores = max(20, filas // 20)
+    productos = max(50, filas // 25)
+    lineas_medias = sum(v * p for v, p in LINEAS_POR_PEDIDO) / sum(p for _, p in LINEAS_POR_PEDIDO)
+    restantes = max(filas - 2 * (vendedores + consumidores) - productos, 10)
+    pedidos = max(10, int(restantes / (1 + lineas_medias)))
+    return {"vendedores": vendedores, "consumidores": consumidores, "productos": productos, "pedidos": pedidos}
+
+
+class Generador:
+    def __init__(self, db, semilla: int, lote: int, dias: int, contrasena: str):
+        self.db = db
+        self.rng = random.Random(semilla)
+        self.lote = lote
+        self.hoy = datetime.datetime.now().replace(microsecond=0)
+        self.dias = dias
+        self.hash_contrasena = hasher_contrasenas.hash_bloqueante(contrasena)
+        self.filas = {}
+
+    def _siguiente_id(self, columna) -> int:
+        return (self.db.execute(select(func.max(columna))).scalar() or 0) + 1
+
+    def _insertar(self, modelo, filas: List[Dict]):
+        if filas:
+            self.db.execute(insert(modelo), filas)
+            self.db.commit()
+            self.filas[modelo.__tablename__] = self.filas.get(modelo.__tablename__, 0) + len(filas)
+
+    def _en_lotes(self, modelo, generador):
+        pendiente = []
+        for fila in generador:
+            pendiente.append(fila)
+            if len(pendiente) >= self.lote:
+                self._insertar(modelo, pendiente)
+                pendiente = []
+        self._insertar(modelo, pendiente)
+
+    def catalogos(self):
+        existentes = set(self.db.execute(select(Rol.id_rol)).scalars())
+        self._insertar(Rol, [{"id_rol": i, "nombre_rol": n} for i, n in
+                             ((ID_ROL_CONSUMIDOR, "CONSUMIDOR"), (ID_ROL_VENDEDOR, "VENDEDOR"))
+                             if i not in existentes])
+        existentes = set(self.db.execute(select(Subcategoria.id_subcategoria)).scalars())
+        self._insertar(Subcategoria, [{"id_subcategoria": i, "nombre_subcategoria": n}
+                                      for i, n in SUBCATEGORIAS if i not in existentes])
+
+    def usuarios(self, cantidad: int, id_rol: int) -> List[int]:
+        """Inserta `cantidad` usuarios del rol y devuelve sus ids."""
+        primero = self._siguiente_id(Usuario.id_usuario)
+        rng = self.rng
+
+        def filas():
+            for id_usuario in range(primero, primero + cantidad):
+                nombre, apellido = rng.choice(NOMBRES), rng.choice(APELLIDOS)
+                yield {
+                    "id_usuario": id_usuario,
+                    "nombre_usuario": nombre,
+                    "apellido_usuario": apellido,
+                    "correo_electronico": _sin_acentos(f"{nombre}.{apellido}{id_usuario}@correo.ec").lower(),
+                    "contrasena_usuario": self.hash_contrasena,
+                    "id_rol": id_rol,
+                    "fecha_registro": self.hoy - datetime.timedelta(days=rng.randint(self.dias, self.dias * 2)),
+                    "estado": "ACTIVO",
+                }
+
+        self._en_lotes(Usuario, filas())
+        return list(range(primero, primero + cantidad))
+
+    def vendedores(self, cantidad: int) -> List[int]:
+        ids_usuario = self.usuarios(cantidad, ID_ROL_VENDEDOR)
+        primero = self._siguiente_id(Vendedor.id_vendedor)
+        rng = self.rng
+        self._en_lotes(Vendedor, ({
+            "id_vendedor": id_vendedor,
+            "nombre_empresa": f"{rng.choice(EMPRESAS)} {rng.choice(LUGARES)}",
+            "ruc_empresa": f"{1700000000 + id_vendedor:010d}001",
+            "direccion_empresa": f"Calle {rng.randint(1, 120)} y Av. {rng.choice(LUGARES)}",
+            "telefono_empresa": f"09{rng.randint(0, 99999999):08d}",
+            "id_usuario": id_usuario,
+        } for id_vendedor, id_usuario in zip(range(primero, primero + cantidad), ids_usuario)))
+        return list(range(primero, primero + cantidad))
+
+    def consumidores(self, cantidad: int) -> List[int]:
+        ids_usuario = self.usuarios(cantidad, ID_ROL_CONSUMIDOR)
+        primero = self._siguiente_id(Consumidor.id_consumidor)
+        rng = self.rng
+        self._en_lotes(Consumidor, ({
+            "id_consumidor": id_consumidor,
+            "cedula_consumidor": f"{1000000000 + id_consumidor:010d}"[-10:],
+            "direccion_consumidor": f"Barrio {rng.choice(LUGARES)}, casa {rng.randint(1, 500)}",
+            "telefono_consumidor": f"09{rng.randint(0, 99999999):08d}",
+            "id_usuario": id_usuario,
+        } for id_consumidor, id_usuario in zip(range(primero, primero + cantidad), ids_usuario)))
+        return list(range(primero, primero + cantidad))
+
+    def productos(self, cantidad: int, ids_vendedor: List[int]) -> Dict[int, List]:
+        """Devuelve {id_vendedor: [(id_producto, precio), ...]} de los productos que se pueden vender."""
+        primero = self._siguiente_id(Producto.id_producto)
+        rng = self.rng
+        pesos = list(accumulate(p for *_, p in CATALOGO))
+        # Cada vendedor tiene su nivel de precios (más caro o más barato que el mercado)
+        nivel_precio = {v: rng.lognormvariate(0, 0.10) for v in ids_vendedor}
+        vendibles: Dict[int, List] = {v: [] for v in ids_vendedor}
+        # Nombre único por vendedor (índice ux_productos_vendedor_nombre): "Tomate (2)", "Tomate (3)"...
+        repetidos: Counter = Counter()
+
+        def filas():
+            for id_producto in range(primero, primero + cantidad):
+                base, unidad, precio, id_subcategoria, _ = CATALOGO[bisect(pesos, rng.random() * pesos[-1])]
+                if unidad in UNIDADES_ALTERNAS and rng.random() < 0.15:
+                    unidad, factor = rng.choice(UNIDADES_ALTERNAS[unidad])
+                    precio *= factor
+                id_vendedor = ids_vendedor[_zipf(rng, len(ids_vendedor), 1.5)]
+                precio = precio * rng.lognormvariate(0, 0.20) * nivel_precio[id_vendedor]
+                # Redondeo a 5 centavos (a 0.001 para precios por gramo/mililitro)
+                precio = round(precio, 3) if precio < 0.05 else round(round(precio * 20) / 20, 2)
+                estado = _elegir(rng, ESTADOS_PRODUCTO)
+                stock = 0 if estado == "Agotado" else int(rng.lognormvariate(3, 1))
+                if estado in ("Disponible", "ACTIVO") and stock > 0:
+                    vendibles[id_vendedor].append((id_producto, precio))
+                variante = rng.choice(VARIANTES)
+                nombre = f"{base} {variante}".strip()
+                clave = (id_vendedor, nombre.lower())
+                repetidos[clave] += 1
+                if repetidos[clave] > 1:
+                    nombre = f"{nombre} ({repetidos[clave]})"
+                yield {
+                    "id_producto": id_producto,
+                    "nombre_producto": nombre,
+                    "descripcion_producto": f"{base} {variante}, vendido por {unidad}".replace("  ", " "),
+                    "precio_producto": precio,
+                    "stock_producto": stock,
+                    "unidad": unidad,
+                    "id_vendedor": id_vendedor,
+                    "id_subcategoria": id_subcategoria,
+                    "fecha_publicacion": self.hoy - datetime.timedelta(
+                        days=rng.randint(0, self.dias), seconds=rng.randint(0, 86399)
+                    ),
+                    "estado": estado,
+                }
+
+        self._en_lotes(Producto, filas())
+        return {v: productos for v, productos in vendibles.items() if productos}
+
+    def _pesos_dias(self) -> List[float]:
+        # Crecimiento del negocio, más ventas en fin de semana y en diciembre
+        pesos = []
+        for atras in range(self.dias):
+            dia = self.hoy - datetime.timedelta(days=atras)
+            peso = 1.0 + (self.dias - atras) / self.dias
+            peso *= 1.3 if dia.weekday() >= 5 else 1.0
+            peso *= 1.5 if dia.month == 12 else 1.0
+            pesos.append(peso)
+        return list(accumulate(pesos))
+
+    def pedidos(self, cantidad: int, ids_consumidor: List[int], vendibles: Dict[int, List]):
+        primero_pedido = self._siguiente_id(Pedido.id_pedido)
+        id_detalle = self._siguiente_id(DetallesPedido.id_detalle)
+        rng = self.rng
+        vendedores = list(vendibles)
+        pesos_dias = self._pesos_dias()
+        cabeceras, detalles = [], []
+
+        for id_pedido in range(primero_pedido, primero_pedido + cantidad):
+            atras = bisect(pesos_dias, rng.random() * pesos_dias[-1])
+            fecha = (self.hoy - datetime.timedelta(days=atras)).replace(
+                hour=rng.randint(7, 21), minute=rng.randint(0, 59), second=rng.randint(0, 59)
+            )
+            id_vendedor = vendedores[_zipf(rng, len(vendedores), 1.5)]
+            catalogo = vendibles[id_vendedor]
+            # Precios de hace un año ~4% más bajos
+            inflacion = 1 - 0.04 * atras / 365
+            total = 0.0
+            elegidos = {catalogo[_zipf(rng, len(catalogo))] for _ in range(_elegir(rng, LINEAS_POR_PEDIDO))}
+            for id_producto, precio in elegidos:
+                cantidad_item = _elegir(rng, CANTIDADES)
+                precio_unitario = round(precio * inflacion, 3)
+                subtotal = round(precio_unitario * cantidad_item, 2)
+                total += subtotal
+                detalles.append({
+                    "id_detalle": id_detalle,
+                    "id_pedido": id_pedido,
+                    "id_producto": id_producto,
+                    "cantidad": cantidad_item,
+                    "precio_unitario": precio_unitario,
+                    "subtotal": subtotal,
+                })
+                id_detalle += 1
+            if atras > 7:
+                estado = "ENTREGADO" if rng.random() < 0.9 else "CANCELADO"
+            else:
+                estado = rng.choice(["PENDIENTE", "En preparación", "Enviado", "Entregado"])
+            cabeceras.append({
+                "id_pedido": id_pedido,
+                "id_consumidor": ids_consumidor[_zipf(rng, len(ids_consumidor))],
+                "id_vendedor": id_vendedor,
+                "total": round(total, 2),
+                "estado_pedido": estado,
+                "fecha_pedido": fecha,
+                "metodo_pago": _elegir(rng, METODOS_PAGO),
+            })
+            if len(cabeceras) >= self.lote:
+                self._insertar(Pedido, cabeceras)
+                self._insertar(DetallesPedido, detalles)
+                cabeceras, detalles = [], []
+                hechos = id_pedido - primero_pedido + 1
+                print(f"   pedidos: {hechos}/{cantidad} ({hechos / cantidad:.0%})", flush=True)
+        self._insertar(Pedido, cabeceras)
+        self._insertar(DetallesPedido, detalles)
+
+
+def reiniciar(db):
+    # Orden inverso a las FK; roles y subcategorías se conservan
+    for modelo in (VentaDiaria, PronosticoDemanda, Pago, DetallesPedido, Pedido, Producto,
+                   Consumidor, Vendedor, Usuario):
+        db.execute(delete(modelo))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Datos sintéticos del marketplace")
+    parser.add_argument("--filas", type=int, default=100_000, help="filas totales aproximadas (10k a 10M)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--dias", type=int, default=365, help="días de historia de pedidos")
+    parser.add_argument("--lote", type=int, default=5000, help="filas por INSERT")
+    parser.add_argument("--contrasena", default="mercado123")
+    parser.add_argument("--reiniciar", action="store_true", help="borra los datos existentes antes de generar")
+    parser.add_argument("--sin-agregados", action="store_true", help="no reconstruye ventas_diarias")
+    args = parser.parse_args()
+    if not 10_000 <= args.filas <= 10_000_000:
+        parser.error("--filas debe estar entre 10000 y 10000000")
+
+    aplicar_migraciones()
+    plan = planificar(args.filas)
+    print(f"🗄️  {engine.url.render_as_string(hide_password=True)}: {plan}")
+
+    inicio = time.perf_counter()
+    db = SessionLocal()
+    try:
+        if args.reiniciar:
+            reiniciar(db)
+        generador = Generador(db, args.semilla, args.lote, args.dias, args.contrasena)
+        generador.catalogos()
+        ids_vendedor = generador.vendedores(plan["vendedores"])
+        ids_consumidor = generador.consumidores(plan["consumidores"])
+        vendibles = generador.productos(plan["productos"], ids_vendedor)
+        generador.pedidos(plan["pedidos"], ids_consumidor, vendibles)
+        if not args.sin_agregados:
+            generador.filas["ventas_diarias"] = reconstruir_ventas_diarias(db)
+    finally:
+        db.close()
+
+    segundos = time.perf_counter() - inicio
+    total = sum(generador.filas.values())
+    print(json.dumps({
+        "filas": generador.filas,
+        "total": total,
+        "segundos": round(segundos, 1),
+        "filas_por_segundo": round(total / segundos) if segundos > 0 else None,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Entrena el clasificador de intents del chatbot (TF-IDF + regresión logística).
+
+Uso:
+    python -m scripts.train_intent_model --datos data/intents_es.csv
+
+Genera un artefacto versionado (data/intent_model_<version>.joblib), copia la
+última versión a INTENT_MODEL_PATH y guarda las métricas en JSON al lado.
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+from sklearn.pipeline import Pipeline
+
+from core.config import settings
+from services.intent_detector import IntentDetector
+
+
+def leer_datos(ruta: str):
+    with open(ruta, encoding="utf-8") as f:
+        filas = list(csv.DictReader(f))
+    return [f["texto"] for f in filas], np.array([f["intent"] for f in filas])
+
+
+def crear_pipeline() -> Pipeline:
+    return Pipeline([
+        # n-gramas de caracteres: tolera faltas de ortografía, plurales y conjugaciones
+        ("tfidf", TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), lowercase=True,
+                                  strip_accents="unicode", sublinear_tf=True, min_df=1)),
+        ("clf", LogisticRegression(C=10.0, max_iter=2000, class_weight="balanced")),
+    ])
+
+
+def calibrar_umbral(textos, etiquetas, probabilidades, clases):
+    """
+    Elige el umbral de confianza que maximiza la exactitud del esquema híbrido
+    (modelo si confía, palabras clave si no) sobre predicciones fuera de muestra.
+    """
+    respaldo = np.array([IntentDetector.detect_keywords(t) for t in textos])
+    prediccion = clases[probabilidades.argmax(axis=1)]
+    confianza = probabilidades.max(axis=1)
+
+    mejor = (0.0, -1.0, 0.0)  # (umbral, exactitud, cobertura)
+    for umbral in np.unique(np.concatenate([[0.0], confianza])):
+        usa_modelo = confianza >= umbral
+        hibrido = np.where(usa_modelo, prediccion, respaldo)
+        exactitud = float((hibrido == etiquetas).mean())
+        if exactitud > mejor[1]:
+            mejor = (float(umbral), exactitud, float(usa_modelo.mean()))
+    return mejor, float((respaldo == etiquetas).mean()), float((prediccion == etiquetas).mean())
+
+
+def medir_latencia(pipeline, textos, repeticiones: int = 200):
+    muestra = textos[:1]
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        pipeline.predict_proba(muestra)
+    individual = (time.perf_counter() - inicio) / repeticiones
+
+    lote = (textos * (1000 // len(textos) + 1))[:1000]
+    inicio = time.perf_counter()
+    pipeline.predict_proba(lote)
+    por_mensaje_lote = (time.perf_counter() - inicio) / len(lote)
+    return individual * 1000, por_mensaje_lote * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrena el clasificador de intents")
+    parser.add_argument("--datos", default="data/intents_es.csv")
+    parser.add_argument("--salida", default=settings.INTENT_MODEL_PATH)
+    parser.add_argument("--folds", type=int, default=5)
+    args = parser.parse_args()
+
+    textos, etiquetas = leer_datos(args.datos)
+    print(f"📚 {len(textos)} ejemplos, clases: {sorted(set(etiquetas))}")
+
+    # 1. Probabilidades fuera de muestra para calibrar el umbral
+    pipeline = crear_pipeline()
+    folds = StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=42)
+    probabilidades = cross_val_predict(pipeline, textos, etiquetas, cv=folds, method="predict_proba")
+    clases = np.array(sorted(set(etiquetas)))
+    (umbral, exactitud_hibrida, cobertura), exactitud_palabras, exactitud_modelo = calibrar_umbral(
+        textos, etiquetas, probabilidades, clases
+    )
+
+    # 2. Modelo final con todos los datos
+    pipeline.fit(textos, etiquetas)
+    ms_individual, ms_lote = medir_latencia(pipeline, textos)
+
+    version = datetime.now().strftime("%Y%m%d%H%M%S")
+    metricas = {
+        "version": version,
+        "ejemplos": len(textos),
+        "exactitud_palabras_clave": round(exactitud_palabras, 4),
+        "exactitud_modelo": round(exactitud_modelo, 4),
+        "exactitud_hibrida": round(exactitud_hibrida, 4),
+        "umbral": round(umbral, 4),
+        "cobertura_modelo": round(cobertura, 4),
+        "ms_por_mensaje": round(ms_individual, 4),
+        "ms_por_mensaje_en_lote": round(ms_lote, 4),
+    }
+    artefacto = {"version": version, "pipeline": pipeline, "umbral": umbral, "metricas": metricas}
+
+    directorio = os.path.dirname(args.salida) or "."
+    os.makedirs(directorio, exist_ok=True)
+    base, extension = os.path.splitext(args.salida)
+    versionado = f"{base}_{version}{extension}"
+    joblib.dump(artefacto, versionado)
+    # Copia + os.replace: el registro de modelos nunca ve un archivo a medio escribir
+    temporal = f"{args.salida}.tmp"
+    shutil.copyfile(versionado, temporal)
+    os.replace(temporal, args.salida)
+    with open(f"{base}_{version}.json", "w", encoding="utf-8") as f:
+        json.dump(metricas, f, indent=2)
+
+    for clave, valor in metricas.items():
+        print(f"   {clave}: {valor}")
+    print(f"✅ Modelo guardado en {versionado} (activo: {args.salida})")
+
+
+if __name__ == "__main__":
+    main()
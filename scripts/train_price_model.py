@@ -0,0 +1,216 @@
+"""
+Entrena el modelo de precios (PriceModel) por lotes, sin cargar las tablas en memoria.
+
+Uso:
+    python -m scripts.train_price_model --lote 20000 --epocas 3
+
+Lee 'productos' y 'detalles_pedido' con cursores del lado del servidor
+(yield_per) y entrena un regresor incremental (StandardScaler + SGDRegressor
+con partial_fit). Los precios se llevan a una unidad base (kg, l o unidad)
+con la normalización de services/price_recommender para que un precio por
+libra y uno por kilo sean comparables.
+
+Features (mismo orden que PriceModel.suggest_price):
+    [precio_publicado, promedio_categoria]  -> precio_unitario vendido
+Se reserva ~10% de las líneas (id_detalle % 10 == 0) para evaluar.
+
+Genera data/price_model_<version>.pkl (sin compresión, para mmap) y sus
+métricas en JSON, y publica la versión en PRICE_MODEL_PATH.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sqlalchemy import select
+
+from core.config import settings
+from core.database import SessionLocal
+from models.db_models import DetallesPedido, Producto
+from services.price_recommender import (
+    convertir_precio_por_unidad, es_unidad_de_peso, es_unidad_de_volumen, normalizar_unidad
+)
+
+FEATURES = ["precio_publicado", "promedio_categoria"]
+
+
+@lru_cache(maxsize=65536)
+def unidad_base(unidad: str, nombre: str):
+    """Devuelve (unidad_base, factor) tal que precio * factor = precio por unidad base."""
+    unidad = unidad or "unidad"
+    norma = normalizar_unidad(unidad)
+    if es_unidad_de_peso(norma):
+        base = "kg"
+    elif es_unidad_de_volumen(norma):
+        base = "l"
+    else:
+        base = "unidad"
+    factor = convertir_precio_por_unidad(1.0, unidad, base, nombre)
+    if factor is None:
+        # Sin conversión posible (p. ej. huevos por kg): se queda en su propia unidad
+        return norma, 1.0
+    return base, factor
+
+
+def promedios_por_categoria(db, lote: int):
+    """Pasada 1: precio medio publicado por (subcategoría, unidad base)."""
+    sumas = defaultdict(lambda: [0.0, 0])
+    consulta = select(
+        Producto.id_subcategoria, Producto.nombre_producto, Producto.precio_producto, Producto.unidad
+    ).where(Producto.precio_producto > 0)
+    for filas in db.execute(consulta.execution_options(yield_per=lote)).partitions():
+        for id_subcategoria, nombre, precio, unidad in filas:
+            base, factor = unidad_base(unidad, nombre or "")
+            acumulado = sumas[(id_subcategoria, base)]
+            acumulado[0] += precio * factor
+            acumulado[1] += 1
+    return {clave: s / n for clave, (s, n) in sumas.items()}
+
+
+def lotes_de_entrenamiento(db, promedios, lote: int):
+    """
+    Genera (X, y, es_validacion) por lote de líneas de pedido.
+    Solo se mantiene en memoria un lote y el diccionario de promedios.
+    """
+    consulta = select(
+        DetallesPedido.id_detalle,
+        DetallesPedido.precio_unitario,
+        Producto.precio_producto,
+        Producto.unidad,
+        Producto.nombre_producto,
+        Producto.id_subcategoria,
+    ).join(Producto, Producto.id_producto == DetallesPedido.id_producto)\
+        .where(DetallesPedido.precio_unitario > 0, Producto.precio_producto > 0)\
+        .order_by(DetallesPedido.id_detalle)
+
+    for filas in db.execute(consulta.execution_options(yield_per=lote)).partitions():
+        X = np.empty((len(filas), 2), dtype=np.float64)
+        y = np.empty(len(filas), dtype=np.float64)
+        validacion = np.empty(len(filas), dtype=bool)
+        n = 0
+        for id_detalle, vendido, publicado, unidad, nombre, id_subcategoria in filas:
+            base, factor = unidad_base(unidad, nombre or "")
+            promedio = promedios.get((id_subcategoria, base))
+            if promedio is None:
+                continue
+            X[n, 0] = publicado * factor
+            X[n, 1] = promedio
+            y[n] = vendido * factor
+            validacion[n] = id_detalle % 10 == 0
+            n += 1
+        if n:
+            yield X[:n], y[:n], validacion[:n]
+
+
+def entrenar(db, lote: int, epocas: int, semilla: int):
+    rng = np.random.default_rng(semilla)
+    t0 = time.perf_counter()
+    promedios = promedios_por_categoria(db, lote)
+    print(f"📦 {len(promedios)} categorías (subcategoría, unidad base)")
+
+    # Pasada 2: escala de las features
+    escala = StandardScaler()
+    filas_entrenamiento = filas_validacion = lotes = 0
+    for X, y, validacion in lotes_de_entrenamiento(db, promedios, lote):
+        lotes += 1
+        filas_validacion += int(validacion.sum())
+        if (~validacion).any():
+            escala.partial_fit(X[~validacion])
+            filas_entrenamiento += int((~validacion).sum())
+    if filas_entrenamiento == 0:
+        raise SystemExit("❌ No hay líneas de pedido suficientes para entrenar.")
+
+    # Pasadas 3..: descenso de gradiente estocástico, lote a lote
+    # Huber: robusto a líneas con precios atípicos (descuentos, errores de carga)
+    regresor = SGDRegressor(loss="huber", epsilon=1.0, alpha=1e-5, learning_rate="invscaling",
+                            eta0=0.05, random_state=semilla)
+    for epoca in range(epocas):
+        for X, y, validacion in lotes_de_entrenamiento(db, promedios, lote):
+            entrenamiento = ~validacion
+            if not entrenamiento.any():
+                continue
+            orden = rng.permutation(int(entrenamiento.sum()))
+            regresor.partial_fit(escala.transform(X[entrenamiento][orden]), y[entrenamiento][orden])
+        print(f"   época {epoca + 1}/{epocas} completada")
+
+    # Evaluación en streaming sobre las líneas reservadas
+    n = suma_abs = suma_abs_respaldo = suma_cuad = suma_y = suma_y2 = 0.0
+    for X, y, validacion in lotes_de_entrenamiento(db, promedios, lote):
+        if not validacion.any():
+            continue
+        Xv, yv = X[validacion], y[validacion]
+        error = regresor.predict(escala.transform(Xv)) - yv
+        n += len(yv)
+        suma_abs += np.abs(error).sum()
+        suma_cuad += (error ** 2).sum()
+        # Respaldo de PriceModel sin artefacto: media de las dos features
+        suma_abs_respaldo += np.abs(Xv.mean(axis=1) - yv).sum()
+        suma_y += yv.sum()
+        suma_y2 += (yv ** 2).sum()
+
+    metricas = {
+        "filas_entrenamiento": filas_entrenamiento,
+        "filas_validacion": filas_validacion,
+        "lotes": lotes,
+        "categorias": len(promedios),
+        "epocas": epocas,
+        "segundos": round(time.perf_counter() - t0, 2),
+    }
+    if n:
+        varianza = suma_y2 - suma_y ** 2 / n
+        metricas.update({
+            "mae": round(suma_abs / n, 4),
+            "rmse": round(float(np.sqrt(suma_cuad / n)), 4),
+            "r2": round(1 - suma_cuad / varianza, 4) if varianza > 0 else None,
+            "mae_respaldo": round(suma_abs_respaldo / n, 4),
+        })
+    modelo = Pipeline([("escala", escala), ("regresor", regresor)])
+    return modelo, metricas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrena el modelo de precios por lotes")
+    parser.add_argument("--lote", type=int, default=20000, help="filas por lote del cursor")
+    parser.add_argument("--epocas", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", default=settings.PRICE_MODEL_PATH)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        modelo, metricas = entrenar(db, args.lote, args.epocas, args.semilla)
+    finally:
+        db.close()
+
+    version = datetime.now().strftime("%Y%m%d%H%M%S")
+    metricas = {"version": version, **metricas}
+    artefacto = {"version": version, "modelo": modelo, "features": FEATURES, "metricas": metricas}
+
+    directorio = os.path.dirname(args.salida) or "."
+    os.makedirs(directorio, exist_ok=True)
+    base, extension = os.path.splitext(args.salida)
+    versionado = f"{base}_{version}{extension}"
+    joblib.dump(artefacto, versionado)
+    # Copia + os.replace: el registro de modelos nunca ve un archivo a medio escribir
+    temporal = f"{args.salida}.tmp"
+    shutil.copyfile(versionado, temporal)
+    os.replace(temporal, args.salida)
+    with open(f"{base}_{version}.json", "w", encoding="utf-8") as f:
+        json.dump(metricas, f, indent=2)
+
+    for clave, valor in metricas.items():
+        print(f"   {clave}: {valor}")
+    print(f"✅ Modelo guardado en {versionado} (activo: {args.salida})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
 from models.db_models import Usuario, Vendedor, Consumidor
-from core.security import Security
+from core.security import hasher_contrasenas
 from fastapi import HTTPException, status
 import datetime
 
@@ -19,7 +19,7 @@ class AuthService:
             return None
             
         # Verificar el hash de la contraseña (RNF-03)
-        if not Security.verify_password(password_plano, user.contrasena_usuario):
+        if not hasher_contrasenas.verificar_bloqueante(password_plano, user.contrasena_usuario):
             return None
             
         return user
@@ -29,7 +29,7 @@ class AuthService:
         Gestiona el registro dual: Usuario + Perfil (Vendedor/Consumidor).
         """
         # 1. Encriptar contraseña antes de guardar
-        hashed_password = Security.hash_password(user_data.contrasena_usuario)
+        hashed_password = hasher_contrasenas.hash_bloqueante(user_data.contrasena_usuario)
 
         # 2. Crear instancia de Usuario base
         nuevo_usuario = Usuario(
@@ -1,48 +1,71 @@
-from models.db_models import Producto # Importamos el modelo de tu DB
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from services.ollama_service import OllamaService
+from services.conversation_store import crear_conversation_store
+from services.prompt_builder import PromptBuilder, HistorySummarizer
+from services.intent_router import IntentRouter
+from services.context_cache import contexto_productos
+from core.config import settings
 
-historiales_activos = {}
+# Historial acotado por usuario (ver CHAT_HISTORY_* en core/config.py)
+historiales_activos = crear_conversation_store()
+constructor_prompt = PromptBuilder()
+resumidor_historial = HistorySummarizer(historiales_activos)
 
 class ChatbotService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.ai = OllamaService()
         self.db = db
+        self.router = IntentRouter(db)
 
     async def handle_request(self, message: str, rol: str, id_usuario: int):
-        # 1. Creamos el historial para el usuario si no existe
-        if id_usuario not in historiales_activos:
-            historiales_activos[id_usuario] = []
-        
-        # 2. Obtenemos los productos reales (Tu lógica actual)
-        productos_reales = self.db.query(Producto).filter(Producto.id_vendedor == id_usuario).all()
-        lista_productos = "\n".join([f"- {p.nombre_producto}: ${p.precio_producto}" for p in productos_reales])
+        # Para un vendedor id_usuario es su id_vendedor: el historial lleva prefijo
+        # para que el vendedor 5 y el usuario 5 no compartan conversación
+        clave = f"{'v' if rol == 'VENDEDOR' else 'u'}{id_usuario}"
+
+        # 1. Obtenemos los productos reales desde la cache (se invalida al editar el inventario)
+        # (run_sync: la consulta, si no hay acierto en la cache, va por el driver async)
+        if rol == "VENDEDOR":
+            productos = await self.db.run_sync(contexto_productos.vendedor, id_usuario)
+        else:
+            productos = await self.db.run_sync(contexto_productos.global_)
+
+        # 2. Las preguntas estructuradas (precio, demanda, compra) se responden sin IA
+        respuesta = await self.router.resolver(message, rol, productos.filas)
+        if respuesta is not None:
+            self._guardar_turno(clave, message, respuesta)
+            return respuesta
+
+        historial = historiales_activos.obtener(clave, settings.CHAT_HISTORY_VENTANA)
+        resumen = historiales_activos.obtener_resumen(clave)
 
         # 3. Definimos el System Prompt según el ROL que llega de Java
         # IMPORTANTE: Usamos 'rol' como String porque así lo envía tu IAClientService.java
         if rol == "VENDEDOR":
-            contexto = f"Eres MercadoBot Pro. Ayudas al vendedor ID {id_usuario}. Sus productos: {lista_productos}"
+            encabezado = f"Eres MercadoBot Pro. Ayudas al vendedor ID {id_usuario}. Sus productos:"
         else:
-            contexto = f"Eres MercadoBot. Ayudas al cliente. Productos disponibles: {lista_productos}"
+            encabezado = "Eres MercadoBot. Ayudas al cliente. Productos disponibles:"
 
-        # 4. Construimos la memoria para la IA
-        mensajes_para_ollama = [{"role": "system", "content": contexto}]
-        
-        # Agregamos los últimos mensajes de ESTE usuario específico
-        mensajes_para_ollama.extend(historiales_activos[id_usuario][-6:]) # Últimos 6 mensajes
-        
-        # Agregamos el mensaje nuevo
-        mensajes_para_ollama.append({"role": "user", "content": message})
+        # 4. Construimos la memoria para la IA dentro del presupuesto de tokens
+        mensajes_para_ollama, _ = constructor_prompt.construir(
+            encabezado, productos.lineas, historial, resumen, message
+        )
 
         # 5. Llamamos a la IA
-        respuesta = await self.ai.generate_response(mensajes_para_ollama)
+        respuesta = await self.ai.generate_chat_response(mensajes_para_ollama)
 
         # 6. GUARDAMOS en el historial de ESTE usuario
-        historiales_activos[id_usuario].append({"role": "user", "content": message})
-        historiales_activos[id_usuario].append({"role": "assistant", "content": respuesta})
-
+        self._guardar_turno(clave, message, respuesta)
         return respuesta
 
+    def _guardar_turno(self, clave: str, message: str, respuesta: str):
+        historiales_activos.agregar(
+            clave,
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": respuesta},
+        )
+        # Si hay turnos viejos acumulados, se resumen en segundo plano
+        resumidor_historial.programar(clave)
+
     def _get_vendedor_context(self, id_vendedor: int, productos: str) -> str:
         return (
             f"Eres MercadoBot Pro. El vendedor ID {id_vendedor} tiene estos productos REALES:\n"
@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from models.db_models import Producto
+from services.inventory_versions import versiones_inventario
+
+# Estados con los que se publican productos (inventory_routes usa "ACTIVO", la web "Disponible")
+ESTADOS_DISPONIBLES = ("ACTIVO", "Disponible")
+# Solo las columnas que usa el prompt (sin la descripción Text)
+COLUMNAS_CONTEXTO = (Producto.id_producto, Producto.nombre_producto, Producto.precio_producto, Producto.unidad)
+
+
+def consulta_contexto_vendedor(id_vendedor: int):
+    return select(*COLUMNAS_CONTEXTO).where(Producto.id_vendedor == id_vendedor)
+
+
+def consulta_contexto_global(limite: int):
+    # Los más recientes con stock; scripts/check_query_plans.py revisa ambos planes
+    return select(*COLUMNAS_CONTEXTO).where(
+        Producto.estado.in_(ESTADOS_DISPONIBLES),
+        Producto.stock_producto > 0
+    ).order_by(Producto.fecha_publicacion.desc()).limit(limite)
+
+
+def _primario_si_reciente(db: Session, modificado_ns: int):
+    """
+    Inventario modificado hace menos que el retraso tolerado de las réplicas: la
+    recarga se lee del primario, si no la foto vieja quedaría en cache todo el TTL.
+    """
+    if time.time_ns() - modificado_ns < settings.DB_REPLICA_RETRASO_MAX_SEGUNDOS * 1e9 \
+            and hasattr(db, "usar_primario"):
+        db.usar_primario()
+
+
+class ContextoProductos:
+    """Filas mínimas (id, nombre, precio, unidad) y sus líneas ya formateadas para el prompt."""
+    __slots__ = ("filas", "lineas")
+
+    def __init__(self, filas: List[Tuple]):
+        self.filas = filas
+        self.lineas = [f"- {nombre}: ${precio}" for _, nombre, precio, _ in filas]
+
+
+class ProductContextCache:
+    """
+    Cache en memoria del contexto de productos del chatbot.
+    - Una entrada por vendedor (LRU acotado) y una foto global para consumidores
+    - Las rutas de inventario invalidan la entrada al crear/editar/eliminar
+    - El TTL acota cuánto puede durar un dato viejo (p. ej. stock tras pedidos
+      o cambios hechos desde otro worker)
+    """
+
+    def __init__(self, ttl_segundos: int = None, max_vendedores: int = None, max_global: int = None):
+        self.ttl_segundos = ttl_segundos or settings.CHAT_CONTEXTO_TTL_SEGUNDOS
+        self.max_vendedores = max_vendedores or settings.CHAT_CONTEXTO_MAX_VENDEDORES
+        self.max_global = max_global or settings.CHAT_CONTEXTO_GLOBAL_MAX
+        self._vendedores: "OrderedDict[int, Tuple[float, ContextoProductos]]" = OrderedDict()
+        self._global: Optional[Tuple[float, ContextoProductos]] = None
+        # Cada invalidación sube la generación; una carga que empezó antes no se guarda
+        self._generacion = 0
+        # Última invalidación (time_ns) de la foto global, para leerla del primario después
+        self._global_modificado_ns = 0
+        self._lock = threading.Lock()
+
+    def vendedor(self, db: Session, id_vendedor: int) -> ContextoProductos:
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._vendedores.get(id_vendedor)
+            if entrada and entrada[0] > ahora:
+                self._vendedores.move_to_end(id_vendedor)
+                return entrada[1]
+            generacion = self._generacion
+
+        _primario_si_reciente(db, versiones_inventario.obtener(id_vendedor))
+        filas = db.execute(consulta_contexto_vendedor(id_vendedor)).all()
+        contexto = ContextoProductos([tuple(f) for f in filas])
+
+        with self._lock:
+            if generacion == self._generacion:
+                self._vendedores[id_vendedor] = (ahora + self.ttl_segundos, contexto)
+                self._vendedores.move_to_end(id_vendedor)
+                while len(self._vendedores) > self.max_vendedores:
+                    self._vendedores.popitem(last=False)
+        return contexto
+
+    def global_(self, db: Session) -> ContextoProductos:
+        ahora = time.monotonic()
+        with self._lock:
+            if self._global and self._global[0] > ahora:
+                return self._global[1]
+            generacion = self._generacion
+            modificado_ns = self._global_modificado_ns
+
+        _primario_si_reciente(db, modificado_ns)
+        filas = db.execute(consulta_contexto_global(self.max_global)).all()
+        contexto = ContextoProductos([tuple(f) for f in filas])
+
+        with self._lock:
+            if generacion == self._generacion:
+                self._global = (ahora + self.ttl_segundos, contexto)
+        return contexto
+
+    def invalidar_vendedor(self, id_vendedor: int):
+        # Los productos del vendedor también forman parte de la foto global
+        with self._lock:
+            self._generacion += 1
+            self._vendedores.pop(id_vendedor, None)
+            self._global = None
+            self._global_modificado_ns = time.time_ns()
+
+    def invalidar_todo(self):
+        with self._lock:
+            self._generacion += 1
+            self._vendedores.clear()
+            self._global = None
+            self._global_modificado_ns = time.time_ns()
+
+
+# Instancia global compartida por el chatbot y las rutas de inventario
+contexto_productos = ProductContextCache()
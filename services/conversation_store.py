@@ -0,0 +1,372 @@
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from core.config import settings
+from utils.sqlite_local import ConexionesSQLite
+
+
+class ConversationStore(ABC):
+    """
+    Interfaz común para guardar el historial del chatbot por usuario.
+    Cada usuario tiene un buffer circular con sus últimos mensajes y un
+    resumen acumulado de los turnos que ya se compactaron.
+    """
+
+    @abstractmethod
+    def obtener(self, id_usuario, n: Optional[int] = None) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def obtener_con_ids(self, id_usuario) -> List[Tuple[int, Dict]]:
+        """Mensajes con su id (creciente por usuario), para compactar hasta uno concreto."""
+
+    @abstractmethod
+    def agregar(self, id_usuario, *mensajes: Dict):
+        ...
+
+    @abstractmethod
+    def obtener_resumen(self, id_usuario) -> str:
+        ...
+
+    @abstractmethod
+    def compactar(self, id_usuario, hasta_id: int, resumen_previo: str, resumen: str) -> bool:
+        """
+        Quita los mensajes con id <= hasta_id y guarda el resumen que los reemplaza.
+        Los que llegaron mientras se resumía se conservan. Si el resumen guardado ya
+        no es resumen_previo (otro worker compactó antes) no cambia nada y devuelve False.
+        """
+
+    @abstractmethod
+    def borrar(self, id_usuario):
+        ...
+
+    @abstractmethod
+    def estadisticas(self) -> Dict:
+        ...
+
+
+class _Conversacion:
+    __slots__ = ("mensajes", "ultimo_id", "resumen", "caracteres", "ultimo_acceso")
+
+    def __init__(self, max_mensajes: int):
+        self.mensajes = deque(maxlen=max_mensajes)  # (id, mensaje)
+        self.ultimo_id = 0
+        self.resumen = ""
+        self.caracteres = 0
+        self.ultimo_acceso = time.monotonic()
+
+
+class MemoryConversationStore(ConversationStore):
+    """
+    Historial en memoria del proceso.
+    - Buffer circular por usuario (max_mensajes)
+    - Tope global de caracteres con desalojo LRU del usuario menos reciente
+    - Expiración por inactividad (ttl_segundos)
+    """
+
+    def __init__(self, max_mensajes: int, max_caracteres: int, ttl_segundos: int):
+        self.max_mensajes = max_mensajes
+        self.max_caracteres = max_caracteres
+        self.ttl_segundos = ttl_segundos
+        self._conversaciones: "OrderedDict[object, _Conversacion]" = OrderedDict()
+        self._caracteres_totales = 0
+        self._desalojados = 0
+        self._expirados = 0
+        self._lock = threading.Lock()
+
+    def _purgar_expirados(self, ahora: float):
+        # El OrderedDict está en orden de acceso: los más antiguos van primero
+        limite = ahora - self.ttl_segundos
+        while self._conversaciones:
+            id_usuario, conv = next(iter(self._conversaciones.items()))
+            if conv.ultimo_acceso >= limite:
+                break
+            self._quitar(id_usuario)
+            self._expirados += 1
+
+    def _quitar(self, id_usuario):
+        conv = self._conversaciones.pop(id_usuario)
+        self._caracteres_totales -= conv.caracteres
+
+    def _tocar(self, id_usuario, ahora: float) -> Optional[_Conversacion]:
+        conv = self._conversaciones.get(id_usuario)
+        if conv is not None:
+            conv.ultimo_acceso = ahora
+            self._conversaciones.move_to_end(id_usuario)
+        return conv
+
+    def obtener(self, id_usuario, n: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            ahora = time.monotonic()
+            self._purgar_expirados(ahora)
+            conv = self._tocar(id_usuario, ahora)
+            if conv is None:
+                return []
+            mensajes = [m for _, m in conv.mensajes]
+        return mensajes[-n:] if n else mensajes
+
+    def obtener_con_ids(self, id_usuario) -> List[Tuple[int, Dict]]:
+        with self._lock:
+            conv = self._conversaciones.get(id_usuario)
+            return list(conv.mensajes) if conv is not None else []
+
+    def agregar(self, id_usuario, *mensajes: Dict):
+        with self._lock:
+            ahora = time.monotonic()
+            self._purgar_expirados(ahora)
+            conv = self._tocar(id_usuario, ahora)
+            if conv is None:
+                conv = _Conversacion(self.max_mensajes)
+                self._conversaciones[id_usuario] = conv
+
+            for mensaje in mensajes:
+                if len(conv.mensajes) == conv.mensajes.maxlen:
+                    # El buffer está lleno: el mensaje más antiguo sale
+                    saliente = len(conv.mensajes[0][1]["content"])
+                    conv.caracteres -= saliente
+                    self._caracteres_totales -= saliente
+                tamano = len(mensaje["content"])
+                conv.ultimo_id += 1
+                conv.mensajes.append((conv.ultimo_id, mensaje))
+                conv.caracteres += tamano
+                self._caracteres_totales += tamano
+
+            # Tope global: desalojar a los usuarios menos recientes (nunca al actual)
+            while self._caracteres_totales > self.max_caracteres and len(self._conversaciones) > 1:
+                self._quitar(next(iter(self._conversaciones)))
+                self._desalojados += 1
+
+    def obtener_resumen(self, id_usuario) -> str:
+        with self._lock:
+            conv = self._conversaciones.get(id_usuario)
+            return conv.resumen if conv is not None else ""
+
+    def compactar(self, id_usuario, hasta_id: int, resumen_previo: str, resumen: str) -> bool:
+        with self._lock:
+            conv = self._conversaciones.get(id_usuario)
+            if conv is None or conv.resumen != resumen_previo:
+                return False
+            antes = conv.caracteres
+            while conv.mensajes and conv.mensajes[0][0] <= hasta_id:
+                conv.caracteres -= len(conv.mensajes.popleft()[1]["content"])
+            conv.caracteres += len(resumen) - len(conv.resumen)
+            conv.resumen = resumen
+            self._caracteres_totales += conv.caracteres - antes
+            return True
+
+    def borrar(self, id_usuario):
+        with self._lock:
+            if id_usuario in self._conversaciones:
+                self._quitar(id_usuario)
+
+    def estadisticas(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "memoria",
+                "usuarios": len(self._conversaciones),
+                "caracteres": self._caracteres_totales,
+                "desalojados": self._desalojados,
+                "expirados": self._expirados,
+            }
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    Historial compartido entre workers de uvicorn usando un archivo SQLite en modo WAL.
+    Aplica los mismos límites que la versión en memoria.
+    """
+
+    # Las tareas de limpieza global no se ejecutan en cada mensaje
+    INTERVALO_LIMPIEZA = 30.0
+
+    def __init__(self, ruta: str, max_mensajes: int, max_caracteres: int, ttl_segundos: int):
+        self.ruta = ruta
+        self.max_mensajes = max_mensajes
+        self.max_caracteres = max_caracteres
+        self.ttl_segundos = ttl_segundos
+        self._conexiones = ConexionesSQLite(ruta)
+        self._ultima_limpieza = 0.0
+
+        conn = self._conexion()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chat_mensajes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id_usuario TEXT NOT NULL,
+                    rol TEXT NOT NULL,
+                    contenido TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_chat_mensajes_usuario ON chat_mensajes (id_usuario, id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chat_conversaciones (
+                    id_usuario TEXT PRIMARY KEY,
+                    ultimo_acceso REAL NOT NULL,
+                    resumen TEXT NOT NULL DEFAULT '',
+                    caracteres INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_chat_conversaciones_acceso ON chat_conversaciones (ultimo_acceso)")
+
+    def _conexion(self) -> sqlite3.Connection:
+        return self._conexiones.conexion()
+
+    def obtener(self, id_usuario, n: Optional[int] = None) -> List[Dict]:
+        conn = self._conexion()
+        clave = str(id_usuario)
+        limite = min(n, self.max_mensajes) if n else self.max_mensajes
+        filas = conn.execute(
+            """
+            SELECT m.rol, m.contenido FROM chat_mensajes m
+            JOIN chat_conversaciones c ON c.id_usuario = m.id_usuario
+            WHERE m.id_usuario = ? AND c.ultimo_acceso >= ?
+            ORDER BY m.id DESC LIMIT ?
+            """,
+            (clave, time.time() - self.ttl_segundos, limite),
+        ).fetchall()
+        if filas:
+            conn.execute("UPDATE chat_conversaciones SET ultimo_acceso = ? WHERE id_usuario = ?", (time.time(), clave))
+        return [{"role": rol, "content": contenido} for rol, contenido in reversed(filas)]
+
+    def obtener_con_ids(self, id_usuario) -> List[Tuple[int, Dict]]:
+        filas = self._conexion().execute(
+            "SELECT id, rol, contenido FROM chat_mensajes WHERE id_usuario = ? ORDER BY id",
+            (str(id_usuario),),
+        ).fetchall()
+        return [(id_mensaje, {"role": rol, "content": contenido}) for id_mensaje, rol, contenido in filas]
+
+    def agregar(self, id_usuario, *mensajes: Dict):
+        conn = self._conexion()
+        clave = str(id_usuario)
+        ahora = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Si la conversación expiró, se empieza de cero
+            expirada = conn.execute(
+                "SELECT 1 FROM chat_conversaciones WHERE id_usuario = ? AND ultimo_acceso < ?",
+                (clave, ahora - self.ttl_segundos),
+            ).fetchone()
+            if expirada:
+                conn.execute("DELETE FROM chat_mensajes WHERE id_usuario = ?", (clave,))
+                conn.execute("UPDATE chat_conversaciones SET resumen = '' WHERE id_usuario = ?", (clave,))
+            conn.executemany(
+                "INSERT INTO chat_mensajes (id_usuario, rol, contenido) VALUES (?, ?, ?)",
+                [(clave, m["role"], m["content"]) for m in mensajes],
+            )
+            # Buffer circular: conservar solo los últimos max_mensajes
+            conn.execute(
+                """
+                DELETE FROM chat_mensajes WHERE id_usuario = ? AND id <= (
+                    SELECT id FROM chat_mensajes WHERE id_usuario = ?
+                    ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+                """,
+                (clave, clave, self.max_mensajes),
+            )
+            conn.execute(
+                "INSERT INTO chat_conversaciones (id_usuario, ultimo_acceso) VALUES (?, ?) "
+                "ON CONFLICT(id_usuario) DO UPDATE SET ultimo_acceso = excluded.ultimo_acceso",
+                (clave, ahora),
+            )
+            self._recalcular_caracteres(conn, clave)
+            if ahora - self._ultima_limpieza > self.INTERVALO_LIMPIEZA:
+                self._limpiar(conn, ahora, clave)
+                self._ultima_limpieza = ahora
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _recalcular_caracteres(conn: sqlite3.Connection, clave: str):
+        conn.execute(
+            """
+            UPDATE chat_conversaciones SET caracteres = LENGTH(resumen) + (
+                SELECT COALESCE(SUM(LENGTH(contenido)), 0) FROM chat_mensajes WHERE id_usuario = ?
+            ) WHERE id_usuario = ?
+            """,
+            (clave, clave),
+        )
+
+    def _limpiar(self, conn: sqlite3.Connection, ahora: float, clave_actual: str):
+        """Expira conversaciones inactivas y aplica el tope global por LRU."""
+        conn.execute(
+            "DELETE FROM chat_mensajes WHERE id_usuario IN "
+            "(SELECT id_usuario FROM chat_conversaciones WHERE ultimo_acceso < ?)",
+            (ahora - self.ttl_segundos,),
+        )
+        conn.execute("DELETE FROM chat_conversaciones WHERE ultimo_acceso < ?", (ahora - self.ttl_segundos,))
+
+        total = conn.execute("SELECT COALESCE(SUM(caracteres), 0) FROM chat_conversaciones").fetchone()[0]
+        if total <= self.max_caracteres:
+            return
+        victimas = []
+        for id_usuario, caracteres in conn.execute(
+            "SELECT id_usuario, caracteres FROM chat_conversaciones WHERE id_usuario != ? ORDER BY ultimo_acceso",
+            (clave_actual,),
+        ):
+            if total <= self.max_caracteres:
+                break
+            victimas.append((id_usuario,))
+            total -= caracteres
+        conn.executemany("DELETE FROM chat_mensajes WHERE id_usuario = ?", victimas)
+        conn.executemany("DELETE FROM chat_conversaciones WHERE id_usuario = ?", victimas)
+
+    def obtener_resumen(self, id_usuario) -> str:
+        fila = self._conexion().execute(
+            "SELECT resumen FROM chat_conversaciones WHERE id_usuario = ? AND ultimo_acceso >= ?",
+            (str(id_usuario), time.time() - self.ttl_segundos),
+        ).fetchone()
+        return fila[0] if fila else ""
+
+    def compactar(self, id_usuario, hasta_id: int, resumen_previo: str, resumen: str) -> bool:
+        conn = self._conexion()
+        clave = str(id_usuario)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # El resumen hace de cerrojo optimista entre workers: solo gana el primero
+            cambiado = conn.execute(
+                "UPDATE chat_conversaciones SET resumen = ? WHERE id_usuario = ? AND resumen = ?",
+                (resumen, clave, resumen_previo),
+            ).rowcount
+            if cambiado:
+                conn.execute("DELETE FROM chat_mensajes WHERE id_usuario = ? AND id <= ?", (clave, hasta_id))
+                self._recalcular_caracteres(conn, clave)
+            conn.execute("COMMIT")
+            return bool(cambiado)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def borrar(self, id_usuario):
+        conn = self._conexion()
+        clave = str(id_usuario)
+        with conn:
+            conn.execute("DELETE FROM chat_mensajes WHERE id_usuario = ?", (clave,))
+            conn.execute("DELETE FROM chat_conversaciones WHERE id_usuario = ?", (clave,))
+
+    def estadisticas(self) -> Dict:
+        usuarios, caracteres = self._conexion().execute(
+            "SELECT COUNT(*), COALESCE(SUM(caracteres), 0) FROM chat_conversaciones"
+        ).fetchone()
+        return {"backend": "sqlite", "usuarios": usuarios, "caracteres": caracteres}
+
+
+def crear_conversation_store() -> ConversationStore:
+    """Crea el almacén de historial según CHAT_HISTORY_BACKEND."""
+    if settings.CHAT_HISTORY_BACKEND == "sqlite":
+        return SQLiteConversationStore(
+            settings.CHAT_HISTORY_SQLITE_PATH,
+            settings.CHAT_HISTORY_MAX_MENSAJES,
+            settings.CHAT_HISTORY_MAX_CARACTERES,
+            settings.CHAT_HISTORY_TTL_SEGUNDOS,
+        )
+    return MemoryConversationStore(
+        settings.CHAT_HISTORY_MAX_MENSAJES,
+        settings.CHAT_HISTORY_MAX_CARACTERES,
+        settings.CHAT_HISTORY_TTL_SEGUNDOS,
+    )
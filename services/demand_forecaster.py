@@ -0,0 +1,135 @@
+import datetime
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from models.db_models import Producto, PronosticoDemanda, VentaDiaria
+from models.ml_models.forecast_model import METODOS, ForecastModel
+from services.demand_predictor import DemandPredictor
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 5000
+
+
+def _a_fecha(valor) -> datetime.date:
+    # Normaliza fechas que el driver pueda devolver como texto 'YYYY-MM-DD' o datetime
+    if isinstance(valor, str):
+        return datetime.date.fromisoformat(valor[:10])
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    return valor
+
+
+class DemandForecaster:
+    """
+    Proceso por lotes (nocturno) que pronostica la demanda de todos los productos
+    y guarda el resultado en 'pronosticos_demanda' para que la API solo consulte.
+    """
+
+    def __init__(self, db: Session, dias_historia: int = 180, horizonte: int = 30):
+        self.db = db
+        self.dias_historia = dias_historia
+        self.modelo = ForecastModel(horizonte=horizonte)
+
+    def cargar_matriz(self, hoy: Optional[datetime.date] = None):
+        """
+        Devuelve (ids_producto, matriz productos x días) con las unidades vendidas por día.
+        El último día de la matriz es ayer: el día en curso aún está incompleto.
+        """
+        hoy = hoy or datetime.date.today()
+        inicio = hoy - datetime.timedelta(days=self.dias_historia)
+
+        ids = np.array([i for (i,) in self.db.query(Producto.id_producto).order_by(Producto.id_producto)], dtype=np.int64)
+        matriz = np.zeros((len(ids), self.dias_historia), dtype=np.float32)
+        if len(ids) == 0:
+            return ids, matriz
+
+        # El agregado diario ya trae una fila por (producto, día)
+        filas = self.db.query(
+            VentaDiaria.id_producto, VentaDiaria.fecha, VentaDiaria.cantidad
+        ).filter(VentaDiaria.fecha >= inicio, VentaDiaria.fecha < hoy).all()
+        if not filas:
+            return ids, matriz
+
+        productos = np.fromiter((f[0] for f in filas), dtype=np.int64, count=len(filas))
+        columnas = np.fromiter(((_a_fecha(f[1]) - inicio).days for f in filas), dtype=np.int64, count=len(filas))
+        cantidades = np.fromiter((f[2] or 0 for f in filas), dtype=np.float32, count=len(filas))
+
+        # ids está ordenado: searchsorted traduce id_producto -> fila sin diccionarios
+        posiciones = np.searchsorted(ids, productos)
+        validas = (posiciones < len(ids)) & (ids[np.minimum(posiciones, len(ids) - 1)] == productos)
+        np.add.at(matriz, (posiciones[validas], columnas[validas]), cantidades[validas])
+        return ids, matriz
+
+    def ejecutar(self) -> Dict:
+        """Carga, ajusta y guarda los pronósticos de todos los productos."""
+        t0 = time.perf_counter()
+        ids, matriz = self.cargar_matriz()
+        t1 = time.perf_counter()
+        pronostico, metodo, mae = self.modelo.ajustar(matriz)
+        t2 = time.perf_counter()
+
+        demanda_7d = pronostico[:, :7].sum(axis=1)
+        demanda_30d = pronostico[:, :30].sum(axis=1)
+        factor = DemandPredictor(self.db).get_seasonal_boost()
+        ahora = datetime.datetime.now()
+
+        filas = [
+            {
+                "id_producto": int(ids[i]),
+                "fecha_calculo": ahora,
+                "metodo": METODOS[metodo[i]],
+                "demanda_7d": round(float(demanda_7d[i]), 2),
+                "demanda_30d": round(float(demanda_30d[i]), 2),
+                "error_mae": None if np.isnan(mae[i]) else round(float(mae[i]), 3),
+                "nivel": DemandPredictor._clasificar(float(demanda_30d[i]) * factor)["nivel"],
+            }
+            for i in range(len(ids))
+        ]
+
+        # Reemplazo completo en una sola transacción, insertando por lotes
+        try:
+            self.db.execute(delete(PronosticoDemanda))
+            for i in range(0, len(filas), TAMANO_LOTE):
+                self.db.execute(insert(PronosticoDemanda), filas[i:i + TAMANO_LOTE])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        t3 = time.perf_counter()
+
+        resumen = {
+            "productos": len(ids),
+            "dias": matriz.shape[1],
+            "segundos_carga": round(t1 - t0, 3),
+            "segundos_ajuste": round(t2 - t1, 3),
+            "segundos_guardado": round(t3 - t2, 3),
+            "metodos": {m: int((metodo == i).sum()) for i, m in enumerate(METODOS)},
+        }
+        logger.info(f"Pronóstico de demanda actualizado: {resumen}")
+        return resumen
+
+
+def obtener_pronosticos(db: Session, id_vendedor: Optional[int] = None,
+                        ids_producto: Optional[List[int]] = None) -> List[Dict]:
+    """Lectura de los pronósticos ya calculados (sin cálculo en la petición)."""
+    consulta = db.query(
+        PronosticoDemanda.id_producto,
+        Producto.nombre_producto,
+        PronosticoDemanda.demanda_7d,
+        PronosticoDemanda.demanda_30d,
+        PronosticoDemanda.nivel,
+        PronosticoDemanda.metodo,
+        PronosticoDemanda.error_mae,
+        PronosticoDemanda.fecha_calculo
+    ).join(Producto, Producto.id_producto == PronosticoDemanda.id_producto)
+    if id_vendedor is not None:
+        consulta = consulta.filter(Producto.id_vendedor == id_vendedor)
+    if ids_producto:
+        consulta = consulta.filter(PronosticoDemanda.id_producto.in_(ids_producto))
+    return [dict(fila._mapping) for fila in consulta.order_by(PronosticoDemanda.id_producto).all()]
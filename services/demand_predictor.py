@@ -1,32 +1,104 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from models.db_models import DetallesPedido, Producto, Pedido
+from sqlalchemy import func, select
+from models.db_models import Producto, VentaDiaria
+from typing import Dict, List, Optional
 import datetime
 
+# Umbrales de clasificación (RF-07), en unidades vendidas en 30 días
+UMBRAL_ALTA = 50
+UMBRAL_MEDIA = 20
+DIAS_VENTANA = 30
+
+
+def consulta_ventas_producto(id_producto: int, desde: datetime.date):
+    return select(func.sum(VentaDiaria.cantidad))\
+        .where(VentaDiaria.id_producto == id_producto, VentaDiaria.fecha >= desde)
+
+
+def consulta_ventas_por_producto(desde: datetime.date, id_vendedor: Optional[int] = None,
+                                 ids_producto: Optional[List[int]] = None):
+    """
+    Ventas desde 'desde' agrupadas por producto, leídas del agregado diario
+    (como mucho una fila por día y producto, sin recorrer las líneas de pedido).
+    scripts/check_query_plans.py revisa el plan de esta consulta y la anterior.
+    """
+    ventas = select(
+        VentaDiaria.id_producto.label("id_producto"),
+        func.sum(VentaDiaria.cantidad).label("total_vendido")
+    ).where(VentaDiaria.fecha >= desde)
+    if id_vendedor is not None:
+        ventas = ventas.where(VentaDiaria.id_vendedor == id_vendedor)
+    if ids_producto:
+        ventas = ventas.where(VentaDiaria.id_producto.in_(ids_producto))
+    return ventas.group_by(VentaDiaria.id_producto)
+
 class DemandPredictor:
     def __init__(self, db: Session):
         self.db = db
 
+    @staticmethod
+    def _clasificar(total_vendido: float) -> Dict[str, str]:
+        if total_vendido > UMBRAL_ALTA:
+            return {"nivel": "ALTA", "mensaje": "Se recomienda aumentar el stock para evitar quiebres."}
+        elif total_vendido > UMBRAL_MEDIA:
+            return {"nivel": "MEDIA", "mensaje": "La demanda es estable. Mantén tu stock actual."}
+        else:
+            return {"nivel": "BAJA", "mensaje": "Considera una promoción para rotar este producto."}
+
+    @staticmethod
+    def _estimar(total_vendido: float, factor: float) -> float:
+        # Ventas de 30 días ajustadas por temporada: lo que se clasifica en ambos caminos
+        return round(float(total_vendido) * factor, 2)
+
     def predict_demand(self, id_producto: int):
         """
         Analiza las ventas de los últimos 30 días para predecir la demanda futura.
         """
-        hace_un_mes = datetime.datetime.now() - datetime.timedelta(days=30)
+        hace_un_mes = datetime.date.today() - datetime.timedelta(days=DIAS_VENTANA)
         
-        # Sumar cantidades vendidas del producto en el último mes
-        total_vendido = self.db.query(func.sum(DetallesPedido.cantidad))\
-            .join(Pedido)\
-            .filter(DetallesPedido.id_producto == id_producto)\
-            .filter(Pedido.fecha_pedido >= hace_un_mes)\
-            .scalar() or 0
-
-        # Lógica de clasificación (RF-07)
-        if total_vendido > 50:
-            return {"nivel": "ALTA", "mensaje": "Se recomienda aumentar el stock para evitar quiebres."}
-        elif total_vendido > 20:
-            return {"nivel": "MEDIA", "mensaje": "La demanda es estable. Mantén tu stock actual."}
-        else:
-            return {"nivel": "BAJA", "mensaje": "Considera una promoción para rotar este producto."}
+        # Sumar cantidades vendidas del producto en el último mes (agregado diario)
+        total_vendido = self.db.execute(consulta_ventas_producto(id_producto, hace_un_mes)).scalar() or 0
+
+        # Lógica de clasificación (RF-07), sobre la misma estimación que predict_demand_bulk
+        return self._clasificar(self._estimar(total_vendido, self.get_seasonal_boost()))
+
+    def predict_demand_bulk(self, id_vendedor: Optional[int] = None,
+                            ids_producto: Optional[List[int]] = None) -> List[Dict]:
+        """
+        Predice la demanda de todos los productos de un vendedor (o de una lista de ids)
+        con una sola consulta GROUP BY id_producto, en lugar de una consulta por producto.
+        """
+        if id_vendedor is None and not ids_producto:
+            return []
+
+        hace_un_mes = datetime.date.today() - datetime.timedelta(days=DIAS_VENTANA)
+        ventas = consulta_ventas_por_producto(hace_un_mes, id_vendedor, ids_producto).subquery()
+
+        # LEFT JOIN para incluir también los productos sin ventas
+        consulta = self.db.query(
+            Producto.id_producto,
+            Producto.nombre_producto,
+            Producto.stock_producto,
+            func.coalesce(ventas.c.total_vendido, 0)
+        ).outerjoin(ventas, ventas.c.id_producto == Producto.id_producto)
+        if id_vendedor is not None:
+            consulta = consulta.filter(Producto.id_vendedor == id_vendedor)
+        if ids_producto:
+            consulta = consulta.filter(Producto.id_producto.in_(ids_producto))
+
+        factor = self.get_seasonal_boost()
+        resultado = []
+        for id_producto, nombre, stock, total_vendido in consulta.order_by(Producto.id_producto).all():
+            demanda_estimada = self._estimar(total_vendido, factor)
+            resultado.append({
+                "id_producto": id_producto,
+                "nombre_producto": nombre,
+                "stock_producto": stock,
+                "total_vendido_30d": int(total_vendido),
+                "demanda_estimada": demanda_estimada,
+                **self._clasificar(demanda_estimada)
+            })
+        return resultado
 
     def get_seasonal_boost(self):
         """
@@ -36,4 +108,4 @@ class DemandPredictor:
         # Ejemplo: Navidad o Feriados locales detectados por fecha
         if hoy.month == 12:
             return 1.5 # Incremento del 50% en la demanda estimada
-        return 1.0
\ No newline at end of file
+        return 1.0
@@ -1,5 +1,48 @@
+from typing import List
+
+from models.ml_models.registry import registro_modelos
+
+
+def cargar_modelo_intents():
+    """
+    Artefacto entrenado por scripts/train_intent_model.py, servido por el registro
+    de modelos (carga única y recarga en caliente). Devuelve None si no existe:
+    el detector usa entonces solo palabras clave.
+    """
+    return registro_modelos.obtener("intents")
+
+
 class IntentDetector:
+    def __init__(self, modelo=None):
+        self.modelo = modelo if modelo is not None else cargar_modelo_intents()
+
     def detect(self, message: str):
+        return self.detect_many([message])[0]
+
+    def detect_many(self, messages: List[str]) -> List[str]:
+        """
+        Clasifica un lote de mensajes en una sola llamada al modelo.
+        Si la confianza no llega al umbral calibrado se usan las palabras clave.
+        """
+        if not messages:
+            return []
+        if self.modelo is None:
+            return [self.detect_keywords(m) for m in messages]
+
+        probabilidades = self.modelo["pipeline"].predict_proba(messages)
+        etiquetas = self.modelo["pipeline"].classes_
+        umbral = self.modelo["umbral"]
+        resultado = []
+        for mensaje, fila in zip(messages, probabilidades):
+            mejor = fila.argmax()
+            if fila[mejor] >= umbral:
+                resultado.append(str(etiquetas[mejor]))
+            else:
+                resultado.append(self.detect_keywords(mensaje))
+        return resultado
+
+    @staticmethod
+    def detect_keywords(message: str):
         msg = message.lower()
         if any(w in msg for w in ["precio", "sugerencia", "vender"]):
             return "ANALISIS_PRECIO"
@@ -7,4 +50,4 @@ class IntentDetector:
             return "PREDICCION_DEMANDA"
         if any(w in msg for w in ["comprar", "buscar", "recomienda"]):
             return "RECOMENDACION_COMPRA"
-        return "CHAT_GENERAL"
\ No newline at end of file
+        return "CHAT_GENERAL"
@@ -0,0 +1,170 @@
+import logging
+import os
+import re
+from typing import List, Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.metrics import registro_metricas
+
+from services.demand_predictor import DemandPredictor
+from services.intent_detector import IntentDetector
+from services.price_recommender import normalizar, recomendar_precio_async
+from utils.helpers import format_currency
+from utils.text_normalizer import extraer_palabras_clave
+
+logger = logging.getLogger(__name__)
+
+# Palabras propias de la pregunta que no forman parte del nombre del producto
+PALABRAS_INTENCION = {
+    "precio", "precios", "sugerencia", "sugerencias", "sugieres", "vender", "vendo", "vendes", "vende",
+    "cobrar", "cobro", "cuesta", "cuanto", "deberia", "demanda", "ventas", "vendido", "vendiendo",
+    "comprar", "compro", "buscar", "busco", "recomienda", "recomiendas", "recomiendame",
+    "que", "como", "cual", "mis", "mes", "semana", "esta", "este", "por", "del", "producto", "productos",
+}
+UNIDADES = r"(kilogramos?|kilos?|kg|gramos?|g|libras?|lb|litros?|l|mililitros?|ml|unidad(?:es)?|docenas?|media docena|paquetes?|cajas?|bolsas?)"
+PATRON_UNIDAD = re.compile(r"(?:por|el|la|x|/)\s*" + UNIDADES + r"\b")
+PATRON_PRECIO = re.compile(r"\$\s*(\d+(?:[.,]\d{1,2})?)|(\d+(?:[.,]\d{1,2})?)\s*(?:dolares|usd|\$)")
+
+# Cuánto tráfico evita el LLM: destino = intent resuelto sin IA, o "LLM".
+# Son de este worker (también en /metrics, donde Prometheus suma los workers)
+enrutamiento_chat = registro_metricas.contador(
+    "mercadolocal_chat_enrutamiento_total", "Mensajes del chat por destino", ("destino",)
+)
+
+
+def _raiz(palabra: str) -> str:
+    # Plural simple: "tomates" -> "tomat", "quesos" -> "queso", para comparar con el nombre en singular
+    if len(palabra) > 4 and palabra.endswith("es"):
+        return palabra[:-2]
+    if len(palabra) > 3 and palabra.endswith("s"):
+        return palabra[:-1]
+    return palabra
+
+
+def _palabras_producto(mensaje: str) -> List[str]:
+    palabras = [normalizar(p) for p in extraer_palabras_clave(mensaje)]
+    return [
+        _raiz(p) for p in palabras
+        if p not in PALABRAS_INTENCION and not PATRON_UNIDAD.fullmatch(f"por {p}")
+    ]
+
+
+def _extraer_unidad(mensaje: str) -> Optional[str]:
+    encontrado = PATRON_UNIDAD.search(normalizar(mensaje))
+    return encontrado.group(1) if encontrado else None
+
+
+def _extraer_precio(mensaje: str) -> float:
+    encontrado = PATRON_PRECIO.search(normalizar(mensaje))
+    if not encontrado:
+        return 0.0
+    return float((encontrado.group(1) or encontrado.group(2)).replace(",", "."))
+
+
+def _buscar_producto(palabras: List[str], productos: Sequence):
+    """Devuelve el producto (id, nombre, precio, unidad) cuyo nombre comparte más palabras con la pregunta."""
+    mejor, mejor_puntaje = None, 0
+    for producto in productos:
+        nombre = normalizar(producto[1] or "")
+        puntaje = sum(1 for p in palabras if p in nombre)
+        if puntaje > mejor_puntaje:
+            mejor, mejor_puntaje = producto, puntaje
+    return mejor
+
+
+class IntentRouter:
+    """
+    Responde con servicios deterministas (precios, demanda, búsqueda) las
+    preguntas estructuradas. Devuelve None cuando el mensaje debe ir al LLM.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.detector = IntentDetector()
+
+    async def resolver(self, message: str, rol: str, productos: Sequence) -> Optional[str]:
+        """
+        productos: filas (id_producto, nombre_producto, precio_producto, unidad) del contexto del chat.
+        """
+        intent = self.detector.detect(message or "")
+        respuesta = None
+        try:
+            if intent == "ANALISIS_PRECIO":
+                respuesta = await self._responder_precio(message, productos)
+            elif intent == "PREDICCION_DEMANDA" and rol == "VENDEDOR":
+                respuesta = await self._responder_demanda(message, productos)
+            elif intent == "RECOMENDACION_COMPRA":
+                respuesta = self._responder_compra(message, productos)
+        except Exception as e:
+            logger.error(f"Error en el enrutamiento de {intent}, se usa el LLM: {str(e)}")
+            respuesta = None
+
+        enrutamiento_chat.etiquetar(intent if respuesta is not None else "LLM").inc()
+        return respuesta
+
+    async def _responder_precio(self, message: str, productos: Sequence) -> Optional[str]:
+        # Sin un producto del catálogo y un precio que comparar la pregunta es
+        # abierta ("¿qué me sugieres vender?"): la responde el LLM
+        producto = _buscar_producto(_palabras_producto(message), productos)
+        if producto is None:
+            return None
+        nombre = producto[1]
+        precio = _extraer_precio(message) or producto[2]
+        if not precio or precio <= 0:
+            return None
+        unidad = _extraer_unidad(message) or producto[3] or "unidad"
+
+        # Sobre la sesión async de la petición: no bloquea el event loop ni ocupa un hilo
+        resultado = await recomendar_precio_async(self.db, nombre, float(precio), unidad)
+        if "error" in resultado or not resultado.get("similar_found"):
+            return None
+
+        texto = (
+            f"Para {nombre}, el precio de referencia del mercado es "
+            f"{format_currency(resultado['recomendado'])} por {resultado['unidad_analizada']} "
+            f"({resultado['metodo_calculo']} de {resultado['total_productos']} productos similares)."
+        )
+        comparable = resultado["estado"] != "sin_referencia" and not resultado.get("unidad_inapropiada")
+        if comparable:
+            texto += (
+                f" Tu precio de {format_currency(resultado['precio_ingresado'])} está: "
+                f"{resultado['mensaje_estado'].lower()} ({resultado['diferencia_porcentaje']:+.1f}%)."
+            )
+        if resultado.get("consejo"):
+            texto += f" {resultado['consejo']}"
+        return texto
+
+    async def _responder_demanda(self, message: str, productos: Sequence) -> Optional[str]:
+        producto = _buscar_producto(_palabras_producto(message), productos)
+        if producto is None:
+            return None
+        prediccion = await self.db.run_sync(lambda sesion: DemandPredictor(sesion).predict_demand(producto[0]))
+        return f"La demanda de {producto[1]} es {prediccion['nivel']}. {prediccion['mensaje']}"
+
+    def _responder_compra(self, message: str, productos: Sequence) -> Optional[str]:
+        palabras = _palabras_producto(message)
+        if not palabras:
+            return None
+        coincidencias = [p for p in productos if any(w in normalizar(p[1] or "") for w in palabras)]
+        if not coincidencias:
+            return None
+        lineas = "\n".join(
+            f"- {p[1]}: {format_currency(p[2] or 0)}" + (f" / {p[3]}" if p[3] else "")
+            for p in sorted(coincidencias, key=lambda p: p[2] or 0)[:5]
+        )
+        return f"Te recomiendo estos productos disponibles:\n{lineas}"
+
+
+def resumen_enrutamiento() -> dict:
+    """Contadores de este worker (pid); el total de todos los workers está en /metrics."""
+    por_intent = {destino: int(hijo.valor) for (destino,), hijo in enrutamiento_chat.hijos().items()}
+    total = sum(por_intent.values())
+    sin_llm = total - por_intent.get("LLM", 0)
+    return {
+        "pid": os.getpid(),
+        "total": total,
+        "sin_llm": sin_llm,
+        "porcentaje_sin_llm": round(sin_llm / total * 100, 1) if total else 0.0,
+        "por_intent": por_intent,
+    }
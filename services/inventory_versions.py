@@ -0,0 +1,108 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable
+
+from core.config import settings
+from utils.sqlite_local import ConexionesSQLite
+
+
+class InventoryVersionStore(ABC):
+    """
+    Versión del inventario de cada vendedor. Las rutas que modifican productos
+    (o su stock) la incrementan; el listado la usa como ETag y responde 304
+    sin consultar la base de datos si el cliente ya tiene esa versión.
+    """
+
+    @abstractmethod
+    def obtener(self, id_vendedor: int) -> int:
+        ...
+
+    @abstractmethod
+    def incrementar(self, ids_vendedor: Iterable[int]):
+        ...
+
+    def etag(self, id_vendedor: int, variante: str = "") -> str:
+        """
+        ETag débil: versión del vendedor + parámetros de la consulta (página,
+        campos). Incluye además una ventana de tiempo para que los cambios hechos
+        fuera de esta API (p. ej. desde el backend Java) se vean como mucho
+        tras INVENTARIO_ETAG_TTL_SEGUNDOS.
+        """
+        ventana = int(time.time() // settings.INVENTARIO_ETAG_TTL_SEGUNDOS)
+        huella = hashlib.sha1(f"{self.obtener(id_vendedor)}|{ventana}|{variante}".encode()).hexdigest()[:20]
+        return f'W/"{id_vendedor}-{huella}"'
+
+
+class MemoryVersionStore(InventoryVersionStore):
+    """Versiones por proceso (un solo worker)."""
+
+    def __init__(self):
+        # Versión base distinta en cada arranque: invalida los ETag de un proceso anterior
+        self._base = time.time_ns()
+        self._versiones: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, id_vendedor: int) -> int:
+        return self._versiones.get(id_vendedor, self._base)
+
+    def incrementar(self, ids_vendedor: Iterable[int]):
+        ahora = time.time_ns()
+        with self._lock:
+            for id_vendedor in ids_vendedor:
+                if id_vendedor is not None:
+                    self._versiones[id_vendedor] = max(ahora, self._versiones.get(id_vendedor, self._base) + 1)
+
+
+class SQLiteVersionStore(InventoryVersionStore):
+    """Versiones compartidas entre workers de uvicorn en un archivo SQLite (WAL)."""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._conexiones = ConexionesSQLite(ruta)
+
+        conn = self._conexion()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS inventario_versiones (
+                    id_vendedor INTEGER PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )
+            """)
+        # Vendedores sin cambios registrados usan la versión en que se creó el archivo
+        self._base = os.stat(ruta).st_ctime_ns
+
+    def _conexion(self) -> sqlite3.Connection:
+        return self._conexiones.conexion()
+
+    def obtener(self, id_vendedor: int) -> int:
+        fila = self._conexion().execute(
+            "SELECT version FROM inventario_versiones WHERE id_vendedor = ?", (id_vendedor,)
+        ).fetchone()
+        return fila[0] if fila else self._base
+
+    def incrementar(self, ids_vendedor: Iterable[int]):
+        ahora = time.time_ns()
+        filas = [(id_vendedor, ahora) for id_vendedor in set(ids_vendedor) if id_vendedor is not None]
+        if not filas:
+            return
+        conn = self._conexion()
+        with conn:
+            conn.executemany("""
+                INSERT INTO inventario_versiones (id_vendedor, version) VALUES (?, ?)
+                ON CONFLICT(id_vendedor) DO UPDATE SET version = MAX(excluded.version, version + 1)
+            """, filas)
+
+
+def crear_version_store() -> InventoryVersionStore:
+    """Crea el almacén de versiones según INVENTARIO_VERSIONES_BACKEND."""
+    if settings.INVENTARIO_VERSIONES_BACKEND == "sqlite":
+        return SQLiteVersionStore(settings.INVENTARIO_VERSIONES_SQLITE_PATH)
+    return MemoryVersionStore()
+
+
+# Instancia global compartida por las rutas de inventario y pedidos
+versiones_inventario = crear_version_store()
@@ -1,20 +1,67 @@
 import httpx
 import logging
 import asyncio
+import time
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from core.config import settings
+from core.metrics import registro_metricas
 
 # Configuración de logging para monitorear el comportamiento de la IA
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Métricas de las llamadas a Ollama (GET /metrics)
+ollama_duracion = registro_metricas.histograma(
+    "mercadolocal_ollama_duracion_segundos", "Duración de las llamadas a Ollama", ("operacion",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+)
+ollama_errores = registro_metricas.contador(
+    "mercadolocal_ollama_errores_total", "Llamadas a Ollama fallidas", ("operacion", "tipo")
+)
+ollama_tokens = registro_metricas.contador(
+    "mercadolocal_ollama_tokens_total", "Tokens procesados por Ollama (prompt o generados)", ("operacion", "fase")
+)
+ollama_tokens_por_segundo = registro_metricas.histograma(
+    "mercadolocal_ollama_tokens_por_segundo", "Velocidad de generación (eval_count / eval_duration)", ("operacion",),
+    buckets=(1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 150, 200)
+)
+
+
+def _registrar_tokens(operacion: str, data: Dict):
+    # Ollama informa los conteos y las duraciones (en nanosegundos) en la respuesta final
+    if data.get("prompt_eval_count"):
+        ollama_tokens.etiquetar(operacion, "prompt").inc(data["prompt_eval_count"])
+    if data.get("eval_count"):
+        ollama_tokens.etiquetar(operacion, "generados").inc(data["eval_count"])
+        if data.get("eval_duration"):
+            ollama_tokens_por_segundo.etiquetar(operacion).observar(data["eval_count"] / (data["eval_duration"] / 1e9))
+
 class OllamaService:
     def __init__(self):
         self.base_url = settings.OLLAMA_BASE_URL
         self.model = settings.OLLAMA_MODEL
         self.timeout = httpx.Timeout(60.0, connect=10.0) # Tiempo de espera extendido para modelos pesados
 
+    async def _post(self, url: str, payload: Dict[str, Any], operacion: str) -> Dict[str, Any]:
+        """
+        POST a Ollama registrando duración, tokens/s y errores por operación.
+        Propaga los errores (HTTP incluidos) para que el llamador decida.
+        """
+        inicio = time.perf_counter()
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.post(url, json=payload)
+                response.raise_for_status()
+                data = response.json()
+        except Exception as e:
+            ollama_errores.etiquetar(operacion, type(e).__name__).inc()
+            raise
+        finally:
+            ollama_duracion.etiquetar(operacion).observar(time.perf_counter() - inicio)
+        _registrar_tokens(operacion, data)
+        return data
+
     def _get_system_prompt(self, context: str) -> str:
         """
         Genera el prompt de sistema dinámico con fecha y personalidad.
@@ -50,29 +97,67 @@ class OllamaService:
             }
         }
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                logger.info(f"Enviando solicitud a Ollama ({self.model})...")
-                response = await client.post(url, json=payload)
-                
-                # Verificación de errores HTTP (404, 500, etc.)
-                response.raise_for_status()
-                
-                data = response.json()
-                logger.info("Respuesta recibida exitosamente de la IA.")
-                return data.get("response", "No se obtuvo una respuesta válida del modelo.")
-
-            except httpx.ConnectError:
-                logger.error("Error: No se pudo conectar con el servidor de Ollama. ¿Está encendido?")
-                return "Error técnico: El motor de IA no está disponible en este momento."
-            
-            except httpx.ReadTimeout:
-                logger.error("Error: La IA tardó demasiado en responder (Timeout).")
-                return "La IA está procesando demasiada información, por favor intenta de nuevo en un momento."
-            
-            except Exception as e:
-                logger.error(f"Error inesperado en OllamaService: {str(e)}")
-                return f"Lo siento, ocurrió un error interno al procesar tu consulta."
+        try:
+            logger.info(f"Enviando solicitud a Ollama ({self.model})...")
+            # Incluye la verificación de errores HTTP (404, 500, etc.)
+            data = await self._post(url, payload, "generate")
+            logger.info("Respuesta recibida exitosamente de la IA.")
+            return data.get("response", "No se obtuvo una respuesta válida del modelo.")
+
+        except httpx.ConnectError:
+            logger.error("Error: No se pudo conectar con el servidor de Ollama. ¿Está encendido?")
+            return "Error técnico: El motor de IA no está disponible en este momento."
+        
+        except httpx.ReadTimeout:
+            logger.error("Error: La IA tardó demasiado en responder (Timeout).")
+            return "La IA está procesando demasiada información, por favor intenta de nuevo en un momento."
+        
+        except Exception as e:
+            logger.error(f"Error inesperado en OllamaService: {str(e)}")
+            return f"Lo siento, ocurrió un error interno al procesar tu consulta."
+
+    async def chat_completion(self, messages: List[Dict[str, str]], num_predict: int = 500, temperature: float = 0.7) -> str:
+        """
+        Llama a /api/chat con una lista de mensajes (system/user/assistant).
+        A diferencia de generate_response, propaga los errores para que el llamador decida.
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": False,
+            "options": {"temperature": temperature, "num_predict": num_predict}
+        }
+        data = await self._post(f"{self.base_url}/api/chat", payload, "chat")
+        return data.get("message", {}).get("content", "")
+
+    async def generate_chat_response(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Versión conversacional de generate_response: mismo manejo de errores, pero
+        enviando el historial como mensajes en lugar de un único prompt.
+        """
+        try:
+            logger.info(f"Enviando conversación a Ollama ({self.model}, {len(messages)} mensajes)...")
+            respuesta = await self.chat_completion(messages)
+            return respuesta or "No se obtuvo una respuesta válida del modelo."
+
+        except httpx.ConnectError:
+            logger.error("Error: No se pudo conectar con el servidor de Ollama. ¿Está encendido?")
+            return "Error técnico: El motor de IA no está disponible en este momento."
+
+        except httpx.ReadTimeout:
+            logger.error("Error: La IA tardó demasiado en responder (Timeout).")
+            return "La IA está procesando demasiada información, por favor intenta de nuevo en un momento."
+
+        except Exception as e:
+            logger.error(f"Error inesperado en OllamaService: {str(e)}")
+            return "Lo siento, ocurrió un error interno al procesar tu consulta."
+
+    async def precargar_modelo(self):
+        """
+        Carga el modelo en la memoria de Ollama sin generar texto (petición sin prompt),
+        así la primera conversación no paga la carga. Propaga los errores.
+        """
+        await self._post(f"{self.base_url}/api/generate", {"model": self.model}, "precarga")
 
     async def check_health(self) -> bool:
         """
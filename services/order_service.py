@@ -0,0 +1,257 @@
+import datetime
+from collections import defaultdict
+from typing import Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy import Row, case, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from models.db_models import DetallesPedido, Pedido, Producto
+from services.inventory_versions import versiones_inventario
+from services.sales_rollup import registrar_ventas
+
+
+class OrderService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _bloquear_productos(self, ids: List[int]) -> Dict[int, Row]:
+        # Orden fijo de bloqueo para que dos pedidos no se bloqueen mutuamente
+        productos = self.db.execute(
+            select(
+                Producto.id_producto, Producto.nombre_producto, Producto.precio_producto,
+                Producto.stock_producto, Producto.id_vendedor
+            ).where(Producto.id_producto.in_(ids))
+            .order_by(Producto.id_producto)
+            .with_for_update()
+        ).all()
+        return {p.id_producto: p for p in productos}
+
+    def _descontar_stock(self, cantidades: Dict[int, int]) -> bool:
+        """
+        Descuento condicional en un solo UPDATE (cantidades pasadas como CASE).
+        Devuelve False si algún producto no tenía stock suficiente.
+        """
+        cantidad_por_id = case(cantidades, value=Producto.id_producto)
+        resultado = self.db.execute(
+            update(Producto)
+            .where(Producto.id_producto.in_(list(cantidades)), Producto.stock_producto >= cantidad_por_id)
+            .values(stock_producto=Producto.stock_producto - cantidad_por_id)
+            .execution_options(synchronize_session=False)
+        )
+        return resultado.rowcount == len(cantidades)
+
+    def crear_pedido(self, order_data) -> Dict:
+        """
+        Crea el pedido en una sola transacción (RF-04):
+        1. Un SELECT ... FOR UPDATE con todos los productos (bloquea sus filas)
+        2. Un UPDATE condicional que descuenta el stock de todos a la vez
+        3. Cabecera + INSERT masivo de detalles + agregado diario
+        4. Un único commit
+        Dos checkouts simultáneos del mismo producto se serializan en el paso 1,
+        y la condición stock >= cantidad del paso 2 impide vender de más aunque
+        el motor no soporte FOR UPDATE.
+        """
+        # Un producto puede venir repetido en el carrito: se suma la cantidad
+        cantidades = defaultdict(int)
+        for item in order_data.items:
+            if item.cantidad <= 0:
+                raise HTTPException(status_code=400, detail="La cantidad debe ser mayor a cero")
+            cantidades[item.id_producto] += item.cantidad
+        if not cantidades:
+            raise HTTPException(status_code=400, detail="El pedido no tiene productos")
+        ids = sorted(cantidades)
+
+        try:
+            encontrados = self._bloquear_productos(ids)
+            for id_producto in ids:
+                producto = encontrados.get(id_producto)
+                if producto is None:
+                    raise HTTPException(status_code=400, detail=f"Producto {id_producto} no encontrado")
+                if (producto.stock_producto or 0) < cantidades[id_producto]:
+                    raise HTTPException(status_code=400, detail=f"Stock insuficiente para {producto.nombre_producto}")
+
+            if not self._descontar_stock(cantidades):
+                raise HTTPException(status_code=409, detail="El stock cambió durante el pedido, intenta de nuevo")
+
+            items = []
+            total_pedido = 0
+            for id_producto in ids:
+                producto = encontrados[id_producto]
+                subtotal = producto.precio_producto * cantidades[id_producto]
+                total_pedido += subtotal
+                items.append({
+                    "id_producto": id_producto,
+                    "id_vendedor": producto.id_vendedor,
+                    "cantidad": cantidades[id_producto],
+                    "precio_unitario": producto.precio_producto,
+                    "subtotal": subtotal
+                })
+
+            # Cabecera: flush para obtener id_pedido sin cerrar la transacción
+            nuevo_pedido = Pedido(
+                id_consumidor=order_data.id_consumidor,
+                id_vendedor=order_data.id_vendedor,
+                fecha_pedido=datetime.datetime.now(),
+                estado_pedido="PENDIENTE", # RF-05: Estado inicial
+                total=total_pedido,
+                metodo_pago=order_data.metodo_pago
+            )
+            self.db.add(nuevo_pedido)
+            self.db.flush()
+
+            self.db.execute(insert(DetallesPedido), [
+                {
+                    "id_pedido": nuevo_pedido.id_pedido,
+                    "id_producto": item["id_producto"],
+                    "cantidad": item["cantidad"],
+                    "precio_unitario": item["precio_unitario"],
+                    "subtotal": item["subtotal"]
+                }
+                for item in items
+            ])
+            registrar_ventas(self.db, nuevo_pedido.fecha_pedido.date(), items)
+
+            # Se arma la respuesta antes del commit para no recargar el pedido
+            respuesta = {
+                "id_pedido": nuevo_pedido.id_pedido,
+                "id_consumidor": nuevo_pedido.id_consumidor,
+                "id_vendedor": nuevo_pedido.id_vendedor,
+                "fecha_pedido": nuevo_pedido.fecha_pedido,
+                "total": nuevo_pedido.total,
+                "estado_pedido": nuevo_pedido.estado_pedido
+            }
+            self.db.commit()
+            # El stock cambió: los listados de inventario de esos vendedores ya no son válidos
+            versiones_inventario.incrementar({item["id_vendedor"] for item in items})
+            return respuesta
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _insertar_cabeceras(self, cabeceras: List[Dict]) -> List[int]:
+        """
+        Inserta las cabeceras y devuelve sus id_pedido en el mismo orden.
+        - INSERT ... RETURNING por lotes (SQLite, PostgreSQL, MariaDB): un solo executemany
+        - MySQL no devuelve ids de un executemany: un único INSERT de varias filas;
+          InnoDB asigna ids consecutivos (de a auto_increment_increment) a las filas
+          de una misma sentencia con cantidad conocida, y LAST_INSERT_ID() es el primero
+        - Otros motores: fila a fila dentro de la misma transacción
+        """
+        dialecto = self.db.get_bind().dialect
+        if dialecto.insert_executemany_returning_sort_by_parameter_order:
+            filas = self.db.execute(
+                insert(Pedido).returning(Pedido.id_pedido, sort_by_parameter_order=True), cabeceras
+            ).all()
+            return [f.id_pedido for f in filas]
+        if dialecto.name in ("mysql", "mariadb"):
+            self.db.execute(insert(Pedido).values(cabeceras))
+            primero, incremento = self.db.execute(
+                text("SELECT LAST_INSERT_ID(), @@auto_increment_increment")
+            ).one()
+            return [primero + i * incremento for i in range(len(cabeceras))]
+        return [self.db.execute(insert(Pedido).values(**c)).inserted_primary_key[0] for c in cabeceras]
+
+    def crear_pedidos_lote(self, pedidos: List) -> List[Dict]:
+        """
+        Ingesta masiva (sincronización de pedidos offline/telefónicos) en UNA transacción:
+        - Demanda agregada por producto y un solo SELECT ... FOR UPDATE para todo el lote
+        - Asignación en orden de llegada: un pedido sin stock suficiente se rechaza
+          sin afectar a los demás
+        - UPDATE condicional de stock, cabeceras y detalles con executemany
+        Devuelve un resultado por pedido, en el mismo orden recibido.
+        """
+        resultados: List[Dict] = [None] * len(pedidos)
+        carritos = []
+        for i, pedido in enumerate(pedidos):
+            # Se valida cada línea antes de sumar: -1 y +2 del mismo producto no son un 1 válido
+            if not pedido.items or any(item.cantidad <= 0 for item in pedido.items):
+                resultados[i] = {"indice": i, "estado": "RECHAZADO", "detalle": "Cantidades inválidas"}
+                continue
+            cantidades = defaultdict(int)
+            for item in pedido.items:
+                cantidades[item.id_producto] += item.cantidad
+            carritos.append((i, pedido, cantidades))
+        if not carritos:
+            return resultados
+
+        ids = sorted({id_producto for _, _, cantidades in carritos for id_producto in cantidades})
+        try:
+            encontrados = self._bloquear_productos(ids)
+            disponible = {id_producto: (p.stock_producto or 0) for id_producto, p in encontrados.items()}
+
+            aceptados = []
+            descuento = defaultdict(int)
+            for i, pedido, cantidades in carritos:
+                faltante = next((id_producto for id_producto, cantidad in cantidades.items()
+                                 if disponible.get(id_producto, 0) < cantidad), None)
+                if faltante is not None:
+                    producto = encontrados.get(faltante)
+                    detalle = f"Stock insuficiente para {producto.nombre_producto}" if producto \
+                        else f"Producto {faltante} no encontrado"
+                    resultados[i] = {"indice": i, "estado": "RECHAZADO", "detalle": detalle}
+                    continue
+                for id_producto, cantidad in cantidades.items():
+                    disponible[id_producto] -= cantidad
+                    descuento[id_producto] += cantidad
+                aceptados.append((i, pedido, cantidades))
+
+            if not aceptados:
+                self.db.rollback()
+                return resultados
+            if not self._descontar_stock(dict(descuento)):
+                raise HTTPException(status_code=409, detail="El stock cambió durante la carga, intenta de nuevo")
+
+            ahora = datetime.datetime.now()
+            cabeceras = []
+            lineas = []
+            for i, pedido, cantidades in aceptados:
+                items = []
+                for id_producto in sorted(cantidades):
+                    producto = encontrados[id_producto]
+                    items.append({
+                        "id_producto": id_producto,
+                        "id_vendedor": producto.id_vendedor,
+                        "cantidad": cantidades[id_producto],
+                        "precio_unitario": producto.precio_producto,
+                        "subtotal": producto.precio_producto * cantidades[id_producto]
+                    })
+                cabeceras.append({
+                    "id_consumidor": pedido.id_consumidor,
+                    "id_vendedor": pedido.id_vendedor,
+                    "fecha_pedido": ahora,
+                    "estado_pedido": "PENDIENTE", # RF-05: Estado inicial
+                    "total": sum(item["subtotal"] for item in items),
+                    "metodo_pago": pedido.metodo_pago
+                })
+                lineas.append(items)
+
+            ids_pedido = self._insertar_cabeceras(cabeceras)
+            detalles = [
+                {
+                    "id_pedido": id_pedido,
+                    "id_producto": item["id_producto"],
+                    "cantidad": item["cantidad"],
+                    "precio_unitario": item["precio_unitario"],
+                    "subtotal": item["subtotal"]
+                }
+                for id_pedido, items in zip(ids_pedido, lineas)
+                for item in items
+            ]
+            self.db.execute(insert(DetallesPedido), detalles)
+            registrar_ventas(self.db, ahora.date(), [item for items in lineas for item in items])
+            self.db.commit()
+            versiones_inventario.incrementar({item["id_vendedor"] for items in lineas for item in items})
+        except Exception:
+            self.db.rollback()
+            raise
+
+        for (i, _, _), id_pedido, cabecera, items in zip(aceptados, ids_pedido, cabeceras, lineas):
+            resultados[i] = {
+                "indice": i,
+                "estado": "CREADO",
+                "id_pedido": id_pedido,
+                "total": cabecera["total"],
+                "lineas": len(items)
+            }
+        return resultados
@@ -1,4 +1,6 @@
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from core.database import SessionLocal
 from utils.text_normalizer import extraer_palabras_clave
 import unicodedata
@@ -286,11 +288,52 @@ def calcular_estado_precio(precio_usuario: float, precio_referencia: float) -> d
     }
 
 
-def recomendar_precio(nombre: str, precio_ingresado: float, unidad: str = "unidad"):
+def consulta_productos_similares(palabras: list):
     """
-    Recomienda precio considerando la unidad de medida
+    SQL (y parámetros) de los productos comparables: LIKE por palabra clave,
+    los 30 más baratos disponibles. Usa el índice (estado, precio_producto):
+    recorre los disponibles en orden de precio y se detiene en el LIMIT.
+    scripts/check_query_plans.py revisa su plan de ejecución.
+    SQL portable entre MySQL y SQLite (en SQLite, LOWER también quita acentos).
     """
-    db = SessionLocal()
+    # 🔹 Construir condiciones de búsqueda
+    condiciones = " OR ".join(
+        [f"LOWER(p.nombre_producto) LIKE :p{i}" for i in range(len(palabras))]
+    )
+
+    sql = text(f"""
+        SELECT 
+            p.id_producto, 
+            p.nombre_producto, 
+            p.precio_producto, 
+            p.unidad, 
+            p.stock_producto,
+            v.nombre_empresa,
+            v.direccion_empresa
+        FROM productos p
+        LEFT JOIN vendedores v ON p.id_vendedor = v.id_vendedor
+        WHERE ({condiciones})
+          AND p.estado = 'Disponible'
+          AND p.precio_producto > 0
+        ORDER BY p.precio_producto
+        LIMIT 30
+    """)
+
+    params = {
+        f"p{i}": f"%{palabras[i]}%"
+        for i in range(len(palabras))
+    }
+    return sql, params
+
+
+def recomendar_precio(nombre: str, precio_ingresado: float, unidad: str = "unidad", db: Session = None):
+    """
+    Recomienda precio considerando la unidad de medida.
+    Sin `db` abre (y cierra) su propia sesión.
+    """
+    sesion_propia = db is None
+    if sesion_propia:
+        db = SessionLocal()
     try:
         print(f"🔍 Iniciando análisis para: {nombre}")
         print(f"💰 Precio ingresado: ${precio_ingresado:.2f} / {unidad}")
@@ -324,34 +367,8 @@ def recomendar_precio(nombre: str, precio_ingresado: float, unidad: str = "unida
                 "consejo": f"Usa '{unidad_sugerida}' para {nombre}"
             }
 
-        # 🔹 Construir condiciones de búsqueda
-        condiciones = " OR ".join(
-            [f"LOWER(p.nombre_producto) LIKE :p{i}" for i in range(len(palabras))]
-        )
-
         # 🔹 Consulta SQL con información del vendedor
-        sql = text(f"""
-            SELECT 
-                p.id_producto, 
-                p.nombre_producto, 
-                p.precio_producto, 
-                p.unidad, 
-                p.stock_producto,
-                v.nombre_empresa,
-                v.direccion_empresa
-            FROM productos p
-            LEFT JOIN vendedores v ON p.id_vendedor = v.id_vendedor
-            WHERE ({condiciones})
-              AND p.estado = 'Disponible'
-              AND p.precio_producto > 0
-            ORDER BY p.precio_producto
-            LIMIT 30
-        """)
-
-        params = {
-            f"p{i}": f"%{palabras[i]}%"
-            for i in range(len(palabras))
-        }
+        sql, params = consulta_productos_similares(palabras)
 
         print(f"🔎 Parámetros: {params}")
 
@@ -620,5 +637,16 @@ def recomendar_precio(nombre: str, precio_ingresado: float, unidad: str = "unida
             "unidad": unidad
         }
     finally:
-        db.close()
-        print("🔒 Conexión a BD cerrada")
\ No newline at end of file
+        if sesion_propia:
+            db.close()
+            print("🔒 Conexión a BD cerrada")
+
+
+async def recomendar_precio_async(db: AsyncSession, nombre: str, precio_ingresado: float, unidad: str = "unidad"):
+    """
+    recomendar_precio sobre una sesión asíncrona: la consulta espera en el
+    driver async (sin hilo del threadpool) y el análisis se ejecuta igual.
+    """
+    return await db.run_sync(
+        lambda sesion: recomendar_precio(nombre, precio_ingresado, unidad, sesion)
+    )
\ No newline at end of file
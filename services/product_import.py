@@ -0,0 +1,105 @@
+import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.db_models import Producto
+
+# Columnas que se sobrescriben cuando el producto ya existe (nombre y vendedor son la clave)
+CAMPOS_ACTUALIZABLES = (
+    "descripcion_producto", "precio_producto", "stock_producto", "unidad", "id_subcategoria"
+)
+
+
+def _insert_upsert(dialecto: str):
+    """
+    INSERT que actualiza la fila existente con el mismo (vendedor, nombre),
+    apoyado en el índice único ux_productos_vendedor_nombre. None si el motor
+    no tiene upsert.
+    """
+    if dialecto in ("mysql", "mariadb"):
+        sentencia = mysql.insert(Producto)
+        return sentencia.on_duplicate_key_update({c: sentencia.inserted[c] for c in CAMPOS_ACTUALIZABLES})
+    if dialecto in ("sqlite", "postgresql"):
+        sentencia = (sqlite if dialecto == "sqlite" else postgresql).insert(Producto)
+        return sentencia.on_conflict_do_update(
+            index_elements=["id_vendedor", "nombre_producto"],
+            set_={c: sentencia.excluded[c] for c in CAMPOS_ACTUALIZABLES}
+        )
+    return None
+
+
+class ProductImporter:
+    """
+    Importación masiva del catálogo de un vendedor.
+    Cada lote es un SELECT de los nombres existentes (para contar insertados y
+    actualizados) y un INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE contra el
+    índice único (vendedor, nombre), en una transacción: dos importaciones
+    simultáneas no pueden duplicar un nombre. Sin upsert en el motor: UPDATE por
+    clave primaria (executemany) + INSERT multi-fila.
+    """
+
+    def __init__(self, db: Session, id_vendedor: int):
+        self.db = db
+        self.id_vendedor = id_vendedor
+
+    def guardar_lote(self, productos: List) -> Tuple[int, int]:
+        """
+        productos: ProductCreate ya validados. Upsert por (vendedor, nombre);
+        si un nombre se repite en el lote gana la última fila.
+        Devuelve (insertados, actualizados).
+        """
+        por_nombre: Dict[str, object] = {}
+        for producto in productos:
+            por_nombre[producto.nombre_producto.strip().lower()] = producto
+        if not por_nombre:
+            return 0, 0
+
+        nombres = list({p.nombre_producto.strip() for p in por_nombre.values()})
+        dialecto = self.db.get_bind().dialect.name
+        # Misma comparación que el índice único (MySQL ya la hace sin distinguir mayúsculas)
+        columna_nombre = Producto.nombre_producto.collate("NOCASE") if dialecto == "sqlite" \
+            else Producto.nombre_producto
+        try:
+            existentes = {}
+            for id_producto, nombre in self.db.query(Producto.id_producto, Producto.nombre_producto).filter(
+                Producto.id_vendedor == self.id_vendedor,
+                columna_nombre.in_(nombres)
+            ).order_by(Producto.id_producto):
+                # Si ya hay duplicados en la tabla se actualiza el más antiguo
+                existentes.setdefault(nombre.strip().lower(), id_producto)
+
+            ahora = datetime.datetime.now()
+            filas = [
+                {
+                    "nombre_producto": producto.nombre_producto.strip(),
+                    "id_vendedor": self.id_vendedor,
+                    "fecha_publicacion": ahora,
+                    "estado": "ACTIVO",
+                    **{campo: getattr(producto, campo) for campo in CAMPOS_ACTUALIZABLES}
+                }
+                for producto in por_nombre.values()
+            ]
+            actualizados = sum(1 for clave in por_nombre if clave in existentes)
+
+            upsert = _insert_upsert(dialecto)
+            if upsert is not None:
+                # Un nombre que otra importación insertó después del SELECT también se actualiza
+                self.db.execute(upsert, filas)
+            else:
+                actualizaciones = [
+                    {"id_producto": existentes[clave], **{c: fila[c] for c in CAMPOS_ACTUALIZABLES}}
+                    for clave, fila in zip(por_nombre, filas) if clave in existentes
+                ]
+                nuevos = [fila for clave, fila in zip(por_nombre, filas) if clave not in existentes]
+                if actualizaciones:
+                    self.db.execute(update(Producto), actualizaciones)
+                if nuevos:
+                    self.db.execute(insert(Producto), nuevos)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return len(filas) - actualizados, actualizados
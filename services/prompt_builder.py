@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import math
+from typing import Dict, List, Optional, Tuple
+
+from core.config import settings
+from services.conversation_store import ConversationStore
+from services.ollama_service import OllamaService
+from services.price_recommender import normalizar
+from utils.text_normalizer import extraer_palabras_clave
+
+logger = logging.getLogger(__name__)
+
+# Aproximación para español con tokenizadores tipo Llama (~4 caracteres por token)
+CARACTERES_POR_TOKEN = 4
+# Coste fijo de cada mensaje del chat (rol y separadores)
+TOKENS_POR_MENSAJE = 4
+MAX_TOKENS_RESUMEN = 250
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimación rápida de tokens sin cargar el tokenizador del modelo."""
+    if not texto:
+        return 0
+    return math.ceil(len(texto) / CARACTERES_POR_TOKEN)
+
+
+def recortar_a_tokens(texto: str, max_tokens: int) -> str:
+    """Corta el texto para que no supere max_tokens estimados."""
+    if estimar_tokens(texto) <= max_tokens:
+        return texto
+    return texto[:max(0, max_tokens * CARACTERES_POR_TOKEN - 1)].rstrip() + "…"
+
+
+def _tokens_mensaje(mensaje: Dict) -> int:
+    return estimar_tokens(mensaje["content"]) + TOKENS_POR_MENSAJE
+
+
+def rankear_productos(lineas: List[str], mensaje: str) -> List[str]:
+    """
+    Ordena las líneas de productos poniendo primero las que comparten palabras
+    clave con el mensaje del usuario. Mantiene el orden original en los empates.
+    """
+    palabras = {normalizar(p) for p in extraer_palabras_clave(mensaje)}
+    if not palabras:
+        return list(lineas)
+
+    def puntaje(item):
+        indice, linea = item
+        texto = normalizar(linea)
+        return (-sum(1 for p in palabras if p in texto), indice)
+
+    return [linea for _, linea in sorted(enumerate(lineas), key=puntaje)]
+
+
+class PromptBuilder:
+    """
+    Arma los mensajes para Ollama respetando un presupuesto de tokens:
+    encabezado + productos más relevantes + resumen + últimos turnos + mensaje nuevo.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, ventana: Optional[int] = None,
+                 fraccion_historial: float = 0.35, fraccion_resumen: float = 0.15):
+        self.max_tokens = max_tokens or settings.CHAT_PROMPT_MAX_TOKENS
+        self.ventana = ventana or settings.CHAT_HISTORY_VENTANA
+        self.fraccion_historial = fraccion_historial
+        self.fraccion_resumen = fraccion_resumen
+
+    def construir(self, encabezado: str, productos: List[str], historial: List[Dict],
+                  resumen: str, mensaje: str) -> Tuple[List[Dict], Dict]:
+        # El mensaje del usuario nunca puede ocupar más de una cuarta parte del presupuesto
+        mensaje = recortar_a_tokens(mensaje or "", self.max_tokens // 4)
+        fijo = estimar_tokens(encabezado) + TOKENS_POR_MENSAJE + estimar_tokens(mensaje) + TOKENS_POR_MENSAJE
+        disponible = max(0, self.max_tokens - fijo)
+
+        # 1. Historial: los turnos más recientes que quepan en su porción
+        presupuesto_historial = int(disponible * self.fraccion_historial)
+        recientes = []
+        usados = 0
+        for m in reversed(historial[-self.ventana:]):
+            t = _tokens_mensaje(m)
+            if usados + t > presupuesto_historial:
+                break
+            recientes.append(m)
+            usados += t
+        recientes.reverse()
+
+        # 2. Resumen de los turnos que ya salieron de la ventana
+        bloque_resumen = ""
+        if resumen:
+            bloque_resumen = "Resumen de la conversación anterior: " + recortar_a_tokens(
+                resumen, int(disponible * self.fraccion_resumen)
+            )
+            usados += estimar_tokens(bloque_resumen)
+
+        # 3. Productos: todo lo que sobra, priorizando los relevantes para el mensaje
+        presupuesto_productos = disponible - usados
+        costes = [estimar_tokens(linea) + 1 for linea in productos]
+        if sum(costes) <= presupuesto_productos:
+            incluidas = list(productos)
+        else:
+            incluidas = []
+            ocupado = 0
+            # Se reserva espacio para la nota de productos omitidos
+            limite = presupuesto_productos - 12
+            for linea in rankear_productos(productos, mensaje):
+                t = estimar_tokens(linea) + 1
+                if ocupado + t > limite:
+                    break
+                incluidas.append(linea)
+                ocupado += t
+        omitidos = len(productos) - len(incluidas)
+
+        partes = [encabezado]
+        if incluidas:
+            partes.append("\n".join(incluidas))
+        if omitidos:
+            partes.append(f"(... y {omitidos} productos más no listados)")
+        if bloque_resumen:
+            partes.append(bloque_resumen)
+        sistema = {"role": "system", "content": "\n".join(partes)}
+
+        mensajes = [sistema, *recientes, {"role": "user", "content": mensaje}]
+        info = {
+            "tokens_estimados": sum(_tokens_mensaje(m) for m in mensajes),
+            "productos_incluidos": len(incluidas),
+            "productos_omitidos": omitidos,
+            "mensajes_historial": len(recientes),
+        }
+        return mensajes, info
+
+
+def resumen_extractivo(resumen_previo: str, mensajes: List[Dict]) -> str:
+    """Resumen de respaldo cuando la IA no está disponible: conserva las preguntas del usuario."""
+    preguntas = [recortar_a_tokens(m["content"], 25) for m in mensajes if m["role"] == "user"]
+    partes = ([resumen_previo] if resumen_previo else []) + (["El usuario preguntó: " + "; ".join(preguntas)] if preguntas else [])
+    return recortar_a_tokens(" ".join(partes), MAX_TOKENS_RESUMEN)
+
+
+class HistorySummarizer:
+    """
+    Compacta los turnos antiguos en un resumen acumulado.
+    Se ejecuta como tarea en segundo plano, fuera del camino de la petición.
+    Compacta hasta el id del último mensaje resumido (no por cantidad): los que
+    llegan mientras la IA resume se conservan. _en_curso solo evita resúmenes
+    simultáneos dentro del proceso; entre workers (backend sqlite) el store
+    descarta el resumen si otro compactó antes.
+    """
+
+    def __init__(self, store: ConversationStore, ventana: Optional[int] = None, umbral: Optional[int] = None):
+        self.store = store
+        self.ventana = ventana or settings.CHAT_HISTORY_VENTANA
+        self.umbral = umbral or settings.CHAT_RESUMEN_UMBRAL
+        self.ai = OllamaService()
+        self._en_curso = set()
+        self._tareas = set()  # Referencias fuertes para que el GC no cancele las tareas
+
+    def programar(self, id_usuario):
+        """Lanza el resumen si hay suficientes mensajes fuera de la ventana."""
+        if id_usuario in self._en_curso:
+            return
+        if len(self.store.obtener(id_usuario)) - self.ventana < self.umbral:
+            return
+        self._en_curso.add(id_usuario)
+        tarea = asyncio.get_running_loop().create_task(self._resumir(id_usuario))
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+
+    async def _resumir(self, id_usuario):
+        try:
+            previo = self.store.obtener_resumen(id_usuario)
+            con_ids = self.store.obtener_con_ids(id_usuario)[:-self.ventana]
+            if not con_ids:
+                return
+            hasta_id = con_ids[-1][0]
+            antiguos = [m for _, m in con_ids]
+            try:
+                nuevo = await self._resumir_con_ia(previo, antiguos)
+            except Exception as e:
+                logger.warning(f"No se pudo resumir con la IA, se usa resumen extractivo: {str(e)}")
+                nuevo = ""
+            if not nuevo.strip():
+                nuevo = resumen_extractivo(previo, antiguos)
+            if not self.store.compactar(id_usuario, hasta_id, previo, recortar_a_tokens(nuevo, MAX_TOKENS_RESUMEN)):
+                logger.info(f"El historial de {id_usuario} ya se compactó en otro worker; se descarta este resumen")
+        except Exception as e:
+            logger.error(f"Error al compactar el historial de {id_usuario}: {str(e)}")
+        finally:
+            self._en_curso.discard(id_usuario)
+
+    async def _resumir_con_ia(self, previo: str, mensajes: List[Dict]) -> str:
+        conversacion = "\n".join(f"{m['role']}: {m['content']}" for m in mensajes)
+        instrucciones = (
+            "Resume en español y en máximo 5 frases los datos importantes de esta conversación "
+            "entre un usuario y MercadoBot: productos, precios, cantidades y decisiones. "
+            "Integra el resumen previo si existe. Responde solo con el resumen."
+        )
+        contenido = (f"Resumen previo: {previo}\n\n" if previo else "") + f"Conversación:\n{conversacion}"
+        return await self.ai.chat_completion(
+            [{"role": "system", "content": instrucciones}, {"role": "user", "content": contenido}],
+            num_predict=MAX_TOKENS_RESUMEN,
+            temperature=0.2,
+        )
@@ -0,0 +1,133 @@
+import datetime
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from models.db_models import DetallesPedido, Pedido, Producto, VentaDiaria
+
+logger = logging.getLogger(__name__)
+
+
+def consulta_agregado_ventas(desde: datetime.datetime, hasta: datetime.datetime):
+    """
+    Ventas por producto y día de los pedidos con fecha en [desde, hasta), con las
+    columnas de 'ventas_diarias'. scripts/check_query_plans.py revisa su plan.
+    """
+    dia = func.date(Pedido.fecha_pedido)
+    return select(
+        DetallesPedido.id_producto,
+        dia,
+        Producto.id_vendedor,
+        func.sum(DetallesPedido.cantidad),
+        func.sum(DetallesPedido.subtotal),
+    ).join(Pedido, Pedido.id_pedido == DetallesPedido.id_pedido)\
+        .join(Producto, Producto.id_producto == DetallesPedido.id_producto)\
+        .where(Pedido.fecha_pedido >= desde, Pedido.fecha_pedido < hasta)\
+        .group_by(DetallesPedido.id_producto, dia, Producto.id_vendedor)
+
+
+def _upsert_ventas(db: Session, filas: list):
+    """Suma cantidades/ingresos a 'ventas_diarias' creando la fila si no existe."""
+    dialecto = db.get_bind().dialect.name
+    if dialecto in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as insert_dialecto
+        stmt = insert_dialecto(VentaDiaria).values(filas)
+        stmt = stmt.on_duplicate_key_update(
+            cantidad=VentaDiaria.cantidad + stmt.inserted.cantidad,
+            ingresos=VentaDiaria.ingresos + stmt.inserted.ingresos,
+        )
+    elif dialecto in ("sqlite", "postgresql"):
+        if dialecto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+        else:
+            from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+        stmt = insert_dialecto(VentaDiaria).values(filas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VentaDiaria.id_producto, VentaDiaria.fecha],
+            set_={
+                "cantidad": VentaDiaria.cantidad + stmt.excluded.cantidad,
+                "ingresos": VentaDiaria.ingresos + stmt.excluded.ingresos,
+            },
+        )
+    else:
+        # Sin upsert nativo: UPDATE de la fila existente y, si no había, INSERT
+        for fila in filas:
+            actualizadas = db.execute(
+                update(VentaDiaria)
+                .where(VentaDiaria.id_producto == fila["id_producto"], VentaDiaria.fecha == fila["fecha"])
+                .values(cantidad=VentaDiaria.cantidad + fila["cantidad"],
+                        ingresos=VentaDiaria.ingresos + fila["ingresos"])
+            ).rowcount
+            if not actualizadas:
+                db.execute(insert(VentaDiaria).values(fila))
+        return
+    db.execute(stmt)
+
+
+def registrar_ventas(db: Session, fecha: datetime.date, items: Iterable[Dict]):
+    """
+    Acumula en el agregado diario las líneas de un pedido.
+    No hace commit: debe ejecutarse dentro de la misma transacción que el pedido.
+    items: dicts con id_producto, id_vendedor, cantidad y subtotal.
+    """
+    acumulado = defaultdict(lambda: [0, 0.0])
+    vendedores = {}
+    for item in items:
+        acumulado[item["id_producto"]][0] += item["cantidad"]
+        acumulado[item["id_producto"]][1] += item["subtotal"]
+        vendedores[item["id_producto"]] = item["id_vendedor"]
+    if not acumulado:
+        return
+
+    filas = [
+        {
+            "id_producto": id_producto,
+            "fecha": fecha,
+            "id_vendedor": vendedores[id_producto],
+            "cantidad": cantidad,
+            "ingresos": ingresos,
+        }
+        # Orden fijo para que dos pedidos concurrentes bloqueen las filas en el mismo orden
+        for id_producto, (cantidad, ingresos) in sorted(acumulado.items())
+    ]
+    _upsert_ventas(db, filas)
+
+
+def reconstruir_ventas_diarias(db: Session, desde: Optional[datetime.date] = None,
+                               hasta: Optional[datetime.date] = None, dias_por_lote: int = 31) -> int:
+    """
+    Recalcula 'ventas_diarias' desde 'detalles_pedido' para [desde, hasta].
+    Cada bloque de días se borra y reinserta en su propia transacción (INSERT ... SELECT).
+    Devuelve el número de filas generadas.
+    """
+    if desde is None or hasta is None:
+        minimo, maximo = db.query(func.min(Pedido.fecha_pedido), func.max(Pedido.fecha_pedido)).one()
+        if minimo is None:
+            return 0
+        desde = desde or minimo.date()
+        hasta = hasta or maximo.date()
+
+    total = 0
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(hasta, inicio + datetime.timedelta(days=dias_por_lote - 1))
+        limite_inferior = datetime.datetime.combine(inicio, datetime.time.min)
+        limite_superior = datetime.datetime.combine(fin + datetime.timedelta(days=1), datetime.time.min)
+        agregado = consulta_agregado_ventas(limite_inferior, limite_superior)
+
+        try:
+            db.execute(delete(VentaDiaria).where(VentaDiaria.fecha >= inicio, VentaDiaria.fecha <= fin))
+            resultado = db.execute(insert(VentaDiaria).from_select(
+                ["id_producto", "fecha", "id_vendedor", "cantidad", "ingresos"], agregado
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        total += max(resultado.rowcount or 0, 0)
+        logger.info(f"ventas_diarias reconstruida para {inicio} a {fin}")
+        inicio = fin + datetime.timedelta(days=1)
+    return total
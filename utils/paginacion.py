@@ -0,0 +1,30 @@
+import base64
+import json
+from typing import List
+
+from fastapi import HTTPException
+
+LIMITE_MAXIMO = 1000
+
+
+def codificar_cursor(*valores) -> str:
+    """Cursor opaco (base64 URL-safe) con los valores de la clave de orden de la última fila."""
+    crudo = json.dumps([v.isoformat() if hasattr(v, "isoformat") else v for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, largo: int) -> List:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if not isinstance(valores, list) or len(valores) != largo:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return valores
+
+
+def validar_limite(limit: int) -> int:
+    if limit < 1 or limit > LIMITE_MAXIMO:
+        raise HTTPException(status_code=400, detail=f"limit debe estar entre 1 y {LIMITE_MAXIMO}")
+    return limit
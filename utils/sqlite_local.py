@@ -0,0 +1,28 @@
+import os
+import sqlite3
+import threading
+
+
+class ConexionesSQLite:
+    """
+    Conexiones a un archivo SQLite local en modo WAL, una por hilo (sqlite3 no
+    permite compartirlas entre hilos). Varios workers de uvicorn pueden usar el
+    mismo archivo: las lecturas no bloquean a la escritura.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._local = threading.local()
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def conexion(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
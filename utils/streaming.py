@@ -0,0 +1,63 @@
+import csv
+import json
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from starlette.requests import Request
+
+
+async def leer_lineas(request: Request, encoding: str = "utf-8") -> AsyncIterator[str]:
+    """
+    Recorre el cuerpo de la petición línea a línea a medida que llega,
+    sin cargarlo completo en memoria (NDJSON, CSV).
+    """
+    resto = b""
+    async for bloque in request.stream():
+        resto += bloque
+        *lineas, resto = resto.split(b"\n")
+        for linea in lineas:
+            yield linea.rstrip(b"\r").decode(encoding)
+    if resto:
+        yield resto.rstrip(b"\r").decode(encoding)
+
+
+async def leer_ndjson(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    """Genera (número de línea, valor) por cada línea no vacía; el valor es None si el JSON es inválido."""
+    numero = 0
+    async for linea in leer_lineas(request):
+        numero += 1
+        if not linea.strip():
+            continue
+        try:
+            yield numero, json.loads(linea)
+        except ValueError:
+            yield numero, None
+
+
+async def leer_csv(request: Request, delimitador: str = ",") -> AsyncIterator[Tuple[int, Optional[Dict[str, str]]]]:
+    """
+    Genera (número de línea, fila como dict) usando la primera línea como cabecera.
+    Los campos entre comillas pueden contener saltos de línea: se acumulan
+    líneas hasta que las comillas quedan balanceadas. La fila es None si no
+    tiene el mismo número de columnas que la cabecera.
+    """
+    cabecera = None
+    pendiente = None
+    inicio = numero = 0
+    async for linea in leer_lineas(request, encoding="utf-8-sig"):
+        numero += 1
+        if pendiente is None:
+            pendiente, inicio = linea, numero
+        else:
+            pendiente += "\n" + linea
+        if pendiente.count('"') % 2:
+            continue
+        registro, pendiente = pendiente, None
+        if not registro.strip():
+            continue
+        valores = next(csv.reader([registro], delimiter=delimitador))
+        if cabecera is None:
+            cabecera = [c.strip() for c in valores]
+            continue
+        yield inicio, dict(zip(cabecera, valores)) if len(valores) == len(cabecera) else None
+    if pendiente is not None and cabecera is not None:
+        yield inicio, None